@@ -0,0 +1,135 @@
+# benchmarks/bench_ann.py
+# Recall@k vs latency of the local store's IVF index against the exact scan,
+# on a synthetic corpus shaped like ours: papers of ~300 chunks whose vectors
+# cluster around a per-paper topic, topics spread over categories.
+#
+#   python benchmarks/bench_ann.py [--rows 200000] [--dim 384] [--queries 200]
+#                                  [--k 10] [--nprobe 1,2,4,8,16,32,64]
+#
+# Real embeddings have 1536 dimensions; --dim 1536 reproduces the production
+# memory footprint (rows × 6 KB) at a proportionally higher scan cost.
+
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from src.data.ivf_index import IVF_MIN_ROWS, IVF_NPROBE
+from src.data.local_vectorstore import LocalVectorStore
+
+CHUNKS_PER_PAPER = 300
+INSERT_BATCH = 10_000
+
+
+def synthetic_corpus(rows: int, dim: int, seed: int = 0):
+    """Unit vectors: category → paper topic → chunk, with decreasing spread."""
+    rng = np.random.default_rng(seed)
+    papers = max(1, rows // CHUNKS_PER_PAPER)
+    categories = rng.standard_normal((max(1, papers // 50), dim)).astype(np.float32)
+    topics = categories[rng.integers(0, len(categories), papers)] + 0.6 * rng.standard_normal((papers, dim))
+    paper_of = np.minimum(np.arange(rows) // CHUNKS_PER_PAPER, papers - 1)
+    vectors = topics[paper_of] + 0.9 * rng.standard_normal((rows, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32), paper_of
+
+
+def add(store: LocalVectorStore, vectors: np.ndarray, paper_of: np.ndarray, offset: int = 0) -> float:
+    """Insert in ingestion-sized batches; returns rows per second."""
+    start = time.perf_counter()
+    for i in range(0, len(vectors), INSERT_BATCH):
+        part = slice(i, i + INSERT_BATCH)
+        rows = range(offset + i, offset + i + len(vectors[part]))
+        store.add_embeddings(
+            [""] * len(rows), vectors[part],
+            [{"arxiv_id": f"bench.{p:05d}", "chunk_index": r % CHUNKS_PER_PAPER} for p, r in zip(paper_of[part], rows)],
+            ids=[f"chunk-{r}" for r in rows],
+        )
+    return len(vectors) / (time.perf_counter() - start)
+
+
+def run(store: LocalVectorStore, queries: np.ndarray, k: int, **kwargs):
+    """(row ids per query, per-query latencies in ms)."""
+    results, latencies = [], []
+    for q in queries:
+        start = time.perf_counter()
+        hits = store.search_by_vector(q, k, **kwargs)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append([store.ids[row] for row, _ in hits])
+    return results, np.asarray(latencies)
+
+
+def recall(results, truth, k: int) -> float:
+    return float(np.mean([len(set(r[:k]) & set(t[:k])) / max(1, min(k, len(t))) for r, t in zip(results, truth)]))
+
+
+def report(label: str, latencies: np.ndarray, exact_p50: float, value: str = ""):
+    p50, p95 = np.percentile(latencies, 50), np.percentile(latencies, 95)
+    print(f"   {label:<16} {value:>8}  p50={p50:7.2f}ms  p95={p95:7.2f}ms  speed-up={exact_p50 / p50:6.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall@k vs latency of the IVF index against exact search.")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", default="1,2,4,8,16,32,64")
+    parser.add_argument("--insert-share", type=float, default=0.2,
+                        help="share of the corpus inserted after training (incremental insertion)")
+    args = parser.parse_args()
+
+    # the index is trained on the rows present before the incremental inserts
+    initial = int(args.rows * (1 - args.insert_share))
+    if initial < IVF_MIN_ROWS:
+        print(f"⚠️ {initial} rows before the incremental inserts is below IVF_MIN_ROWS={IVF_MIN_ROWS}: "
+              f"the store stays exact (raise --rows or lower --insert-share)")
+        return
+
+    vectors, paper_of = synthetic_corpus(args.rows, args.dim)
+    rng = np.random.default_rng(1)
+    # queries: perturbed chunks, so every query has a known neighbourhood
+    picks = rng.integers(0, args.rows, args.queries)
+    queries = vectors[picks] + 0.9 * rng.standard_normal((args.queries, args.dim)).astype(np.float32) / np.sqrt(args.dim)
+
+    with tempfile.TemporaryDirectory() as work:
+        store = LocalVectorStore(work, embedding=None, dimension=args.dim)
+        insert_rate = add(store, vectors[:initial], paper_of[:initial])
+        start = time.perf_counter()
+        store.optimize()
+        train_s = time.perf_counter() - start
+        incremental_rate = add(store, vectors[initial:], paper_of[initial:], offset=initial)
+        store.flush()
+        ann = store.ann_stats()
+
+        print(f"🧭 {args.rows} rows × {args.dim} dims, {args.queries} queries, k={args.k}")
+        print(f"   insert {insert_rate:,.0f} rows/s before training, {incremental_rate:,.0f} rows/s after "
+              f"({args.rows - initial} rows inserted incrementally)")
+        print(f"   trained {ann['nlist']} lists on {ann['trained_rows']} rows in {train_s:.1f}s "
+              f"(largest list {ann['max_list']}, {ann['empty_lists']} empty)")
+
+        truth, exact_ms = run(store, queries, args.k, exact=True)
+        exact_p50 = float(np.percentile(exact_ms, 50))
+        print(f"   {'search':<16} {'recall@' + str(args.k):>8}")
+        report("exact", exact_ms, exact_p50, "1.000")
+        for nprobe in (int(n) for n in args.nprobe.split(",")):
+            results, ms = run(store, queries, args.k, nprobe=nprobe)
+            label = f"ivf nprobe={nprobe}" + ("*" if nprobe == IVF_NPROBE else "")
+            report(label, ms, exact_p50, f"{recall(results, truth, args.k):.3f}")
+
+        # rag_search_filter: restricted to one paper's chunks
+        filters = [{"arxiv_id": f"bench.{paper_of[p]:05d}"} for p in picks]
+        results, ms = [], []
+        for q, f in zip(queries, filters):
+            start = time.perf_counter()
+            results.append(store.search_by_vector(q, args.k, filter=f))
+            ms.append((time.perf_counter() - start) * 1000)
+        report("filter arxiv_id", np.asarray(ms), exact_p50, "1.000")
+        print("   * default IVF_NPROBE; filtered searches below IVF_MIN_ROWS rows are exact")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# benchmarks/bench_extraction.py
+# Compares the old threaded extraction path (ThreadPoolExecutor(6) running
+# PyMuPDF + RecursiveCharacterTextSplitter) with the process-pool engine.
+#
+#   python benchmarks/bench_extraction.py [--pdf-dir data/pdfs] [--repeat 3]
+
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import glob
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.data.embeddings import PDF_CHUNK_SIZE, PDF_CHUNK_OVERLAP
+from src.data.extraction import ExtractionEngine, extract_and_split, EXTRACT_PROCESSES
+
+
+def run_threaded(pdf_paths, workers=6):
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        batches = list(executor.map(
+            lambda p: extract_and_split(p, PDF_CHUNK_SIZE, PDF_CHUNK_OVERLAP), pdf_paths
+        ))
+    return sum(len(b) for b in batches)
+
+
+def run_processes(engine, pdf_paths):
+    # one feeding thread per worker, like the ingestion pipeline's extract stage
+    with ThreadPoolExecutor(max_workers=engine.processes) as executor:
+        batches = list(executor.map(
+            lambda p: engine.extract(p, PDF_CHUNK_SIZE, PDF_CHUNK_OVERLAP), pdf_paths
+        ))
+    return sum(len(b) for b in batches)
+
+
+def timed(fn, repeat):
+    best, chunks = float("inf"), 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chunks = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pdf-dir", default="data/pdfs")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--processes", type=int, default=EXTRACT_PROCESSES)
+    args = parser.parse_args()
+
+    pdf_paths = sorted(glob.glob(os.path.join(args.pdf_dir, "*.pdf")))
+    if not pdf_paths:
+        print(f"⚠️ No PDFs found in {args.pdf_dir}")
+        return
+
+    engine = ExtractionEngine(processes=args.processes)
+    # warm the pool so worker start-up is not billed to the first repeat
+    engine.extract(pdf_paths[0], PDF_CHUNK_SIZE, PDF_CHUNK_OVERLAP)
+
+    t_threads, n_threads = timed(lambda: run_threaded(pdf_paths), args.repeat)
+    t_procs, n_procs = timed(lambda: run_processes(engine, pdf_paths), args.repeat)
+    engine.shutdown()
+
+    print(f"📄 {len(pdf_paths)} PDFs, best of {args.repeat}")
+    print(f"   threads(6)     {t_threads:6.2f}s  {len(pdf_paths) / t_threads:6.1f} PDFs/s  {n_threads / t_threads:7.0f} chunks/s")
+    print(f"   processes({engine.processes:<2}) {t_procs:6.2f}s  {len(pdf_paths) / t_procs:6.1f} PDFs/s  {n_procs / t_procs:7.0f} chunks/s")
+    print(f"   speed-up       {t_threads / t_procs:6.2f}x")
+    if n_threads != n_procs:
+        print(f"⚠️ Chunk counts differ: threads={n_threads} processes={n_procs}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# benchmarks/bench_import.py
+# Cold-start cost of the app's entry points: wall time to import each one in a
+# fresh interpreter, whether the import touched the network or prompted for a
+# key, and the slowest modules according to `python -X importtime`.
+#
+#   python benchmarks/bench_import.py [--repeat 5] [--top 10]
+
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import json
+import statistics
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+TARGETS = {
+    "src.config": "import src.config",
+    "src.decision.graph": "import src.decision.graph",
+    "app.py": "import runpy; runpy.run_path('app.py', run_name='__main__')",
+}
+
+# runs in the child: counts DNS lookups, socket connects and getpass prompts, then times the import
+PROBE = r"""
+import json, socket, getpass, time, logging
+logging.disable(logging.WARNING)
+events = {"dns": [], "connect": 0, "getpass": 0}
+_getaddrinfo, _connect = socket.getaddrinfo, socket.socket.connect
+def getaddrinfo(host, *a, **k):
+    events["dns"].append(str(host))
+    return _getaddrinfo(host, *a, **k)
+def connect(self, *a, **k):
+    events["connect"] += 1
+    return _connect(self, *a, **k)
+def fake_getpass(*a, **k):
+    events["getpass"] += 1
+    return ""
+socket.getaddrinfo, socket.socket.connect, getpass.getpass = getaddrinfo, connect, fake_getpass
+start = time.perf_counter()
+{statement}
+events["import_s"] = time.perf_counter() - start
+print("@@" + json.dumps(events))
+"""
+
+
+def run_probe(statement: str, env: dict) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE.replace("{statement}", statement)],
+        cwd=ROOT, env=env, capture_output=True, text=True, stdin=subprocess.DEVNULL, timeout=300,
+    )
+    line = next((l for l in out.stdout.splitlines() if l.startswith("@@")), None)
+    if line is None:
+        raise RuntimeError(f"probe failed:\n{out.stderr[-2000:]}")
+    return json.loads(line[2:])
+
+
+def slowest_imports(statement: str, env: dict, top: int):
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT, env=env, capture_output=True, text=True, stdin=subprocess.DEVNULL, timeout=300,
+    )
+    rows = []
+    for line in out.stderr.splitlines():
+        # "import time:   self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, self_us, cumulative_us, name = [p.strip() for p in line.replace("import time:", "|", 1).split("|")]
+        rows.append((int(cumulative_us), int(self_us), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time benchmark for the app's entry points.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    # no keys: the import must neither prompt nor fail; local backend so nothing needs Pinecone
+    env = {k: v for k, v in os.environ.items() if k not in ("OPENAI_API_KEY", "PINECONE_API_KEY")}
+    env.setdefault("VECTOR_BACKEND", "local")
+    env["PYTHONPATH"] = ROOT
+
+    failed = False
+    for name, statement in TARGETS.items():
+        runs = [run_probe(statement, env) for _ in range(args.repeat)]
+        times = [r["import_s"] for r in runs]
+        last = runs[-1]
+        touched = bool(last["dns"]) or last["connect"] > 0
+        print(f"📦 {name:<20} median {statistics.median(times) * 1000:7.0f} ms  "
+              f"best {min(times) * 1000:7.0f} ms  "
+              f"network={'YES ' + ','.join(sorted(set(last['dns']))) if touched else 'no'}  "
+              f"getpass={last['getpass']}")
+        failed |= touched or last["getpass"] > 0
+
+        for cumulative_us, self_us, module in slowest_imports(statement, env, args.top):
+            print(f"      {cumulative_us / 1000:8.1f} ms  {module}")
+
+    if failed:
+        print("⚠️ An entry point touched the network or prompted at import time.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+# benchmarks/bench_offline.py
+# End-to-end throughput and latency without API keys: arXiv, SerpAPI,
+# Wikipedia and the PDFs are served by a local HTTP server, embeddings are
+# deterministic fakes, the oracle replays a scripted plan and the vector
+# store is the local backend under a RAM-backed temp dir.
+#
+#   python benchmarks/bench_offline.py [--pdfs 20] [--queries 200] [--questions 20]
+#                                      [--latency-ms 0] [--baseline results/x.json]
+#
+# Results are saved to benchmarks/results/ and compared with the previous run
+# (or --baseline); metrics that got worse by more than --tolerance are flagged.
+
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import asyncio
+import glob
+import json
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from offline import (
+    OfflineServer, FakeEmbeddings, ScriptedOracle, DEFAULT_PLAN,
+    configure_environment, install_fakes, find_pdfs, synthetic_pdfs,
+)
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+QUERY_WORDS = ["graph", "search", "agent", "vector", "logic", "learning", "retrieval",
+               "planning", "neural", "theory", "constraint", "bayesian", "tree", "index"]
+
+
+def percentiles(samples_s: List[float]) -> Dict[str, float]:
+    ms = np.asarray(samples_s) * 1000
+    return {
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+    }
+
+
+def timed_each(fn: Callable, items) -> List[float]:
+    samples = []
+    for item in items:
+        start = time.perf_counter()
+        fn(item)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def make_queries(n: int, seed: int = 0) -> List[str]:
+    rng = np.random.default_rng(seed)
+    return [" ".join(rng.choice(QUERY_WORDS, size=4)) + f" {i}" for i in range(n)]
+
+
+# ---------------- Scenarios ----------------
+def bench_download(n_pdfs: int) -> Dict:
+    from src.data.dataset import iter_arxiv_papers, process_papers
+
+    start = time.perf_counter()
+    papers = list(iter_arxiv_papers("cs.AI", max_results=n_pdfs, delay=0))
+    feed_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pdf_paths, metadata = process_papers(papers)
+    elapsed = time.perf_counter() - start
+    total_bytes = sum(os.path.getsize(p) for p in pdf_paths)
+    return {
+        "papers": len(papers),
+        "feed_s": feed_s,
+        "elapsed_s": elapsed,
+        "pdfs_per_s": len(pdf_paths) / elapsed,
+        "mb_per_s": total_bytes / elapsed / 1e6,
+        "_pdf_paths": pdf_paths,
+        "_metadata": metadata,
+    }
+
+
+def bench_index(pdf_paths: List[str], metadata: List[dict]) -> Dict:
+    from src.data.embeddings import create_embeddings
+    from src.data.retrieval_client import get_retrieval_client
+
+    start = time.perf_counter()
+    summary = create_embeddings(pdf_paths, metadata)
+    cold = time.perf_counter() - start
+
+    # unchanged corpus: everything should be skipped via the manifest
+    start = time.perf_counter()
+    create_embeddings(pdf_paths, metadata)
+    warm = time.perf_counter() - start
+
+    return {
+        "pdfs": len(summary["indexed_papers"]),
+        "chunks": summary["chunks"],
+        "elapsed_s": cold,
+        "pdfs_per_s": len(summary["indexed_papers"]) / cold,
+        "chunks_per_s": summary["chunks"] / cold,
+        "reindex_unchanged_s": warm,
+        "meta_bytes_per_chunk": get_retrieval_client().stats()["metadata_bytes_per_chunk"],
+    }
+
+
+def bench_query(n_queries: int) -> Dict:
+    from src.tools.rag_search import rag_search
+    from src.tools.rag_search_filter import rag_search_filter
+
+    queries = make_queries(n_queries)
+    cold = timed_each(lambda q: rag_search(q, top_k=5), queries)
+    # same queries again: served from the query-embedding and result caches
+    warm = timed_each(lambda q: rag_search(q, top_k=5), queries)
+    filtered = timed_each(lambda q: rag_search_filter(q + " filtered", "bench.00000v1", top_k=5), queries[:50])
+
+    return {
+        "queries": n_queries,
+        **{f"cold_{k}": v for k, v in percentiles(cold).items()},
+        **{f"warm_{k}": v for k, v in percentiles(warm).items()},
+        **{f"filter_{k}": v for k, v in percentiles(filtered).items()},
+        "cold_queries_per_s": n_queries / sum(cold),
+    }
+
+
+def bench_agent(n_questions: int) -> Dict:
+    import src.decision.graph as graph
+    from src.decision.streaming import stream_agent
+
+    questions = make_queries(n_questions, seed=1)
+    steps = 0
+
+    def ask(question):
+        nonlocal steps
+        out = graph.runnable.invoke({
+            "input": question, "messages": [], "intermediate_steps": [], "tool_usage": {}
+        })
+        steps += len(out["intermediate_steps"])
+
+    start = time.perf_counter()
+    latencies = timed_each(ask, questions)
+    elapsed = time.perf_counter() - start
+
+    # time to first event / first tool completion with the streaming runner
+    first_event, first_tool = [], []
+    for question in questions[: max(1, n_questions // 2)]:
+        start = time.perf_counter()
+        seen_event = seen_tool = None
+        for event in stream_agent({
+            "input": question + " (stream)", "messages": [], "intermediate_steps": [], "tool_usage": {}
+        }):
+            now = time.perf_counter() - start
+            seen_event = seen_event if seen_event is not None else now
+            if event["type"] == "tool_finish" and seen_tool is None:
+                seen_tool = now
+        first_event.append(seen_event)
+        first_tool.append(seen_tool if seen_tool is not None else time.perf_counter() - start)
+
+    # every question at once through the async graph on the shared event loop
+    from src.aio import run
+
+    peak_threads = threading.active_count()
+
+    async def ask_all():
+        nonlocal peak_threads
+
+        async def ask_async(question):
+            nonlocal peak_threads
+            await graph.async_runnable.ainvoke({
+                "input": question + " (async)", "messages": [], "intermediate_steps": [], "tool_usage": {}
+            })
+            peak_threads = max(peak_threads, threading.active_count())
+
+        await asyncio.gather(*(ask_async(q) for q in questions))
+
+    start = time.perf_counter()
+    run(ask_all())
+    async_elapsed = time.perf_counter() - start
+
+    return {
+        "questions": n_questions,
+        "steps": steps,
+        "steps_per_s": steps / elapsed,
+        "questions_per_s": n_questions / elapsed,
+        **percentiles(latencies),
+        "first_event_p50_ms": float(np.median(first_event) * 1000),
+        "first_tool_p50_ms": float(np.median(first_tool) * 1000),
+        "async_questions_per_s": n_questions / async_elapsed,
+        "async_peak_threads": peak_threads,
+    }
+
+
+# ---------------- Results ----------------
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _direction(metric: str) -> int:
+    """+1 when higher is better, -1 when lower is better, 0 for counts."""
+    if metric.endswith("_per_s"):
+        return 1
+    if metric.endswith("_ms") or metric.endswith("_s"):
+        return -1
+    return 0
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    regressions = []
+    print(f"\n📊 Compared with {baseline.get('commit') or '?'} ({baseline.get('timestamp', '?')})")
+    for scenario, metrics in current["scenarios"].items():
+        old_metrics = baseline.get("scenarios", {}).get(scenario, {})
+        for metric, value in metrics.items():
+            direction = _direction(metric)
+            old = old_metrics.get(metric)
+            if not direction or not isinstance(old, (int, float)) or not old:
+                continue
+            change = (value - old) / old
+            worse = -change * direction
+            flag = "❌" if worse > tolerance else ("✅" if worse < -tolerance else "  ")
+            print(f"   {flag} {scenario:<9} {metric:<22} {old:12.2f} → {value:12.2f} ({change:+.0%})")
+            if worse > tolerance:
+                regressions.append(f"{scenario}.{metric}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark of ingestion, retrieval and the agent graph.")
+    parser.add_argument("--pdf-dir", default="data/pdfs")
+    parser.add_argument("--pdfs", type=int, default=20, help="PDFs to serve (synthetic ones are generated if needed)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="simulated latency per HTTP response, embedding call and oracle turn")
+    parser.add_argument("--scenarios", default="download,index,query,agent")
+    parser.add_argument("--baseline", help="results file to compare with (default: latest in benchmarks/results)")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    scenarios = args.scenarios.split(",")
+    latency_s = args.latency_ms / 1000
+    # /dev/shm keeps the local index, caches and downloads in memory where available
+    work_dir = tempfile.mkdtemp(prefix="arxivista-bench-", dir="/dev/shm" if os.path.isdir("/dev/shm") else None)
+
+    pdf_paths = find_pdfs(args.pdf_dir, args.pdfs)
+    if len(pdf_paths) < args.pdfs:
+        pdf_paths += synthetic_pdfs(os.path.join(work_dir, "synthetic"), args.pdfs - len(pdf_paths))
+
+    server = OfflineServer(pdf_paths, latency_s=latency_s).start()
+    configure_environment(work_dir, server)
+    embeddings = FakeEmbeddings(latency_s=latency_s)
+    install_fakes(embeddings, ScriptedOracle(plan=DEFAULT_PLAN, latency_s=latency_s))
+
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _git_commit(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("baseline", "no_save")},
+        "scenarios": {},
+    }
+    try:
+        downloaded = None
+        if "download" in scenarios or "index" in scenarios:
+            print("⬇️  download ...")
+            downloaded = bench_download(args.pdfs)
+        if "index" in scenarios:
+            print("🧩 index ...")
+            results["scenarios"]["index"] = bench_index(downloaded["_pdf_paths"], downloaded["_metadata"])
+        if "download" in scenarios:
+            results["scenarios"]["download"] = {k: v for k, v in downloaded.items() if not k.startswith("_")}
+        if "query" in scenarios:
+            print("🔎 query ...")
+            results["scenarios"]["query"] = bench_query(args.queries)
+        if "agent" in scenarios:
+            print("🤖 agent ...")
+            results["scenarios"]["agent"] = bench_agent(args.questions)
+    finally:
+        from src.data.extraction import get_extraction_engine
+        get_extraction_engine().shutdown()
+        server.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    results["scenarios"]["services"] = {"http_requests": server.requests, "embedding_calls": embeddings.calls}
+
+    print("\n🏁 Results")
+    for scenario, metrics in results["scenarios"].items():
+        print(f"   {scenario}")
+        for metric, value in metrics.items():
+            shown = f"{value:.2f}" if isinstance(value, float) else value
+            print(f"      {metric:<22} {shown}")
+
+    baseline_path = args.baseline
+    if baseline_path is None:
+        previous = sorted(glob.glob(os.path.join(RESULTS_DIR, "offline-*.json")))
+        baseline_path = previous[-1] if previous else None
+    regressions = []
+    if baseline_path:
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"offline-{time.strftime('%Y%m%d-%H%M%S')}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Saved {path}")
+
+    if regressions:
+        print(f"⚠️ {len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
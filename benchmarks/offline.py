@@ -0,0 +1,320 @@
+# benchmarks/offline.py
+# Local stand-ins for every external service, so the real ingestion, retrieval
+# and agent code paths can be timed without API keys or network:
+#   - OfflineServer: arXiv Atom feed, PDFs, SerpAPI JSON and Wikipedia summaries
+#   - FakeEmbeddings: deterministic unit vectors derived from the text hash
+#   - ScriptedOracle: a chat model that replays a fixed tool plan
+#
+# Call `configure_environment` BEFORE importing anything from src (modules
+# read their configuration at import time), then `install_fakes`.
+
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import glob
+import json
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse, unquote
+from xml.sax.saxutils import escape
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+EMBEDDING_DIMENSION = 1536
+
+
+# ---------------- Fake Embeddings ----------------
+class FakeEmbeddings(Embeddings):
+    """
+    Deterministic embeddings: the same text always maps to the same unit
+    vector. `latency_s` is added per call to mimic an API round trip.
+    """
+
+    def __init__(self, dimension: int = EMBEDDING_DIMENSION, latency_s: float = 0.0,
+                 model: str = "text-embedding-3-small"):
+        self.dimension = dimension
+        self.latency_s = latency_s
+        self.model = model
+        self.calls = 0
+        self.texts = 0
+        self._lock = threading.Lock()
+
+    def _vector(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        v = np.random.default_rng(seed).standard_normal(self.dimension).astype(np.float32)
+        return (v / np.linalg.norm(v)).tolist()
+
+    def _count(self, n: int):
+        with self._lock:
+            self.calls += 1
+            self.texts += n
+        if self.latency_s:
+            time.sleep(self.latency_s)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self._count(len(texts))
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self._count(1)
+        return self._vector(text)
+
+
+# ---------------- Scripted Oracle ----------------
+def _fill(value, query: str):
+    """Substitute "{query}" in every string of a plan's tool arguments."""
+    if isinstance(value, str):
+        return value.replace("{query}", query)
+    if isinstance(value, list):
+        return [_fill(v, query) for v in value]
+    if isinstance(value, dict):
+        return {k: _fill(v, query) for k, v in value.items()}
+    return value
+
+
+class ScriptedOracle(BaseChatModel):
+    """
+    Replays `plan` (one list of (tool, args) per oracle turn); the turn is
+    derived from the scratchpad, so concurrent runs do not interfere. Tool-call
+    arguments are streamed in small pieces so runnable.stream sees
+    token-level chunks.
+    """
+
+    plan: List[List[tuple]]
+    latency_s: float = 0.0
+    chunk_chars: int = 16
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-oracle"
+
+    def bind_tools(self, tools, **kwargs):
+        # the plan already names the tools; nothing to bind
+        return self
+
+    def _turn(self, messages) -> List[tuple]:
+        # the last prompt message is the scratchpad: one "TOOL USED:" block per executed call
+        scratchpad = str(messages[-1].content) if messages else ""
+        executed = sum(1 for line in scratchpad.splitlines() if line.startswith("TOOL USED:"))
+        # parallel turns execute several calls: map the call count back to a plan turn
+        done, index = 0, 0
+        while index < len(self.plan) - 1 and done + len(self.plan[index]) <= executed:
+            done += len(self.plan[index])
+            index += 1
+        query = next((str(m.content) for m in messages if m.type == "human"), "")
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        return [(name, _fill(args, query)) for name, args in self.plan[index]]
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        calls = self._turn(messages)
+        message = AIMessage(content="", tool_calls=[
+            {"name": name, "args": args, "id": f"call_{i}"} for i, (name, args) in enumerate(calls)
+        ])
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        for i, (name, args) in enumerate(self._turn(messages)):
+            payload = json.dumps(args)
+            for start in range(0, len(payload), self.chunk_chars):
+                chunk = ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[{
+                    "name": name if start == 0 else None,
+                    "args": payload[start:start + self.chunk_chars],
+                    "id": f"call_{i}" if start == 0 else None,
+                    "index": i,
+                }]))
+                if run_manager:
+                    run_manager.on_llm_new_token("", chunk=chunk)
+                yield chunk
+
+
+DEFAULT_PLAN = [
+    [("rag_search", {"query": "{query}"}), ("web_search", {"query": "{query}"})],
+    [("final_answer", {
+        "introduction": "Offline benchmark answer for: {query}",
+        "research_steps": ["rag_search", "web_search"],
+        "main_body": "Synthetic report body. " * 40,
+        "conclusion": "Done.",
+        "sources": ["offline"],
+    })],
+]
+
+
+# ---------------- Local HTTP Server ----------------
+def _atom_feed(base_url: str, papers: List[dict], start: int, total: int) -> bytes:
+    entries = "".join(
+        "<entry>"
+        f"<id>{base_url}/abs/{p['arxiv_id']}</id>"
+        f"<title>{escape(p['title'])}</title>"
+        f"<summary>{escape(p['summary'])}</summary>"
+        "<author><name>Offline Bench</name></author>"
+        "</entry>"
+        for p in papers
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<feed xmlns="http://www.w3.org/2005/Atom" xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">'
+        f"<opensearch:totalResults>{total}</opensearch:totalResults>"
+        f"<opensearch:startIndex>{start}</opensearch:startIndex>"
+        f"{entries}</feed>"
+    ).encode("utf-8")
+
+
+class OfflineServer:
+    """
+    Threaded HTTP server on 127.0.0.1 with the endpoints the app calls:
+      /api/query            arXiv Atom feed with one entry per PDF in `pdf_paths`
+      /pdf/<arxiv_id>.pdf   the PDF bytes
+      /search               SerpAPI-shaped JSON
+      /wiki/<title>         Wikipedia summary JSON
+    `latency_s` is added to every response.
+    """
+
+    def __init__(self, pdf_paths: List[str], latency_s: float = 0.0):
+        self.pdf_paths = pdf_paths
+        self.latency_s = latency_s
+        self.requests: Dict[str, int] = {}
+        self.papers = [{
+            "arxiv_id": f"bench.{i:05d}v1",
+            "title": os.path.splitext(os.path.basename(path))[0],
+            "summary": f"Offline copy of {os.path.basename(path)}",
+            "path": path,
+        } for i, path in enumerate(pdf_paths)]
+        self._by_id = {p["arxiv_id"]: p for p in self.papers}
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                route = url.path.split("/")[1] if "/" in url.path else ""
+                server.requests[route] = server.requests.get(route, 0) + 1
+                if server.latency_s:
+                    time.sleep(server.latency_s)
+
+                if url.path == "/api/query":
+                    q = parse_qs(url.query)
+                    start = int(q.get("start", ["0"])[0])
+                    count = int(q.get("max_results", ["10"])[0])
+                    page = server.papers[start:start + count]
+                    self._send(200, _atom_feed(server.base_url, page, start, len(server.papers)),
+                               "application/atom+xml")
+                elif url.path.startswith("/pdf/"):
+                    paper = server._by_id.get(unquote(url.path[len("/pdf/"):])[:-len(".pdf")])
+                    if paper is None:
+                        self._send(404, b"not found", "text/plain")
+                        return
+                    with open(paper["path"], "rb") as f:
+                        self._send(200, f.read(), "application/pdf")
+                elif url.path == "/search":
+                    q = parse_qs(url.query)
+                    query = q.get("q", [""])[0]
+                    num = int(q.get("num", ["5"])[0])
+                    results = [{
+                        "title": f"Result {i} for {query}",
+                        "link": f"{server.base_url}/result/{i}",
+                        "snippet": f"Offline snippet {i} about {query}. " * 3,
+                        "source": "offline",
+                    } for i in range(num)]
+                    self._send(200, json.dumps({"organic_results": results}).encode("utf-8"), "application/json")
+                elif url.path.startswith("/wiki/"):
+                    title = unquote(url.path[len("/wiki/"):])
+                    body = {"title": title, "extract": f"Offline summary of {title}.",
+                            "content_urls": {"desktop": {"page": f"{server.base_url}/wiki/{title}"}}}
+                    self._send(200, json.dumps(body).encode("utf-8"), "application/json")
+                else:
+                    self._send(404, b"not found", "text/plain")
+
+        return Handler
+
+    def start(self) -> "OfflineServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="offline-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def synthetic_pdfs(out_dir: str, count: int, pages: int = 6) -> List[str]:
+    """Generate `count` text PDFs (for machines without data/pdfs)."""
+    import fitz  # PyMuPDF
+
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for i in range(count):
+        path = os.path.join(out_dir, f"synthetic-{i:04d}.pdf")
+        doc = fitz.open()
+        rng = np.random.default_rng(i)
+        for _ in range(pages):
+            words = rng.choice(["model", "graph", "search", "agent", "vector", "paper", "learning",
+                                "retrieval", "index", "query", "neural", "theory"], size=450)
+            doc.new_page().insert_textbox(fitz.Rect(36, 36, 560, 800), " ".join(words), fontsize=9)
+        doc.save(path)
+        doc.close()
+        paths.append(path)
+    return paths
+
+
+def find_pdfs(pdf_dir: str, limit: Optional[int] = None) -> List[str]:
+    paths = sorted(glob.glob(os.path.join(pdf_dir, "*.pdf")))
+    return paths[:limit] if limit else paths
+
+
+# ---------------- Wiring ----------------
+def configure_environment(work_dir: str, server: OfflineServer):
+    """Point every service and on-disk path at the offline stand-ins."""
+    os.environ.update({
+        "OPENAI_API_KEY": "offline",
+        "SERP_API_KEY": "offline",
+        "VECTOR_BACKEND": "local",
+        "LOCAL_INDEX_DIR": os.path.join(work_dir, "index"),
+        "MANIFEST_PATH": os.path.join(work_dir, "index", "manifest.json"),
+        "EMBEDDING_CACHE_PATH": os.path.join(work_dir, "cache", "embeddings.sqlite"),
+        "HTTP_CACHE_PATH": os.path.join(work_dir, "cache", "http.sqlite"),
+        "PDF_DIR": os.path.join(work_dir, "pdfs"),
+        "TRACE_EXPORT_PATH": "",
+        "ARXIV_API_URL": f"{server.base_url}/api/query",
+        "ARXIV_RATE_LIMIT_DELAY": "0",
+        "SERPAPI_URL": f"{server.base_url}/search",
+        "WIKIPEDIA_SUMMARY_URL": f"{server.base_url}/wiki",
+    })
+
+
+def install_fakes(embeddings: FakeEmbeddings, oracle_model: Optional[BaseChatModel] = None):
+    """Register the fakes as the lazily built OpenAI clients (see src.config.override_client)."""
+    import src.config
+    import src.data.embeddings
+
+    src.config.override_client("embeddings", embeddings)
+    src.data.embeddings.scheduled_embeddings.base = embeddings
+    if oracle_model is not None:
+        # the real oracle prompt, scratchpad budgeting and tool binding still run
+        src.config.override_client("llm", oracle_model)
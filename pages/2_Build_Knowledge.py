@@ -7,8 +7,8 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 import streamlit as st
 from streamlit_lottie import st_lottie
 import requests
-from src.data.dataset import process_papers
-from src.data.embeddings import create_embeddings
+import pandas as pd
+from src.data.ingestion import ingest_papers
 
 # ---------------- Page Setup ----------------
 st.set_page_config(page_title="Build Knowledge Base", layout="wide")
@@ -126,27 +126,34 @@ if process_pressed and not st.session_state.processing_running:
         st_lottie(processing_animation, height=200, key="processing")
         text_placeholder.write("⚙️ Downloading PDFs, processing text, and indexing into Pinecone...")
 
-    # ---------------- NEW PIPELINE ----------------
-    # process_papers returns (pdf_paths, metadata_list)
-    pdf_paths, metadata_list = process_papers(st.session_state["arxiv_papers"])
+    # ---------------- STREAMING PIPELINE ----------------
+    # download → extract → chunk → embed → upsert run concurrently;
+    # each paper is reported as soon as its last chunk is indexed.
+    progress_placeholder = st.empty()
+    total_papers = len(st.session_state["arxiv_papers"])
 
-    if not pdf_paths:
+    def on_progress(event):
+        progress_placeholder.progress(
+            min(event["indexed"] / total_papers, 1.0),
+            text=f"📄 Indexed {event['indexed']}/{total_papers}: {event['title']} ({event['chunks']} chunks)"
+        )
+
+    st.session_state["vectorstore_ready"] = False
+    summary = ingest_papers(st.session_state["arxiv_papers"], on_progress=on_progress)
+    progress_placeholder.empty()
+
+    # papers the manifest already had are part of the knowledge base too
+    available_papers = summary["indexed_papers"] + summary["skipped_papers"]
+
+    if not available_papers:
         animation_placeholder.empty()
         text_placeholder.empty()
         st.session_state.processing_running = False
         st.error("❌ No PDFs could be processed. Check internet connection or try fewer papers.")
         st.stop()
 
-    # create_embeddings now requires both pdf paths and their metadata
-    st.session_state["vectorstore_ready"] = False
-    create_embeddings(pdf_paths, metadata_list)
-    # Mark vectorstore ready
-    st.session_state["vectorstore_ready"] = True
-
     # Save ONLY successfully indexed papers
-    st.session_state["indexed_papers"] = list(
-        st.session_state["arxiv_papers"]
-    )
+    st.session_state["indexed_papers"] = available_papers
     st.session_state["vectorstore_ready"] = True
     # ----------------------------------------------
 
@@ -157,7 +164,24 @@ if process_pressed and not st.session_state.processing_running:
     st.session_state.processing_running = False
 
     st.success(
-        f"✅ Successfully processed {len(pdf_paths)} papers and indexed their content into Pinecone!\n\n"
+        f"✅ Successfully processed {len(summary['indexed_papers'])} papers "
+        f"({summary['chunks']} chunks in {summary['elapsed_s']:.1f}s) and indexed their content!\n\n"
+        f"♻️ {len(summary['skipped_papers'])} papers were already indexed and unchanged.\n\n"
         "➡️ Next step: "
     )
+
+    if summary["failed_papers"]:
+        st.warning(
+            f"⚠️ {summary['failed_chunks']} chunks of {len(summary['failed_papers'])} papers could not be "
+            "embedded or indexed after retries. They are not searchable yet and will be retried on the next run:\n\n"
+            + "\n".join(f"- **{f['title']}** ({f['arxiv_id']}): {f['failed_chunks']}/{f['n_chunks']} chunks — {f['error']}"
+                        for f in summary["failed_papers"])
+        )
+
+    with st.expander("⏱️ Pipeline stage report"):
+        st.caption(
+            "backpressure = share of a stage's worker time spent waiting on a full downstream queue; "
+            "a high value means the next stage is the bottleneck."
+        )
+        st.dataframe(pd.DataFrame(summary["stages"]).T)
     st.page_link("pages/3_Ask_Research_Agent.py", label="Ask Research Agent", icon="3️⃣")
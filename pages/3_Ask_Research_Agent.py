@@ -10,7 +10,10 @@ import json
 
 from langchain_core.messages import HumanMessage, AIMessage
 
-from src.decision.graph import runnable
+from src.aio import iterate
+from src.data.answer_cache import lookup_answer, store_answer
+from src.decision.streaming import astream_agent, summarize_tool_output
+from src.tracing import trace
 from src.tools.final_answer import format_final_answer
 
 
@@ -158,64 +161,113 @@ if ask_pressed and not st.session_state.agent_running:
             messages.append(HumanMessage(content=item["query"]))
             messages.append(AIMessage(content=item["response"]))
 
-        # Show animation
-        animation_placeholder = st.empty()
-        text_placeholder = st.empty()
-        with animation_placeholder.container():
-            st_lottie(animation, height=200, key="compiling")
-            text_placeholder.write("📋 Compiling your personalized research report...")
-
-        # Call the LangGraph pipeline
-        st.session_state.agent_running = True
-        try:
-            output = runnable.invoke({
-                "input": user_query,
-                "messages": messages,
-                "intermediate_steps": [],
-                "tool_usage": {}
-            })
-        except Exception as e:
-            animation_placeholder.empty()
-            text_placeholder.empty()
-            st.session_state.agent_running = False
-            st.error(f"❌ Agent execution failed: {e}")
-            st.stop()
-
-        # Extract final tool output (NOT tool_input)
-        steps = output.get("intermediate_steps", [])
-
-        if not steps:
-            st.error("❌ Agent failed to produce an answer.")
-            st.session_state.agent_running = False
-            animation_placeholder.empty()
-            text_placeholder.empty()
-            st.stop()
+        # A near-duplicate of an already answered question (same indexed papers)
+        # is served from the semantic answer cache without running the agent.
+        # Follow-ups are never looked up: their meaning depends on this chat's history.
+        # One trace per question: the cache lookup and, on a miss, the agent run.
+        with trace("ask", query=user_query) as ask_trace:
+            cached = lookup_answer(user_query) if not messages else None
+
+            if cached is None:
+                # Show animation
+                animation_placeholder = st.empty()
+                text_placeholder = st.empty()
+                with animation_placeholder.container():
+                    st_lottie(animation, height=200, key="compiling")
+                    text_placeholder.write("📋 Compiling your personalized research report...")
+
+                # Stream the LangGraph pipeline: progress and the report render as they arrive.
+                # The async graph runs on the process-wide event loop, so concurrent
+                # sessions share it instead of each holding threads while tools wait on I/O.
+                st.session_state.agent_running = True
+                progress = None
+                report_placeholder = st.empty()
+                output = None
+                try:
+                    for event in iterate(astream_agent({
+                        "input": user_query,
+                        "messages": messages,
+                        "intermediate_steps": [],
+                        "tool_usage": {}
+                    })):
+                        if progress is None and event["type"] != "done":
+                            animation_placeholder.empty()
+                            text_placeholder.empty()
+                            progress = st.status("📋 Compiling your personalized research report...", expanded=True)
+
+                        if event["type"] == "oracle":
+                            tools = ", ".join(f"`{c['name']}`" for c in event["calls"])
+                            planner = "Router" if event.get("planner") == "pre_router" else "Oracle"
+                            progress.write(f"🧭 {planner} → {tools}")
+                        elif event["type"] == "tool_start" and event["tool"] != "final_answer":
+                            progress.update(label=f"🔧 Running {event['tool']}...")
+                        elif event["type"] == "tool_finish" and event["tool"] != "final_answer":
+                            progress.write(
+                                f"✅ `{event['tool']}` finished in {event['elapsed_s']:.1f}s "
+                                f"({summarize_tool_output(event['output'])})"
+                            )
+                        elif event["type"] == "answer_delta":
+                            progress.update(label="✍️ Writing the report...")
+                            report_placeholder.markdown(format_final_answer(event["answer"], partial=True))
+                        elif event["type"] == "done":
+                            output = event["state"] or {}
+                except Exception as e:
+                    animation_placeholder.empty()
+                    text_placeholder.empty()
+                    report_placeholder.empty()
+                    if progress is not None:
+                        progress.update(label="❌ Agent execution failed", state="error")
+                    st.session_state.agent_running = False
+                    st.error(f"❌ Agent execution failed: {e}")
+                    st.stop()
+
+        if cached is not None:
+            final_output = cached.answer
+            st.caption(f"⚡ Answered from cache (similar to “{cached.query}”, similarity {cached.similarity:.2f})")
+        else:
+            report_placeholder.empty()
+            if progress is not None:
+                progress.update(label="✅ Research complete", state="complete", expanded=False)
+
+            # Extract final tool output (NOT tool_input)
+            steps = output.get("intermediate_steps", [])
+
+            if not steps:
+                st.error("❌ Agent failed to produce an answer.")
+                st.session_state.agent_running = False
+                animation_placeholder.empty()
+                text_placeholder.empty()
+                st.stop()
         
-        final_action = next(
-            (s for s in reversed(steps) if s.tool == "final_answer"),
-            None
-        )
+            final_action = next(
+                (s for s in reversed(steps) if s.tool == "final_answer"),
+                None
+            )
+
+            if final_action is None:
+                st.error("❌ No final answer produced.")
+                st.session_state.agent_running = False
+                animation_placeholder.empty()
+                text_placeholder.empty()
+                st.stop()
+            try:
+                final_output = json.loads(final_action.log)
+            except Exception:
+                st.error("⚠️ Agent produced invalid output.")
+                st.code(final_action.log)
+                st.session_state.agent_running = False
+                animation_placeholder.empty()
+                text_placeholder.empty()
+                st.stop()
 
-        if final_action is None:
-            st.error("❌ No final answer produced.")
-            st.session_state.agent_running = False
-            animation_placeholder.empty()
-            text_placeholder.empty()
-            st.stop()
-        try:
-            final_output = json.loads(final_action.log)
-        except Exception:
-            st.error("⚠️ Agent produced invalid output.")
-            st.code(final_action.log)
-            st.session_state.agent_running = False
             animation_placeholder.empty()
             text_placeholder.empty()
-            st.stop()
 
-        report = format_final_answer(final_output)
+            # only standalone questions are cached; follow-ups depend on the chat history
+            if not messages:
+                store_answer(user_query, final_output)
 
-        animation_placeholder.empty()
-        text_placeholder.empty()
+        report = format_final_answer(final_output)
 
         # Display report
         st.subheader("📜 Research Report")
@@ -230,19 +282,79 @@ if ask_pressed and not st.session_state.agent_running:
         })
 
         # Save debug info
-        st.session_state.debug_logs.append({
-            "user_query": user_query,
-            "oracle_tool": final_action.tool,
-            "args": final_action.tool_input,
-            "output": final_action.log,
-            "all_steps": output["intermediate_steps"]
-        })
+        if cached is not None:
+            st.session_state.debug_logs.append({
+                "user_query": user_query,
+                "oracle_tool": "answer_cache",
+                "args": {"cached_query": cached.query, "similarity": cached.similarity},
+                "output": json.dumps(final_output),
+                "all_steps": [],
+                "trace": ask_trace.to_records(),
+                "trace_summary": ask_trace.summary()
+            })
+        else:
+            st.session_state.debug_logs.append({
+                "user_query": user_query,
+                "oracle_tool": final_action.tool,
+                "args": final_action.tool_input,
+                "output": final_action.log,
+                "all_steps": output["intermediate_steps"],
+                "trace": ask_trace.to_records(),
+                "trace_summary": ask_trace.summary()
+            })
 
     else:
         st.warning("⚠️ Please enter a valid research question.")
 
 
 # ---------------- Debug Panel ----------------
+SPAN_COLORS = {
+    "llm": "#6C63FF", "tool": "#00C9A7", "http": "#FF8C42",
+    "embedding": "#E056FD", "vector": "#2E86DE", "lexical": "#F7B731", "cache": "#A0A0A0",
+    "router": "#20BF6B",
+}
+
+
+def render_waterfall(records, summary=None):
+    """Sidebar waterfall: one bar per span, offset by start time, indented by depth."""
+    if not records:
+        st.sidebar.info("No trace recorded.")
+        return
+
+    total_ms = max(r["start_ms"] + r["duration_ms"] for r in records) or 1.0
+    if summary:
+        st.sidebar.caption(
+            f"Wall time {summary['wall_ms'] / 1000:.2f}s · " + " · ".join(
+                f"{kind} {k['duration_ms'] / 1000:.2f}s"
+                for kind, k in sorted(summary["by_kind"].items(), key=lambda kv: -kv[1]["duration_ms"])
+            )
+        )
+
+    rows = []
+    for r in records:
+        left = 100 * r["start_ms"] / total_ms
+        width = max(100 * r["duration_ms"] / total_ms, 0.5)
+        color = "#E74C3C" if r["error"] else SPAN_COLORS.get(r["kind"], "#888888")
+        details = ", ".join(f"{k}={v}" for k, v in r["attrs"].items() if k in (
+            "input_tokens", "output_tokens", "outcome", "status", "matches", "response_bytes", "output_bytes"
+        ))
+        rows.append(
+            f"<div style='font-size:0.75em;margin-left:{r['depth'] * 10}px' title='{details}'>"
+            f"{r['name']} · {r['duration_ms']:.0f} ms</div>"
+            f"<div style='position:relative;height:8px;background:rgba(128,128,128,0.15);margin-bottom:4px'>"
+            f"<div style='position:absolute;left:{left:.2f}%;width:{width:.2f}%;height:8px;background:{color}'></div>"
+            f"</div>"
+        )
+    st.sidebar.markdown("".join(rows), unsafe_allow_html=True)
+
+    st.sidebar.download_button(
+        "⬇️ Download trace (JSONL)",
+        data="".join(json.dumps(r, default=str) + "\n" for r in records),
+        file_name=f"trace-{records[0]['trace_id']}.jsonl",
+        mime="application/json",
+    )
+
+
 if debug_on:
     st.sidebar.markdown("### 🧩 Debug Information")
 
@@ -258,6 +370,10 @@ if debug_on:
         st.sidebar.markdown("**Tool Output (raw):**")
         st.sidebar.json(last_debug["output"])
 
+        st.sidebar.markdown("---")
+        st.sidebar.markdown("### ⏱️ Trace Waterfall")
+        render_waterfall(last_debug.get("trace", []), last_debug.get("trace_summary"))
+
         st.sidebar.markdown("---")
         st.sidebar.markdown("### 📚 Intermediate Steps")
 
@@ -0,0 +1,121 @@
+# src/aio.py
+# One process-wide asyncio event loop on a daemon thread, shared by every
+# session that runs the async graph, plus pooled async HTTP clients.
+# Sync callers (Streamlit scripts, batch workers) hand coroutines to the loop
+# with run() / iterate(); their contextvars (e.g. the active trace) go along.
+
+import asyncio
+import concurrent.futures
+import contextvars
+import os
+import queue
+import threading
+import weakref
+from typing import Any, AsyncIterator, Coroutine, Iterator, Optional
+
+import httpx
+
+# connections per event loop across all hosts; idle keep-alive connections are capped separately
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_thread: Optional[threading.Thread] = None
+_loop_lock = threading.Lock()
+
+# httpx pools are bound to the loop they first ran on, so keep one client per loop
+_http_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """The shared loop, started on first use."""
+    global _loop, _loop_thread
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(target=loop.run_forever, name="aio-loop", daemon=True)
+            _loop_thread.start()
+            _loop = loop
+        return _loop
+
+
+def submit(coro: Coroutine) -> concurrent.futures.Future:
+    """Schedule `coro` on the shared loop in a copy of the caller's context."""
+    loop = get_loop()
+    if threading.current_thread() is _loop_thread:
+        coro.close()
+        raise RuntimeError("submit() called from the shared loop; await the coroutine instead")
+
+    result: concurrent.futures.Future = concurrent.futures.Future()
+
+    def _start():
+        if not result.set_running_or_notify_cancel():
+            coro.close()
+            return
+        # runs inside the caller's context, which the task copies
+        task = loop.create_task(coro)
+
+        def _done(t: asyncio.Task):
+            if t.cancelled():
+                result.set_exception(concurrent.futures.CancelledError())
+            elif t.exception() is not None:
+                result.set_exception(t.exception())
+            else:
+                result.set_result(t.result())
+
+        task.add_done_callback(_done)
+
+    loop.call_soon_threadsafe(_start, context=contextvars.copy_context())
+    return result
+
+
+def run(coro: Coroutine, timeout: Optional[float] = None) -> Any:
+    """Run `coro` on the shared loop and block the calling thread for its result."""
+    return submit(coro).result(timeout)
+
+
+def iterate(agen: AsyncIterator) -> Iterator:
+    """
+    Consume an async iterator from sync code. The whole iteration runs as one
+    task on the shared loop; items are handed over through a queue as they arrive.
+    """
+    items: "queue.Queue[tuple]" = queue.Queue()
+    stopped = threading.Event()
+
+    async def _pump():
+        try:
+            async for item in agen:
+                items.put((True, item))
+                if stopped.is_set():
+                    break
+            items.put((False, None))
+        except BaseException as e:
+            items.put((False, e))
+            raise
+
+    future = submit(_pump())
+    try:
+        while True:
+            ok, value = items.get()
+            if not ok:
+                if value is not None:
+                    raise value
+                return
+            yield value
+    finally:
+        # consumer stopped early: let the pump close the generator after its next item
+        stopped.set()
+        future.add_done_callback(lambda f: f.exception())
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Pooled keep-alive client for the running loop (call from a coroutine)."""
+    loop = asyncio.get_running_loop()
+    client = _http_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_KEEPALIVE),
+            follow_redirects=True,
+        )
+        _http_clients[loop] = client
+    return client
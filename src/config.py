@@ -4,40 +4,152 @@
 
 import os
 import getpass
+import threading
 from dotenv import load_dotenv
-from langchain_openai import OpenAIEmbeddings
-from pinecone import Pinecone, ServerlessSpec
 
 # Load environment variables from .env
 load_dotenv()
 
-# API Keys with `getpass` fallback (only for OpenAI)
+# Nothing here touches the network or prompts at import time: clients are
+# built on first use by the get_* functions below (thread-safe, once per process).
+
+# API Keys (the OpenAI key falls back to `getpass`, on first use only)
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY") or getpass.getpass("🔑 Enter OpenAI API Key: ")
 SERP_API_KEY = os.getenv("SERP_API_KEY")
 
-# Validate API keys (Only raise error for Pinecone if missing)
-if not PINECONE_API_KEY:
-    raise ValueError("Pinecone API key is missing. Set PINECONE_API_KEY in your environment variables.")
-if not OPENAI_API_KEY:
-    print("⚠️ OpenAI API key is missing. You will need to enter it manually when prompted.")
+# Vector store backend: "pinecone" (managed) or "local" (memory-mapped, single node)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone").lower()
+LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", "data/index")
+EMBEDDING_DIMENSION = 1536
+# Keep-alive connections (and upsert threads) of the shared vector-store client
+VECTOR_POOL_SIZE = int(os.getenv("VECTOR_POOL_SIZE", "8"))
+
+if VECTOR_BACKEND not in ("pinecone", "local"):
+    raise ValueError(f"Unknown VECTOR_BACKEND '{VECTOR_BACKEND}'. Use 'pinecone' or 'local'.")
 
 # Global Embeddings Model (Used by all tools)
-embeddings = OpenAIEmbeddings(model="text-embedding-3-small",
-                              openai_api_key=OPENAI_API_KEY)
+EMBEDDING_MODEL = "text-embedding-3-small"
+LLM_MODEL = "gpt-4o"
+
+# On-disk embedding cache (content-addressed, LRU-evicted)
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "data/cache/embeddings.sqlite")
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "100000"))
 
 # Pinecone Configuration
 INDEX_NAME = "research-knowledge"
 
-# Initialize Pinecone
-pc = Pinecone(api_key=PINECONE_API_KEY)
+# Ingestion manifest: tracks indexed papers so rebuilds skip unchanged ones.
+# Kept next to the index it describes.
+MANIFEST_PATH = os.getenv("MANIFEST_PATH") or (
+    os.path.join(LOCAL_INDEX_DIR, "manifest.json") if VECTOR_BACKEND == "local"
+    else f"data/cache/manifest-{INDEX_NAME}.json"
+)
+
+# Paper catalog: title, authors, abstract, ... once per paper; chunk vectors carry only the key
+PAPER_CATALOG_PATH = os.getenv("PAPER_CATALOG_PATH") or (
+    os.path.join(LOCAL_INDEX_DIR, "papers.sqlite") if VECTOR_BACKEND == "local"
+    else f"data/cache/papers-{INDEX_NAME}.sqlite"
+)
+
+# Chunk texts (compressed, memory-mapped), kept out of the vector store
+CHUNK_STORE_DIR = os.getenv("CHUNK_STORE_DIR") or (
+    os.path.join(LOCAL_INDEX_DIR, "chunks") if VECTOR_BACKEND == "local"
+    else f"data/cache/chunks-{INDEX_NAME}"
+)
+
+# BM25 inverted index over the same chunks, for hybrid retrieval (src.data.lexical_index)
+LEXICAL_INDEX_DIR = os.getenv("LEXICAL_INDEX_DIR") or (
+    os.path.join(LOCAL_INDEX_DIR, "lexical") if VECTOR_BACKEND == "local"
+    else f"data/cache/lexical-{INDEX_NAME}"
+)
+
+
+# ---------------- Lazy Clients ----------------
+_clients = {}
+_clients_lock = threading.RLock()
+
+
+def _lazy(name: str, factory):
+    """Build a client once; concurrent first callers wait for the same instance."""
+    client = _clients.get(name)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(name)
+            if client is None:
+                client = _clients[name] = factory()
+    return client
+
+
+def get_openai_api_key() -> str:
+    def _key():
+        key = os.getenv("OPENAI_API_KEY") or getpass.getpass("🔑 Enter OpenAI API Key: ")
+        if not key:
+            print("⚠️ OpenAI API key is missing. You will need to enter it manually when prompted.")
+        return key
+    return _lazy("openai_api_key", _key)
+
+
+def get_embeddings():
+    """Shared OpenAIEmbeddings client."""
+    def _embeddings():
+        from langchain_openai import OpenAIEmbeddings
+        return OpenAIEmbeddings(model=EMBEDDING_MODEL, openai_api_key=get_openai_api_key())
+    return _lazy("embeddings", _embeddings)
+
+
+def get_llm():
+    """Shared gpt-4o chat client used by the oracle."""
+    def _llm():
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(
+            model=LLM_MODEL,
+            temperature=0,
+            openai_api_key=get_openai_api_key(),
+            # token usage is reported on streamed responses too (read by the tracing spans)
+            stream_usage=True
+        )
+    return _lazy("llm", _llm)
+
+
+def get_pinecone():
+    """Pinecone client; creates the index on first use if it does not exist yet."""
+    def _pinecone():
+        from pinecone import Pinecone, ServerlessSpec
+
+        # Validate API keys (Only raise error for Pinecone if missing)
+        if not PINECONE_API_KEY:
+            raise ValueError("Pinecone API key is missing. Set PINECONE_API_KEY in your environment variables.")
+        pc = Pinecone(api_key=PINECONE_API_KEY)
+
+        # Ensure the Pinecone index exists
+        if INDEX_NAME not in pc.list_indexes().names():
+            print(f"🛠 Creating Pinecone index: {INDEX_NAME}...")
+            spec = ServerlessSpec(cloud="aws", region="us-east-1")
+            pc.create_index(INDEX_NAME, dimension=EMBEDDING_DIMENSION, metric="cosine", spec=spec)
+            print("✅ Pinecone index created.")
+        else:
+            print(f"✅ Pinecone index '{INDEX_NAME}' already exists.")
+        return pc
+    return _lazy("pinecone", _pinecone)
+
+
+# Back-compat: `from src.config import embeddings` / `pc` / `OPENAI_API_KEY` still work,
+# resolved on first access instead of at import.
+_LAZY_ATTRIBUTES = {
+    "embeddings": get_embeddings,
+    "llm": get_llm,
+    "pc": lambda: get_pinecone() if VECTOR_BACKEND == "pinecone" else None,
+    "OPENAI_API_KEY": get_openai_api_key,
+}
+
+
+def override_client(name: str, client):
+    """Replace a lazily built client ("embeddings", "llm", "pinecone"), e.g. with a fake in benchmarks."""
+    with _clients_lock:
+        _clients[name] = client
 
-# Ensure the Pinecone index exists
-if INDEX_NAME not in pc.list_indexes().names():
-    print(f"🛠 Creating Pinecone index: {INDEX_NAME}...")
-    spec = ServerlessSpec(cloud="aws", region="us-east-1")
-    pc.create_index(INDEX_NAME, dimension=1536, metric="cosine", spec=spec)
-    print("✅ Pinecone index created.")
-else:
-    print(f"✅ Pinecone index '{INDEX_NAME}' already exists.")
 
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
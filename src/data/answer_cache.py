@@ -0,0 +1,214 @@
+# src/data/answer_cache.py
+# Semantic cache of finished research reports. A question whose embedding is
+# close enough (cosine) to one already answered gets the stored final_answer
+# back without running the agent. Entries are scoped to the indexed corpus
+# (the manifest fingerprint), so re-indexing makes every older answer a miss;
+# the table is kept under an entry budget with LRU eviction.
+
+import os
+import re
+import json
+import sqlite3
+import hashlib
+import threading
+import time
+from typing import Dict, NamedTuple, Optional
+
+import numpy as np
+
+from src.config import MANIFEST_PATH, get_embeddings
+from src.data.manifest import get_manifest
+from src.data.retrieval_cache import embed_query_cached
+from src.tracing import span
+
+ANSWER_CACHE_PATH = os.getenv("ANSWER_CACHE_PATH", "data/cache/answers.sqlite")
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000"))
+# cosine similarity above which two questions share an answer; 0 < t ≤ 1, or ≥ 2 to disable
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+
+
+def _normalize(query: str) -> str:
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+
+def _text_key(scope: str, query: str) -> str:
+    return hashlib.sha256(f"{scope}\x00{_normalize(query)}".encode("utf-8")).hexdigest()
+
+
+class CachedAnswer(NamedTuple):
+    answer: Dict
+    query: str          # the question the answer was produced for
+    similarity: float   # 1.0 for an exact (normalized) text match
+
+
+class AnswerCache:
+    """
+    SQLite-backed store of (question, embedding, final_answer) per corpus scope.
+    The current scope's embeddings are kept as one normalized matrix, so a
+    lookup is a single matrix-vector product.
+    """
+
+    def __init__(self, path: str, max_entries: int = 1000, threshold: float = 0.95):
+        self.path = path
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        # in-memory view of one scope: row ids and their unit vectors
+        self._scope: Optional[str] = None
+        self._row_ids = np.zeros(0, dtype=np.int64)
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            " id INTEGER PRIMARY KEY,"
+            " scope TEXT NOT NULL,"
+            " text_key TEXT NOT NULL UNIQUE,"
+            " query TEXT NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " answer TEXT NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_answers_last_used ON answers(last_used)")
+        self._conn.commit()
+
+    def _use_scope(self, scope: str):
+        """Drop answers from other corpora and load this scope's vectors (caller holds the lock)."""
+        if scope == self._scope:
+            return
+        self._conn.execute("DELETE FROM answers WHERE scope != ?", (scope,))
+        self._conn.commit()
+        self._reload(scope)
+
+    def _reload(self, scope: str):
+        rows = self._conn.execute("SELECT id, vector FROM answers WHERE scope = ? ORDER BY id", (scope,)).fetchall()
+        self._scope = scope
+        self._row_ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        self._matrix = (np.vstack([np.frombuffer(r[1], dtype=np.float32) for r in rows]) if rows
+                        else np.zeros((0, 0), dtype=np.float32))
+
+    def _hit(self, row_id: int, similarity: float) -> Optional[CachedAnswer]:
+        row = self._conn.execute("SELECT query, answer FROM answers WHERE id = ?", (row_id,)).fetchone()
+        if row is None:
+            return None
+        self._conn.execute("UPDATE answers SET last_used = ? WHERE id = ?", (time.time(), row_id))
+        self._conn.commit()
+        self.hits += 1
+        return CachedAnswer(json.loads(row[1]), row[0], similarity)
+
+    def get_exact(self, scope: str, query: str) -> Optional[CachedAnswer]:
+        """Same question up to case and whitespace; needs no embedding."""
+        with self._lock:
+            self._use_scope(scope)
+            row = self._conn.execute("SELECT id FROM answers WHERE text_key = ?", (_text_key(scope, query),)).fetchone()
+            return self._hit(row[0], 1.0) if row else None
+
+    def get_similar(self, scope: str, vector) -> Optional[CachedAnswer]:
+        """Most similar stored question at or above the threshold."""
+        query_vec = _unit(vector)
+        with self._lock:
+            self._use_scope(scope)
+            if len(self._row_ids) and self._matrix.shape[1] == len(query_vec):
+                similarities = self._matrix @ query_vec
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    hit = self._hit(int(self._row_ids[best]), float(similarities[best]))
+                    if hit is not None:
+                        return hit
+            self.misses += 1
+            return None
+
+    def put(self, scope: str, query: str, vector, answer: Dict):
+        """Store an answer, then evict least recently used rows above the budget."""
+        blob = _unit(vector).tobytes()
+        with self._lock:
+            self._use_scope(scope)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers (scope, text_key, query, vector, answer, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (scope, _text_key(scope, query), query, blob, json.dumps(answer), time.time())
+            )
+            overflow = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM answers WHERE id IN ("
+                    " SELECT id FROM answers ORDER BY last_used ASC LIMIT ?)",
+                    (overflow,)
+                )
+            self._conn.commit()
+            self._reload(scope)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+            "entries": len(self),
+        }
+
+
+def _unit(vector) -> np.ndarray:
+    vec = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(vec))
+    return vec / norm if norm else vec
+
+
+_default_cache: Optional[AnswerCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> AnswerCache:
+    """Process-wide answer cache (one SQLite connection per process)."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = AnswerCache(ANSWER_CACHE_PATH, ANSWER_CACHE_MAX_ENTRIES, ANSWER_CACHE_THRESHOLD)
+        return _default_cache
+
+
+def current_scope(embedding=None) -> str:
+    """Embedding model + indexed corpus; answers never cross either."""
+    embedding = embedding or get_embeddings()
+    model = getattr(embedding, "model", type(embedding).__name__)
+    return f"{model}:{get_manifest(MANIFEST_PATH).fingerprint()}"
+
+
+def lookup_answer(query: str, embedding=None) -> Optional[CachedAnswer]:
+    """
+    Cached final_answer for `query` in the current corpus, or None.
+    An exact repeat is answered from SQLite alone; a paraphrase costs one
+    query embedding (shared with the rag tools' query cache). Never raises.
+    """
+    with span("answer_cache:lookup", kind="cache") as s:
+        try:
+            embedding = embedding or get_embeddings()
+            scope = current_scope(embedding)
+            cache = get_answer_cache()
+            hit = cache.get_exact(scope, query)
+            if hit is None and cache.threshold <= 1:
+                hit = cache.get_similar(scope, embed_query_cached(embedding, query))
+        except Exception as e:
+            print(f"⚠️ Answer cache lookup failed: {e}")
+            s.set(outcome="error")
+            return None
+        s.set(outcome="hit" if hit else "miss", similarity=hit.similarity if hit else None)
+        return hit
+
+
+def store_answer(query: str, answer: Dict, embedding=None):
+    """Remember a finished answer for later lookups; failures are only logged."""
+    try:
+        embedding = embedding or get_embeddings()
+        get_answer_cache().put(current_scope(embedding), query, embed_query_cached(embedding, query), answer)
+    except Exception as e:
+        print(f"⚠️ Could not cache the answer: {e}")
@@ -0,0 +1,302 @@
+# src/data/chunk_store.py
+# Local store of chunk texts keyed by vector id, kept out of the vector store:
+# vectors carry only compact metadata, and search results are hydrated with
+# the text of just the chunks they return. Records are zlib-compressed and
+# appended to one data file that is read through mmap; a small index (ids +
+# offsets) is written next to it. Overwritten and deleted records are
+# reclaimed by compaction once they make up most of the file.
+#
+# Every record is framed with its vector id (deletes append an empty record),
+# so the data file alone is the source of truth: records appended after the
+# last flush() are found again by scanning the file's tail on load.
+
+import os
+import json
+import mmap
+import struct
+import zlib
+import threading
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.config import CHUNK_STORE_DIR
+
+DATA_FILE = "chunks.bin"
+IDS_FILE = "chunks.json"
+OFFSETS_FILE = "offsets.npz"
+# compact on flush once dead records exceed this share of the data file
+COMPACT_DEAD_RATIO = 0.5
+COMPRESSION_LEVEL = 6
+# frame header: payload length, vector id length; then the id, then the payload
+HEADER = struct.Struct("<IH")
+
+
+def _encode(text: str, metadata: Optional[dict]) -> bytes:
+    return zlib.compress(json.dumps([text, metadata or {}], separators=(",", ":")).encode("utf-8"),
+                         COMPRESSION_LEVEL)
+
+
+def _decode(record: bytes) -> Tuple[str, dict]:
+    text, metadata = json.loads(zlib.decompress(record))
+    return text, metadata
+
+
+def _frame(vid: str, payload: bytes) -> Tuple[bytes, int]:
+    """(framed record, offset of the payload within it); an empty payload marks a delete."""
+    key = vid.encode("utf-8")
+    return HEADER.pack(len(payload), len(key)) + key + payload, HEADER.size + len(key)
+
+
+class ChunkStore:
+    """
+    Append-only, memory-mapped map of vector id → (chunk text, chunk metadata).
+
+    Writes append to the data file immediately and are durable from then
+    on. The id → offset index is persisted by flush() (atomically, like the
+    lexical index); records appended after it are re-indexed on load.
+    """
+
+    def __init__(self, store_dir: str):
+        self.store_dir = store_dir
+        self._lock = threading.RLock()
+        self._mtime = 0
+
+        self._slot: Dict[str, int] = {}     # vector id → record number
+        self._ids: List[Optional[str]] = []  # record number → vector id (None once dead)
+        self._offsets = array("Q")
+        self._lengths = array("I")
+        self._live_bytes = 0
+        self._indexed_end = 0   # data file bytes covered by the persisted index
+        self._unsaved = False
+
+        self._map: Optional[mmap.mmap] = None
+        self._mapped_size = 0
+
+        os.makedirs(store_dir, exist_ok=True)
+        self._load()
+
+    # ---------------- Persistence ----------------
+    @property
+    def _data_path(self) -> str:
+        return os.path.join(self.store_dir, DATA_FILE)
+
+    @property
+    def _ids_path(self) -> str:
+        return os.path.join(self.store_dir, IDS_FILE)
+
+    @property
+    def _offsets_path(self) -> str:
+        return os.path.join(self.store_dir, OFFSETS_FILE)
+
+    def _load(self):
+        self._slot, self._ids = {}, []
+        self._offsets, self._lengths = array("Q"), array("I")
+        self._live_bytes = 0
+        self._indexed_end = 0
+        self._unsaved = False
+        self._unmap()
+        if os.path.exists(self._ids_path):
+            self._mtime = os.stat(self._ids_path).st_mtime_ns
+            with open(self._ids_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            with np.load(self._offsets_path) as arrays:
+                self._offsets = array("Q", arrays["offsets"].astype(np.uint64).tobytes())
+                self._lengths = array("I", arrays["lengths"].astype(np.uint32).tobytes())
+            self._ids = list(index["ids"])
+            self._slot = {vid: i for i, vid in enumerate(self._ids)}
+            self._live_bytes = sum(self._lengths)
+            # indexes written before records were framed cover the whole file
+            self._indexed_end = index.get("end", self._data_size())
+        self._recover_tail()
+
+    def _data_size(self) -> int:
+        return os.path.getsize(self._data_path) if os.path.exists(self._data_path) else 0
+
+    def _recover_tail(self):
+        """Index the records appended after the last flush (an interrupted build); cut off a torn one."""
+        size = self._data_size()
+        if size <= self._indexed_end:
+            return
+        position = self._indexed_end
+        with open(self._data_path, "rb") as f:
+            f.seek(position)
+            tail = f.read()
+        at = 0
+        while at + HEADER.size <= len(tail):
+            length, key_length = HEADER.unpack_from(tail, at)
+            end = at + HEADER.size + key_length + length
+            if end > len(tail):
+                break
+            try:
+                vid = tail[at + HEADER.size:at + HEADER.size + key_length].decode("utf-8")
+            except UnicodeDecodeError:
+                break
+            self._drop(vid)
+            if length:
+                self._append_slot(vid, position + end - length, length)
+            at = end
+        if position + at < size:
+            print(f"⚠️ Chunk store: dropped {size - position - at} bytes of an incomplete record")
+            with open(self._data_path, "r+b") as f:
+                f.truncate(position + at)
+        self._unsaved = True
+
+    def _refresh_if_stale(self):
+        """Pick up a store flushed by another handle (other page, other process)."""
+        if self._unsaved:
+            return
+        try:
+            mtime = os.stat(self._ids_path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._mtime:
+            self._load()
+
+    def _unmap(self):
+        if self._map is not None:
+            self._map.close()
+        self._map, self._mapped_size = None, 0
+
+    def _view(self, end: int) -> mmap.mmap:
+        """The data file mapped at least up to byte `end` (remapped after appends)."""
+        if self._map is None or end > self._mapped_size:
+            self._unmap()
+            with open(self._data_path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapped_size = len(self._map)
+        return self._map
+
+    def flush(self):
+        """Compact if mostly dead records, then persist the index (offsets first, then the ids)."""
+        with self._lock:
+            if not self._unsaved:
+                return
+            if os.path.exists(self._data_path) and \
+                    self._live_bytes < (1 - COMPACT_DEAD_RATIO) * os.path.getsize(self._data_path):
+                self._compact()
+            live = [i for i, vid in enumerate(self._ids) if vid is not None]
+            ids = [self._ids[i] for i in live]
+            offsets = np.frombuffer(self._offsets, dtype=np.uint64)[live] if live else np.zeros(0, np.uint64)
+            lengths = np.frombuffer(self._lengths, dtype=np.uint32)[live] if live else np.zeros(0, np.uint32)
+
+            tmp = self._offsets_path + ".tmp.npz"
+            np.savez(tmp, offsets=offsets, lengths=lengths)
+            os.replace(tmp, self._offsets_path)
+            tmp = self._ids_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"ids": ids, "end": self._data_size()}, f)
+            os.replace(tmp, self._ids_path)
+            self._mtime = os.stat(self._ids_path).st_mtime_ns
+
+            # drop dead slots from memory too
+            self._ids = ids
+            self._offsets, self._lengths = array("Q", offsets.tobytes()), array("I", lengths.tobytes())
+            self._slot = {vid: i for i, vid in enumerate(ids)}
+            self._indexed_end = self._data_size()
+            self._unsaved = False
+
+    def _compact(self):
+        """Rewrite the data file with live records only (caller holds the lock)."""
+        view = self._view(os.path.getsize(self._data_path))
+        tmp = self._data_path + ".tmp"
+        offsets, position, live = array("Q"), 0, 0
+        with open(tmp, "wb") as out:
+            for i, vid in enumerate(self._ids):
+                offset, length = self._offsets[i], self._lengths[i]
+                if vid is None:
+                    offsets.append(0)
+                    continue
+                frame, start = _frame(vid, view[offset:offset + length])
+                out.write(frame)
+                offsets.append(position + start)
+                position += len(frame)
+                live += length
+        self._unmap()
+        # the old index points into the old file: without it, a crash before
+        # flush() finishes rebuilds the index from the new file instead
+        if os.path.exists(self._ids_path):
+            os.remove(self._ids_path)
+        os.replace(tmp, self._data_path)
+        self._offsets = offsets
+        self._live_bytes = live
+
+    # ---------------- Writes ----------------
+    def put(self, ids: Sequence[str], texts: Sequence[str], metadatas: Optional[Sequence[dict]] = None):
+        """Upsert chunks; an existing id gets a new record and its old one becomes dead."""
+        metadatas = metadatas or [None] * len(ids)
+        frames = [_frame(vid, _encode(text, meta)) for vid, text, meta in zip(ids, texts, metadatas)]
+        with self._lock:
+            self._refresh_if_stale()
+            with open(self._data_path, "ab") as f:
+                position = f.tell()
+                f.write(b"".join(frame for frame, _ in frames))
+            for vid, (frame, start) in zip(ids, frames):
+                self._drop(vid)
+                self._append_slot(vid, position + start, len(frame) - start)
+                position += len(frame)
+            self._unsaved = True
+
+    def _append_slot(self, vid: str, offset: int, length: int):
+        self._slot[vid] = len(self._ids)
+        self._ids.append(vid)
+        self._offsets.append(offset)
+        self._lengths.append(length)
+        self._live_bytes += length
+
+    def _drop(self, vid: str):
+        slot = self._slot.pop(vid, None)
+        if slot is not None:
+            self._ids[slot] = None
+            self._live_bytes -= self._lengths[slot]
+
+    def delete(self, ids: Sequence[str]):
+        with self._lock:
+            self._refresh_if_stale()
+            present = [vid for vid in ids if vid in self._slot]
+            if present:
+                # empty records, so a rebuilt index forgets these ids too
+                with open(self._data_path, "ab") as f:
+                    f.write(b"".join(_frame(vid, b"")[0] for vid in present))
+            for vid in present:
+                self._drop(vid)
+            self._unsaved = True
+
+    def __len__(self) -> int:
+        return len(self._slot)
+
+    def __contains__(self, vid: str) -> bool:
+        return vid in self._slot
+
+    # ---------------- Reads ----------------
+    def get_many(self, ids: Sequence[str]) -> Dict[str, Tuple[str, dict]]:
+        """(text, metadata) of the given chunks; unknown ids are left out."""
+        with self._lock:
+            self._refresh_if_stale()
+            slots = [(vid, self._slot[vid]) for vid in dict.fromkeys(ids) if vid in self._slot]
+            if not slots:
+                return {}
+            view = self._view(max(self._offsets[s] + self._lengths[s] for _, s in slots))
+            return {
+                vid: _decode(view[self._offsets[s]:self._offsets[s] + self._lengths[s]])
+                for vid, s in slots
+            }
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            size = os.path.getsize(self._data_path) if os.path.exists(self._data_path) else 0
+            return {"chunks": len(self._slot), "data_bytes": size, "live_bytes": self._live_bytes}
+
+
+_store: Optional[ChunkStore] = None
+_store_lock = threading.Lock()
+
+
+def get_chunk_store() -> ChunkStore:
+    """Process-wide chunk store shared by ingestion and the retrieval client."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ChunkStore(CHUNK_STORE_DIR)
+        return _store
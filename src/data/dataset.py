@@ -3,13 +3,50 @@
 import requests
 import os
 import re
+import asyncio
 import concurrent.futures
+import threading
 import time
-from bs4 import BeautifulSoup
+from typing import Optional
+import httpx
+from lxml import etree
+from requests.adapters import HTTPAdapter
 from tenacity import retry, stop_after_attempt, wait_fixed
+from src.aio import get_http_client
+from src.data.http_cache import cached_response
+from src.tracing import span
 
-ARXIV_API_URL = "http://export.arxiv.org/api/query"
-PDF_DIR = "data/pdfs"
+ARXIV_API_URL = os.getenv("ARXIV_API_URL", "http://export.arxiv.org/api/query")
+PDF_DIR = os.getenv("PDF_DIR", "data/pdfs")
+
+ATOM_NS = "{http://www.w3.org/2005/Atom}"
+OPENSEARCH_NS = "{http://a9.com/-/spec/opensearch/1.1/}"
+# arXiv API etiquette: at most one request every 3 seconds, pages of <= 2000 results
+ARXIV_PAGE_SIZE = 100
+ARXIV_RATE_LIMIT_DELAY = float(os.getenv("ARXIV_RATE_LIMIT_DELAY", "3.0"))
+
+# Max simultaneous PDF downloads; also sizes the shared connection pool.
+DOWNLOAD_CONCURRENCY = int(os.getenv("DOWNLOAD_CONCURRENCY", "5"))
+DOWNLOAD_CHUNK_BYTES = 64 * 1024
+
+_session = None
+_session_lock = threading.Lock()
+_download_slots = threading.BoundedSemaphore(DOWNLOAD_CONCURRENCY)
+_arxiv_rate_lock = threading.Lock()
+_last_arxiv_call = 0.0
+
+
+def get_http_session() -> requests.Session:
+    """Process-wide Session so downloads reuse keep-alive connections."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=DOWNLOAD_CONCURRENCY)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
 
 
 def _extract_arxiv_id_from_entry_id(entry_id: str) -> str:
@@ -24,50 +61,229 @@ def sanitize_filename(filename: str) -> str:
     return re.sub(r'[<>:"/\\|?*]', '', filename)
 
 
+def _parse_entry(entry) -> dict:
+    """Turn one Atom <entry> element into the paper dict used everywhere downstream."""
+    entry_id = (entry.findtext(f"{ATOM_NS}id") or "").strip()
+    arxiv_id = _extract_arxiv_id_from_entry_id(entry_id)
+    title = (entry.findtext(f"{ATOM_NS}title") or "").strip()
+    authors = [(a.findtext(f"{ATOM_NS}name") or "").strip() for a in entry.iterfind(f"{ATOM_NS}author")]
+    summary = (entry.findtext(f"{ATOM_NS}summary") or "").strip()
+    # arXiv gives 'id' like https://arxiv.org/abs/.... convert to pdf
+    pdf_url = entry_id.replace("abs", "pdf") + ".pdf" if entry_id else ""
+    return {
+        "title": title,
+        "authors": authors,
+        "summary": summary,
+        "pdf_url": pdf_url,
+        "arxiv_id": arxiv_id,
+        "source": "arxiv",
+    }
+
+
+FEED_TAGS = (f"{ATOM_NS}entry", f"{OPENSEARCH_NS}totalResults")
+
+
+def _take_element(elem, page_info: dict) -> Optional[dict]:
+    """Consume one parsed feed element, then free it and its already-parsed siblings."""
+    paper = None
+    if elem.tag == f"{OPENSEARCH_NS}totalResults":
+        page_info["total"] = int(elem.text or 0)
+    # arXiv reports query errors as an entry titled "Error"
+    elif elem.findtext(f"{ATOM_NS}title") != "Error":
+        paper = _parse_entry(elem)
+    elem.clear()
+    while elem.getprevious() is not None:
+        del elem.getparent()[0]
+    return paper
+
+
+def _iter_feed(stream, page_info: dict):
+    """
+    Incrementally parse an Atom feed from a file-like stream, yielding paper
+    dicts one <entry> at a time. Parsed elements are freed as we go, so memory
+    stays flat however large the page is.
+    """
+    for _, elem in etree.iterparse(stream, events=("end",), tag=FEED_TAGS):
+        paper = _take_element(elem, page_info)
+        if paper:
+            yield paper
+
+
+def _reserve_rate_slot(delay: float) -> float:
+    """Claim the next arXiv API slot, `delay` seconds after the last one; returns the wait."""
+    global _last_arxiv_call
+    with _arxiv_rate_lock:
+        now = time.monotonic()
+        slot = max(now, _last_arxiv_call + delay)
+        _last_arxiv_call = slot
+        return slot - now
+
+
+def _wait_for_rate_limit(delay: float):
+    """Space consecutive arXiv API calls by at least `delay` seconds, process-wide."""
+    wait = _reserve_rate_slot(delay)
+    if wait > 0:
+        time.sleep(wait)
+
+
+def iter_arxiv_papers(category: str, max_results: Optional[int] = None, page_size: int = ARXIV_PAGE_SIZE,
+                      delay: float = ARXIV_RATE_LIMIT_DELAY, retries: int = 3, timeout: int = 10):
+    """
+    Generator over arXiv papers in `category`, paging through start/max_results.
+    Entries are parsed from the streamed response and yielded as they arrive.
+    max_results=None harvests until the feed is exhausted.
+    """
+    query = f"cat:{category}"
+    yielded = 0
+    total = None
+
+    while max_results is None or yielded < max_results:
+        if total is not None and yielded >= total:
+            break
+        want = page_size if max_results is None else min(page_size, max_results - yielded)
+        page_info = {}
+        got = 0
+
+        for attempt in range(retries):
+            # resume mid-page if a previous attempt died after yielding some entries
+            params = {"search_query": query, "start": yielded, "max_results": want - got}
+            try:
+                _wait_for_rate_limit(delay)
+                # not activated: this generator's context leaks into the consumer between yields
+                with span("http:arxiv", kind="http", activate=False, start=yielded, attempt=attempt + 1) as s, \
+                        get_http_session().get(ARXIV_API_URL, params=params, stream=True, timeout=timeout) as resp:
+                    s.set(status=resp.status_code)
+                    resp.raise_for_status()
+                    resp.raw.decode_content = True
+                    for paper in _iter_feed(resp.raw, page_info):
+                        got += 1
+                        yielded += 1
+                        yield paper
+                    s.set(entries=got, response_bytes=resp.raw.tell())
+                break
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+                time.sleep(1 + attempt * 2)
+                continue
+            except (requests.RequestException, etree.XMLSyntaxError) as e:
+                print(f"❌ fetch_arxiv_papers failed: {e}")
+                return
+        else:
+            print(f"❌ fetch_arxiv_papers gave up after {retries} attempts at start={yielded}")
+            return
+
+        total = page_info.get("total", total)
+        if got == 0:
+            # past the end of the result set (or arXiv returned an empty page)
+            break
+
+
+@cached_response("arxiv", cache_if=lambda r: r["count"] > 0)
 def fetch_arxiv_papers(category: str, count: int = 10, retries: int = 3, timeout: int = 10):
     """
     Fetch metadata from arXiv for the given category.
     Returns a dict: {'papers': [ {title, authors, summary, pdf_url, arxiv_id, source} ], 'count': n}
+    Large counts are paged through iter_arxiv_papers. Non-empty results are
+    served from the shared response cache (see src.data.http_cache).
+    """
+    papers = list(iter_arxiv_papers(category, max_results=count, retries=retries, timeout=timeout))
+    return {"papers": papers, "count": len(papers)}
+
+
+async def aiter_arxiv_papers(category: str, max_results: Optional[int] = None, page_size: int = ARXIV_PAGE_SIZE,
+                             delay: float = ARXIV_RATE_LIMIT_DELAY, retries: int = 3, timeout: int = 10):
+    """
+    Async iter_arxiv_papers over the shared httpx client. The feed is fed to an
+    incremental parser chunk by chunk, and rate-limit waits and retry backoffs
+    yield the event loop instead of blocking a thread.
     """
     query = f"cat:{category}"
-    params = {"search_query": query, "start": 0, "max_results": count}
-    for attempt in range(retries):
-        try:
-            resp = requests.get(ARXIV_API_URL, params=params, timeout=timeout)
-            resp.raise_for_status()
-            soup = BeautifulSoup(resp.text, "xml")
-            papers = []
-            for entry in soup.find_all("entry"):
-                entry_id = entry.id.text if entry.id else ""
-                arxiv_id = _extract_arxiv_id_from_entry_id(entry_id)
-                title = (entry.title.text or "").strip()
-                authors = [a.text.strip() for a in entry.find_all("author")]
-                summary = (entry.summary.text or "").strip()
-                # arXiv gives 'id' like https://arxiv.org/abs/.... convert to pdf
-                pdf_url = entry.id.text.replace("abs", "pdf") + ".pdf" if entry.id else ""
-                papers.append({
-                    "title": title,
-                    "authors": authors,
-                    "summary": summary,
-                    "pdf_url": pdf_url,
-                    "arxiv_id": arxiv_id,
-                    "source": "arxiv",
-                })
-            return {"papers": papers, "count": len(papers)}
-        except requests.exceptions.Timeout:
-            time.sleep(1 + attempt * 2)
-            continue
-        except requests.RequestException as e:
-            print(f"❌ fetch_arxiv_papers failed: {e}")
+    yielded = 0
+    total = None
+
+    while max_results is None or yielded < max_results:
+        if total is not None and yielded >= total:
+            break
+        want = page_size if max_results is None else min(page_size, max_results - yielded)
+        page_info = {}
+        got = 0
+
+        for attempt in range(retries):
+            params = {"search_query": query, "start": yielded, "max_results": want - got}
+            try:
+                wait = _reserve_rate_slot(delay)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                parser = etree.XMLPullParser(events=("end",), tag=FEED_TAGS)
+                with span("http:arxiv", kind="http", activate=False, start=yielded, attempt=attempt + 1) as s:
+                    async with get_http_client().stream("GET", ARXIV_API_URL, params=params, timeout=timeout) as resp:
+                        s.set(status=resp.status_code)
+                        resp.raise_for_status()
+                        async for block in resp.aiter_bytes():
+                            parser.feed(block)
+                            for _, elem in parser.read_events():
+                                paper = _take_element(elem, page_info)
+                                if paper:
+                                    got += 1
+                                    yielded += 1
+                                    yield paper
+                        parser.close()
+                        s.set(entries=got, response_bytes=resp.num_bytes_downloaded)
+                break
+            except (httpx.TimeoutException, httpx.TransportError):
+                await asyncio.sleep(1 + attempt * 2)
+                continue
+            except (httpx.HTTPError, etree.XMLSyntaxError) as e:
+                print(f"❌ fetch_arxiv_papers failed: {e}")
+                return
+        else:
+            print(f"❌ fetch_arxiv_papers gave up after {retries} attempts at start={yielded}")
+            return
+
+        total = page_info.get("total", total)
+        if got == 0:
             break
-    return {"papers": [], "count": 0}
 
 
-@retry(stop=stop_after_attempt(3), wait=wait_fixed(2))
+@cached_response("arxiv", cache_if=lambda r: r["count"] > 0, name="fetch_arxiv_papers")
+async def afetch_arxiv_papers(category: str, count: int = 10, retries: int = 3, timeout: int = 10):
+    """Async fetch_arxiv_papers; shares its response-cache entries."""
+    papers = [p async for p in aiter_arxiv_papers(category, max_results=count, retries=retries, timeout=timeout)]
+    return {"papers": papers, "count": len(papers)}
+
+
+@retry(stop=stop_after_attempt(3), wait=wait_fixed(2), reraise=True)
+def _stream_to_file(url: str, pdf_path: str, timeout: int = 10):
+    """
+    Stream `url` into `pdf_path` via a `.part` file, then rename atomically.
+    A `.part` left by an earlier attempt is resumed with an HTTP Range request,
+    so tenacity retries continue where the last attempt stopped.
+    """
+    part_path = pdf_path + ".part"
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+    with _download_slots:
+        with get_http_session().get(url, headers=headers, stream=True, timeout=timeout) as resp:
+            if resp.status_code == 416:
+                # stale partial file (e.g. the PDF changed upstream): start over
+                os.remove(part_path)
+                raise requests.RequestException(f"Range not satisfiable for {url}, restarting")
+            resp.raise_for_status()
+
+            # 206 → server honoured the range; 200 → full body, overwrite the partial
+            mode = "ab" if resp.status_code == 206 else "wb"
+            with open(part_path, mode) as fd:
+                for block in resp.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES):
+                    fd.write(block)
+
+    os.replace(part_path, pdf_path)
+
+
 def download_pdf(paper: dict, timeout: int = 10):
     """
     Downloads a PDF for one paper dict.
     Returns tuple (pdf_path or None, metadata dict) -- metadata mirrors the paper input.
+    Already-downloaded PDFs are reused without touching the network.
     """
     title = sanitize_filename(paper.get("title", paper.get("arxiv_id", "paper")))
     pdf_url = paper.get("pdf_url", "")
@@ -82,11 +298,11 @@ def download_pdf(paper: dict, timeout: int = 10):
     pdf_path = os.path.join(PDF_DIR, safe_name)
 
     try:
-        resp = requests.get(pdf_url, timeout=timeout)
-        resp.raise_for_status()
-        with open(pdf_path, "wb") as fd:
-            fd.write(resp.content)
-        print(f"✅ Downloaded: {safe_name}")
+        if os.path.exists(pdf_path) and os.path.getsize(pdf_path) > 0:
+            print(f"♻️ Already downloaded: {safe_name}")
+        else:
+            _stream_to_file(pdf_url, pdf_path, timeout=timeout)
+            print(f"✅ Downloaded: {safe_name}")
         # augment metadata with local path
         metadata = {
             **paper,
@@ -94,7 +310,7 @@ def download_pdf(paper: dict, timeout: int = 10):
             "downloaded": True
         }
         return pdf_path, metadata
-    except requests.RequestException as e:
+    except (requests.RequestException, OSError) as e:
         print(f"❌ Error downloading {title}: {e}")
         metadata = {**paper, "downloaded": False}
         return None, metadata
@@ -113,7 +329,7 @@ def process_papers(arxiv_papers: list[dict]):
     metadata_list = []
 
     # parallel download; results may contain None
-    with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
+    with concurrent.futures.ThreadPoolExecutor(max_workers=DOWNLOAD_CONCURRENCY) as executor:
         futures = [executor.submit(download_pdf, p) for p in arxiv_papers]
         for f in concurrent.futures.as_completed(futures):
             try:
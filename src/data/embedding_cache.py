@@ -0,0 +1,176 @@
+# src/data/embedding_cache.py
+# Persistent, content-addressed cache for chunk embeddings.
+# Vectors are keyed by sha256(model, text) and evicted least-recently-used
+# once the cache grows past its entry budget.
+
+import os
+import sqlite3
+import hashlib
+import threading
+import time
+from array import array
+from typing import Callable, Dict, List, Optional, Union
+
+from langchain_core.embeddings import Embeddings
+
+from src.tokens import count_tokens
+from src.tracing import span
+
+
+def embedding_key(model: str, text: str) -> str:
+    """Content address for one (model, chunk text) pair."""
+    return hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    SQLite-backed LRU store of float32 vectors.
+    Safe to share between threads; counts hits and misses for reporting.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100_000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " vector BLOB NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON embeddings(last_used)")
+        self._conn.commit()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Return cached vectors for the given keys and refresh their recency."""
+        found: Dict[str, List[float]] = {}
+        if not keys:
+            return found
+
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            # SQLite caps bound parameters; query in slices
+            for i in range(0, len(unique), 500):
+                part = unique[i:i + 500]
+                marks = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({marks})", part
+                ).fetchall()
+                for key, blob in rows:
+                    vec = array("f")
+                    vec.frombytes(blob)
+                    found[key] = vec.tolist()
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, k) for k in found]
+                )
+                self._conn.commit()
+
+            self.hits += sum(1 for k in keys if k in found)
+            self.misses += sum(1 for k in keys if k not in found)
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]):
+        """Insert vectors, then evict the least recently used rows above the budget."""
+        if not items:
+            return
+        now = time.time()
+        rows = [(k, array("f", v).tobytes(), now) for k, v in items.items()]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                rows
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            overflow = count - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN ("
+                    " SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                    (overflow,)
+                )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+            "entries": len(self),
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that serves document vectors from an EmbeddingCache
+    and only sends cache misses to the underlying model.
+    Query embeddings pass straight through.
+    `base` may be a zero-argument factory, resolved on first use.
+    """
+
+    def __init__(self, base: Union[Embeddings, Callable[[], Embeddings]], model: str, cache: EmbeddingCache):
+        self._base = base
+        self.model = model
+        self.cache = cache
+
+    @property
+    def base(self) -> Embeddings:
+        if not isinstance(self._base, Embeddings):
+            self._base = self._base()
+        return self._base
+
+    @base.setter
+    def base(self, value: Embeddings):
+        self._base = value
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [embedding_key(self.model, t) for t in texts]
+        found = self.cache.get_many(keys)
+
+        # embed each distinct missing text once
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+
+        if missing:
+            with span("embedding:documents", kind="embedding", model=self.model,
+                      texts=len(texts), cached=len(texts) - len(missing)) as s:
+                if s.recording:
+                    s.set(input_tokens=sum(count_tokens(t, self.model) for t in missing.values()))
+                vectors = self.base.embed_documents(list(missing.values()))
+            fresh = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(fresh)
+            found.update(fresh)
+
+        return [found[k] for k in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.base.embed_query(text)
+
+
+_default_cache: Optional[EmbeddingCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_embedding_cache(path: str, max_entries: int) -> EmbeddingCache:
+    """Process-wide cache instance (one SQLite connection per process)."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = EmbeddingCache(path, max_entries)
+        return _default_cache
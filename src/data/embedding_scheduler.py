@@ -0,0 +1,232 @@
+# src/data/embedding_scheduler.py
+# Request scheduling for document embeddings. Batches are sized by token
+# count (tiktoken) up to the provider's per-request limits, and requests from
+# all pipeline workers share one AIMD concurrency limit: it grows by one
+# request per round of fast successes and halves on a 429 (or an overly slow
+# response), so ingestion settles just under the account's tokens-per-minute
+# ceiling. Failed requests are retried with exponential backoff; what still
+# fails is raised as RequestFailed so the caller can report it.
+
+import os
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from langchain_core.embeddings import Embeddings
+
+from src.tokens import count_tokens
+from src.tracing import span
+
+# OpenAI accepts up to 300k tokens and 2048 inputs per embeddings request;
+# OpenAIEmbeddings sends at most 1000 inputs per HTTP request (its chunk_size)
+EMBED_BATCH_TOKENS = min(int(os.getenv("EMBED_BATCH_TOKENS", "100000")), 300_000)
+EMBED_BATCH_MAX_INPUTS = min(int(os.getenv("EMBED_BATCH_MAX_INPUTS", "1000")), 2048)
+EMBED_MAX_CONCURRENCY = int(os.getenv("EMBED_MAX_CONCURRENCY", "8"))
+EMBED_INITIAL_CONCURRENCY = int(os.getenv("EMBED_INITIAL_CONCURRENCY", "2"))
+# a response slower than this counts as congestion, like a 429
+EMBED_LATENCY_TARGET_S = float(os.getenv("EMBED_LATENCY_TARGET_S", "20"))
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "5"))
+RETRY_BASE_S = 1.0
+RETRY_MAX_S = 60.0
+
+
+def token_batches(texts: Sequence[str], model: str, max_tokens: int = EMBED_BATCH_TOKENS,
+                  max_inputs: int = EMBED_BATCH_MAX_INPUTS) -> List[Tuple[int, int]]:
+    """[start, end) ranges of `texts`, each within max_tokens and max_inputs (one oversized text stays alone)."""
+    ranges, start, tokens = [], 0, 0
+    for i, text in enumerate(texts):
+        n = count_tokens(text, model)
+        if i > start and (tokens + n > max_tokens or i - start >= max_inputs):
+            ranges.append((start, i))
+            start, tokens = i, 0
+        tokens += n
+    if start < len(texts):
+        ranges.append((start, len(texts)))
+    return ranges
+
+
+# ---------------- Error Classification ----------------
+def _status(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None) or getattr(error, "status", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """429 from OpenAI (RateLimitError), Pinecone or a plain HTTP client."""
+    return _status(error) == 429 or type(error).__name__ == "RateLimitError"
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Everything but client errors: a rejected input fails the same way on every attempt."""
+    status = _status(error)
+    return status is None or status >= 500 or status in (408, 409, 429)
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the server asked us to wait, if it said so."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_s(attempt: int) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(RETRY_MAX_S, RETRY_BASE_S * 2 ** attempt))
+
+
+# ---------------- AIMD Limiter ----------------
+class AdaptiveLimiter:
+    """
+    Concurrency limit shared by every caller. Additive increase: +1 after
+    `limit` consecutive fast successes. Multiplicative decrease: halved on
+    throttling, after which new requests also wait out the server's pause.
+    """
+
+    def __init__(self, max_limit: int = EMBED_MAX_CONCURRENCY, initial: int = EMBED_INITIAL_CONCURRENCY,
+                 latency_target_s: float = EMBED_LATENCY_TARGET_S):
+        self.max_limit = max(1, max_limit)
+        self.limit = max(1, min(initial, self.max_limit))
+        self.latency_target_s = latency_target_s
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.throttles = 0
+        self.slow = 0
+        self._successes = 0
+        self._resume_at = 0.0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def slot(self):
+        with self._cond:
+            while self.in_flight >= self.limit or time.monotonic() < self._resume_at:
+                self._cond.wait(timeout=max(0.05, self._resume_at - time.monotonic()))
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.in_flight -= 1
+                self._cond.notify_all()
+
+    def on_success(self, latency_s: float):
+        with self._cond:
+            if latency_s > self.latency_target_s:
+                self.slow += 1
+                self._decrease()
+                return
+            self._successes += 1
+            if self._successes >= self.limit and self.limit < self.max_limit:
+                self.limit += 1
+                self._successes = 0
+                self._cond.notify_all()
+
+    def on_throttle(self, pause_s: float):
+        with self._cond:
+            self.throttles += 1
+            self._decrease()
+            self._resume_at = max(self._resume_at, time.monotonic() + pause_s)
+
+    def _decrease(self):
+        self.limit = max(1, self.limit // 2)
+        self._successes = 0
+
+    def reset_peak(self):
+        with self._cond:
+            self.peak_in_flight = self.in_flight
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {"limit": self.limit, "peak_in_flight": self.peak_in_flight,
+                    "throttles": self.throttles, "slow_responses": self.slow}
+
+
+class RequestFailed(Exception):
+    """A request still failing after every retry; `__cause__` is the last error."""
+
+
+def call_with_retries(fn: Callable[[], Any], what: str, limiter: Optional[AdaptiveLimiter] = None,
+                      max_retries: int = EMBED_MAX_RETRIES) -> Any:
+    """
+    Run `fn` (inside a limiter slot when given), retrying with backoff.
+    Rate limits also shrink the limiter; raises RequestFailed at the end.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            if limiter is None:
+                return fn()
+            with limiter.slot():
+                # timed inside the slot: queueing for it, or waiting out a pause, is not response latency
+                start = time.perf_counter()
+                result = fn()
+                latency = time.perf_counter() - start
+            limiter.on_success(latency)
+            return result
+        except Exception as e:
+            throttled = is_rate_limited(e)
+            pause = retry_after(e) or backoff_s(attempt)
+            if throttled and limiter is not None:
+                limiter.on_throttle(pause)
+            if attempt == max_retries or not is_retryable(e):
+                raise RequestFailed(f"{what} failed after {attempt + 1} attempt(s): {e}") from e
+            print(f"⚠️ {what} {'rate-limited' if throttled else 'failed'} "
+                  f"(attempt {attempt + 1}/{max_retries + 1}), retrying in {pause:.1f}s: {e}")
+            time.sleep(pause)
+
+
+# ---------------- Embeddings Wrapper ----------------
+class ScheduledEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that splits document batches by token count and sends
+    them through the shared limiter with retries. Query embeddings pass
+    straight through. `base` may be a zero-argument factory, resolved on first use.
+    """
+
+    def __init__(self, base: Union[Embeddings, Callable[[], Embeddings]], model: str,
+                 limiter: Optional[AdaptiveLimiter] = None):
+        self._base = base
+        self.model = model
+        self.limiter = limiter or AdaptiveLimiter()
+        self.requests = 0
+        self._requests_lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=self.limiter.max_limit, thread_name_prefix="embed")
+
+    @property
+    def base(self) -> Embeddings:
+        if not isinstance(self._base, Embeddings):
+            self._base = self._base()
+        return self._base
+
+    @base.setter
+    def base(self, value: Embeddings):
+        self._base = value
+
+    def _request(self, texts: List[str]) -> List[List[float]]:
+        with span("embedding:request", kind="embedding", model=self.model, texts=len(texts)):
+            with self._requests_lock:   # incremented from the pool's worker threads
+                self.requests += 1
+            return self.base.embed_documents(texts)
+
+    def _embed_range(self, texts: List[str]) -> List[List[float]]:
+        return call_with_retries(lambda: self._request(texts), f"Embedding {len(texts)} chunk(s)", self.limiter)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        ranges = token_batches(texts, self.model)
+        if len(ranges) <= 1:
+            return self._embed_range(list(texts)) if texts else []
+        # a batch over the request limits is split; the parts share the limiter with everyone else
+        parts = list(self._pool.map(lambda r: self._embed_range(list(texts[r[0]:r[1]])), ranges))
+        return [vector for part in parts for vector in part]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.base.embed_query(text)
+
+    def stats(self) -> Dict[str, int]:
+        return {"requests": self.requests, **self.limiter.stats()}
@@ -1,79 +1,65 @@
 # src/data/embeddings.py
-# Create text chunks from PDFs and push embeddings into Pinecone with consistent metadata.
+# Embedding clients and chunk settings shared by the ingestion pipeline, and
+# create_embeddings, its entry point for a list of PDFs. Extraction and
+# splitting live in src.data.extraction.
 
 import sys, os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 
-import fitz  # PyMuPDF
-from concurrent.futures import ThreadPoolExecutor
-from typing import List, Optional, Tuple
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import Pinecone
-import streamlit as st
-from src.config import embeddings, INDEX_NAME
+from typing import List, Optional
+from src.config import (
+    get_embeddings, EMBEDDING_MODEL,
+    EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_ENTRIES,
+)
+from src.data.embedding_cache import CachedEmbeddings, get_embedding_cache
+from src.data.embedding_scheduler import ScheduledEmbeddings
 
 PDF_CHUNK_SIZE = 1200
 PDF_CHUNK_OVERLAP = 100
-BATCH_SIZE = 80
 
 
-@st.cache_resource
-def get_vectorstore():
-    """Initialize and cache Pinecone vectorstore."""
-    return Pinecone.from_existing_index(index_name=INDEX_NAME, embedding=embeddings)
+# Chunk embeddings are served from the on-disk cache; only misses reach OpenAI,
+# through the scheduler (token-sized requests, adaptive concurrency, retries).
+# The OpenAI client itself is only built when the first miss needs it.
+embedding_cache = get_embedding_cache(EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_ENTRIES)
+scheduled_embeddings = ScheduledEmbeddings(get_embeddings, EMBEDDING_MODEL)
+cached_embeddings = CachedEmbeddings(scheduled_embeddings, EMBEDDING_MODEL, embedding_cache)
 
 
-def extract_text_from_pdf(pdf_path: str) -> str:
-    """Extract text from PDF using PyMuPDF."""
-    try:
-        with fitz.open(pdf_path) as doc:
-            pages_text = [p.get_text("text") for p in doc]
-            return "\n".join(pages_text)
-    except Exception as e:
-        print(f"⚠️ Failed to extract text from {pdf_path}: {e}")
-        return ""
-
-
-def process_pdf(pdf_path: str, metadata: dict) -> Tuple[List[str], List[dict]]:
+def attach_chunk_metadata(chunks: List[str], metadata: dict, pages: Optional[List[Optional[int]]] = None,
+                          key: Optional[str] = None) -> List[dict]:
     """
-    Split PDF text into chunks and attach metadata for each chunk.
-    Returns (chunks, metadatas_for_chunks)
+    Compact per-chunk metadata: the paper key, chunk_index and start page.
+    Everything else about the paper (title, authors, abstract, ...) lives once
+    in the paper catalog (src.data.paper_catalog) and is joined back at query time.
     """
-    text = extract_text_from_pdf(pdf_path)
-    if not text.strip():
-        return [], []
-
-    splitter = RecursiveCharacterTextSplitter(chunk_size=PDF_CHUNK_SIZE, chunk_overlap=PDF_CHUNK_OVERLAP)
-    chunks = splitter.split_text(text)
-    # Create per-chunk metadata by extending the given metadata
+    key = key or (metadata or {}).get("arxiv_id") or "N/A"
+    pages = pages or [None] * len(chunks)
     chunk_meta = []
-    base_meta = metadata.copy() if metadata else {}
-    # ensure required keys exist
-    base_meta.setdefault("source", base_meta.get("source", "arxiv"))
-    base_meta.setdefault("title", base_meta.get("title", "Unknown"))
-    base_meta.setdefault("arxiv_id", base_meta.get("arxiv_id", "N/A"))
-    base_meta.setdefault("local_pdf_path", base_meta.get("local_pdf_path", None))
-
-    for i, _ in enumerate(chunks):
-        m = dict(base_meta)
-        m["chunk_index"] = i
+    for i, page in enumerate(pages):
+        m = {"arxiv_id": key, "chunk_index": i}
+        if page is not None:
+            m["page"] = page
         chunk_meta.append(m)
-    return chunks, chunk_meta
+    return chunk_meta
 
 
-def create_embeddings(pdf_paths: List[str], metadata_list: Optional[List[dict]] = None):
+def create_embeddings(pdf_paths: List[str], metadata_list: Optional[List[dict]] = None) -> dict:
     """
-    Generate embeddings from PDFs and store them in Pinecone.
+    Generate embeddings from PDFs and store them in the vector store.
     pdf_paths: list of local PDF paths
     metadata_list: same-length list of metadata dicts aligned with pdf_paths
+
+    Runs the streaming ingestion pipeline (extract → chunk → embed → upsert),
+    so the first batch is upserted while later PDFs are still being parsed.
+    Returns the pipeline summary (see src.data.ingestion).
     """
+    # imported here: the ingestion pipeline is built on top of this module
+    from src.data.ingestion import index_pdfs
+
     if not pdf_paths:
         print("⚠️ No pdfs to process.")
-        return
-
-    vectorstore = get_vectorstore()
-    all_texts = []
-    all_metadata = []
+        return {}
 
     # metadata_list must align with pdf_paths
     metadata_list = metadata_list or [{}] * len(pdf_paths)
@@ -81,28 +67,4 @@ def create_embeddings(pdf_paths: List[str], metadata_list: Optional[List[dict]]
         # If mismatch, fill missing with empty metadata
         metadata_list = (metadata_list + [{}] * len(pdf_paths))[:len(pdf_paths)]
 
-    # parallel processing of pdfs
-    with ThreadPoolExecutor(max_workers=6) as executor:
-        results = list(executor.map(process_pdf, pdf_paths, metadata_list))
-
-    for texts, metas in results:
-        if texts and metas:
-            all_texts.extend(texts)
-            all_metadata.extend(metas)
-
-    if not all_texts:
-        print("⚠️ No text chunks were created; nothing to embed.")
-        return
-
-    print(f"🚀 Preparing to store {len(all_texts)} text chunks in Pinecone...")
-
-    # store in batches to avoid timeouts
-    for i in range(0, len(all_texts), BATCH_SIZE):
-        batch_texts = all_texts[i:i + BATCH_SIZE]
-        batch_metas = all_metadata[i:i + BATCH_SIZE]
-        try:
-            vectorstore.add_texts(batch_texts, metadatas=batch_metas)
-        except Exception as e:
-            print(f"⚠️ Error embedding batch {i // BATCH_SIZE + 1}: {e}")
-
-    print("✅ All text chunks successfully embedded and stored in Pinecone!")
+    return index_pdfs(pdf_paths, metadata_list)
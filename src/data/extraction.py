@@ -0,0 +1,222 @@
+# src/data/extraction.py
+# Process-pool PDF extraction. PyMuPDF text extraction and recursive splitting
+# are CPU-bound, so they run in worker processes instead of GIL-bound threads.
+# Large PDFs are sharded by page range across workers: each worker extracts
+# and splits its pages, and the chunks cut short at a shard edge are re-split
+# from the surrounding text when the shards are stitched back together.
+#
+# This module must stay importable without src.config: worker processes
+# import it, and they should not need API keys or open network clients.
+
+import os
+import bisect
+import multiprocessing
+import threading
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple, Optional, Tuple
+
+import fitz  # PyMuPDF
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+EXTRACT_PROCESSES = int(os.getenv("EXTRACT_PROCESSES", str(os.cpu_count() or 2)))
+# PDFs longer than this are extracted in page-range shards on several workers
+SHARD_PAGES = int(os.getenv("EXTRACT_SHARD_PAGES", "40"))
+
+
+class ChunkBatch(NamedTuple):
+    """
+    All chunks of one PDF packed into a single string plus an array of end
+    offsets: two objects to pickle across the process boundary instead of a
+    list of per-chunk dicts.
+    """
+    pdf_path: str
+    blob: str
+    ends: bytes  # array('I') of chunk end offsets into blob
+    start_pages: bytes = b""  # array('I') of the 1-based page each chunk starts on
+
+    def chunks(self) -> List[str]:
+        ends = array("I")
+        ends.frombytes(self.ends)
+        out, start = [], 0
+        for end in ends:
+            out.append(self.blob[start:end])
+            start = end
+        return out
+
+    def __len__(self) -> int:
+        return len(self.ends) // array("I").itemsize
+
+    def pages(self) -> List[Optional[int]]:
+        """Start page of every chunk (None when the batch carries no page information)."""
+        if not self.start_pages:
+            return [None] * len(self)
+        pages = array("I")
+        pages.frombytes(self.start_pages)
+        return pages.tolist()
+
+
+def _pack(pdf_path: str, chunks: List[str], pages: Optional[List[int]] = None) -> ChunkBatch:
+    ends, total = array("I"), 0
+    for c in chunks:
+        total += len(c)
+        ends.append(total)
+    return ChunkBatch(pdf_path, "".join(chunks), ends.tobytes(), array("I", pages or []).tobytes())
+
+
+def _join_pages(page_texts: List[str]):
+    """(text joined with newlines, offset where every page starts in it)."""
+    starts, offset = [], 0
+    for page in page_texts:
+        starts.append(offset)
+        offset += len(page) + 1
+    return "\n".join(page_texts), starts
+
+
+def _chunk_starts(text: str, chunks: List[str], chunk_overlap: int) -> List[int]:
+    """Offset of each chunk in text; chunks are in-order substrings of text."""
+    starts, start, end = [], 0, 0
+    for chunk in chunks:
+        found = text.find(chunk, max(start, end - chunk_overlap))
+        if found < 0:
+            found = text.find(chunk, start)
+        start = found if found >= 0 else start
+        end = start + len(chunk)
+        starts.append(start)
+    return starts
+
+
+def _chunk_pages(text: str, chunks: List[str], page_starts: List[int], chunk_overlap: int) -> List[int]:
+    """1-based page of each chunk's first character."""
+    return [bisect.bisect_right(page_starts, start) for start in _chunk_starts(text, chunks, chunk_overlap)]
+
+
+class Shard(NamedTuple):
+    """One page range, extracted and split by a worker; offsets are relative to `text`."""
+    text: str
+    page_starts: List[int]
+    chunks: List[str]
+    starts: List[int]
+
+
+def _stitch(shards: List[Shard], chunk_size: int, chunk_overlap: int) -> Tuple[List[str], List[int]]:
+    """
+    Chunks and start pages of the whole document. The last chunk before a
+    shard edge and the first one after it were cut by the edge, not by the
+    splitter: the text they cover is split again to join them up.
+    """
+    text = "\n".join(shard.text for shard in shards)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    page_starts: List[int] = []
+    chunks: List[str] = []
+    starts: List[int] = []
+    base = 0
+    for shard in shards:
+        page_starts += [base + p for p in shard.page_starts]
+        shard_chunks, shard_starts = shard.chunks, [base + s for s in shard.starts]
+        if chunks and shard_chunks:
+            seam_from, seam_to = starts[-1], shard_starts[0] + len(shard_chunks[0])
+            seam = splitter.split_text(text[seam_from:seam_to])
+            chunks[-1:] = seam
+            starts[-1:] = [seam_from + s for s in _chunk_starts(text[seam_from:seam_to], seam, chunk_overlap)]
+            shard_chunks, shard_starts = shard_chunks[1:], shard_starts[1:]
+        chunks += shard_chunks
+        starts += shard_starts
+        base += len(shard.text) + 1
+    return chunks, [bisect.bisect_right(page_starts, start) for start in starts]
+
+
+# ---------------- Worker Functions (run in child processes) ----------------
+def extract_page_texts(pdf_path: str, start: int = 0, stop: Optional[int] = None) -> List[str]:
+    """Text of every page in [start, stop)."""
+    with fitz.open(pdf_path) as doc:
+        stop = doc.page_count if stop is None else min(stop, doc.page_count)
+        return [doc[i].get_text("text") for i in range(start, stop)]
+
+
+def split_shard(pdf_path: str, start: int, stop: int, chunk_size: int, chunk_overlap: int) -> Shard:
+    """Extract and split pages [start, stop) on their own (see _stitch)."""
+    text, page_starts = _join_pages(extract_page_texts(pdf_path, start, stop))
+    if not text.strip():
+        return Shard(text, page_starts, [], [])
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    chunks = splitter.split_text(text)
+    return Shard(text, page_starts, chunks, _chunk_starts(text, chunks, chunk_overlap))
+
+
+def split_text(pdf_path: str, text: str, chunk_size: int, chunk_overlap: int,
+               page_starts: Optional[List[int]] = None) -> ChunkBatch:
+    if not text.strip():
+        return _pack(pdf_path, [])
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    chunks = splitter.split_text(text)
+    pages = _chunk_pages(text, chunks, page_starts, chunk_overlap) if page_starts else None
+    return _pack(pdf_path, chunks, pages)
+
+
+def extract_and_split(pdf_path: str, chunk_size: int, chunk_overlap: int) -> ChunkBatch:
+    text, page_starts = _join_pages(extract_page_texts(pdf_path))
+    return split_text(pdf_path, text, chunk_size, chunk_overlap, page_starts)
+
+
+# ---------------- Engine ----------------
+def _start_method() -> str:
+    # the app process is multi-threaded (Streamlit, pipeline stages): don't fork it directly
+    methods = multiprocessing.get_all_start_methods()
+    return "forkserver" if "forkserver" in methods else "spawn"
+
+
+class ExtractionEngine:
+    """
+    Shared process pool for PDF → ChunkBatch. `extract` is safe to call from
+    many threads at once; each call blocks until its PDF is done.
+    """
+
+    def __init__(self, processes: int = EXTRACT_PROCESSES, shard_pages: int = SHARD_PAGES):
+        self.processes = max(1, processes)
+        self.shard_pages = shard_pages
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                ctx = multiprocessing.get_context(_start_method())
+                self._pool = ProcessPoolExecutor(max_workers=self.processes, mp_context=ctx)
+            return self._pool
+
+    def extract(self, pdf_path: str, chunk_size: int, chunk_overlap: int) -> ChunkBatch:
+        with fitz.open(pdf_path) as doc:
+            page_count = doc.page_count
+
+        if page_count <= self.shard_pages:
+            return self.pool.submit(extract_and_split, pdf_path, chunk_size, chunk_overlap).result()
+
+        # shard by page range: every worker extracts and splits its pages, and
+        # only the chunks around the shard edges are split again here
+        futures = [
+            self.pool.submit(split_shard, pdf_path, start, start + self.shard_pages, chunk_size, chunk_overlap)
+            for start in range(0, page_count, self.shard_pages)
+        ]
+        chunks, pages = _stitch([f.result() for f in futures], chunk_size, chunk_overlap)
+        return _pack(pdf_path, chunks, pages)
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+
+
+_engine: Optional[ExtractionEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_extraction_engine() -> ExtractionEngine:
+    """Process-wide engine so every build reuses the same warm workers."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = ExtractionEngine()
+        return _engine
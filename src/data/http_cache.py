@@ -0,0 +1,249 @@
+# src/data/http_cache.py
+# Shared, disk-backed cache for external tool responses (SerpAPI, Wikipedia,
+# arXiv). Entries have per-source TTLs, the file is kept under a byte budget
+# with LRU eviction, and entries just past their TTL are served immediately
+# while a background refresh replaces them (stale-while-revalidate).
+
+import os
+import re
+import json
+import asyncio
+import inspect
+import sqlite3
+import hashlib
+import threading
+import time
+import functools
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from src.tracing import span
+
+HTTP_CACHE_PATH = os.getenv("HTTP_CACHE_PATH", "data/cache/http.sqlite")
+HTTP_CACHE_MAX_MB = float(os.getenv("HTTP_CACHE_MAX_MB", "64"))
+
+# source → (ttl seconds, extra seconds a stale entry may still be served while refreshing)
+SOURCE_TTLS: Dict[str, Tuple[float, float]] = {
+    "serpapi": (6 * 3600, 24 * 3600),
+    "wikipedia": (7 * 86400, 7 * 86400),
+    "arxiv": (3600, 6 * 3600),
+}
+DEFAULT_TTL = (3600, 3600)
+
+
+def _normalize(value: Any) -> Any:
+    """Queries differing only in case or whitespace share one cache entry."""
+    if isinstance(value, str):
+        return re.sub(r"\s+", " ", value).strip().lower()
+    return value
+
+
+def cache_key(source: str, *args, **kwargs) -> str:
+    parts = [source, [_normalize(a) for a in args], {k: _normalize(v) for k, v in sorted(kwargs.items())}]
+    return hashlib.sha256(json.dumps(parts, default=str).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed JSON response store with TTLs and a byte-size LRU bound."""
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._refresh_tasks = set()
+        self.counters: Dict[str, Dict[str, int]] = {}
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " source TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " stored_at REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_resp_last_used ON responses(last_used)")
+        self._conn.commit()
+
+    def _count(self, source: str, outcome: str):
+        with self._lock:
+            per_source = self.counters.setdefault(source, {"hits": 0, "stale_hits": 0, "misses": 0})
+            per_source[outcome] += 1
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Return (value, age_seconds) or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return json.loads(row[0]), time.time() - row[1]
+
+    def put(self, source: str, key: str, value: Any):
+        blob = json.dumps(value, default=str)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, source, value, size, stored_at, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, source, blob, len(blob), now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        freed, doomed = 0, []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_used ASC"):
+            doomed.append((key,))
+            freed += size
+            if total - freed <= self.max_bytes:
+                break
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def _lookup(self, source: str, key: str, s) -> Tuple[str, Any]:
+        """Classify `key` as ("hit" | "stale" | "miss", cached value)."""
+        ttl, stale_window = SOURCE_TTLS.get(source, DEFAULT_TTL)
+        cached = self.get(key)
+        if cached is not None:
+            value, age = cached
+            if age < ttl + stale_window:
+                outcome = "hit" if age < ttl else "stale"
+                self._count(source, "hits" if outcome == "hit" else "stale_hits")
+                s.set(outcome=outcome, age_s=round(age, 1))
+                return outcome, value
+        self._count(source, "misses")
+        s.set(outcome="miss")
+        return "miss", None
+
+    def fetch(self, source: str, key: str, loader: Callable[[], Any],
+              cache_if: Callable[[Any], bool] = bool) -> Any:
+        """
+        Serve `key` from cache when fresh; when stale but within the grace
+        window, serve it and refresh in the background; otherwise call loader.
+        Only values accepted by `cache_if` are stored (errors are not cached).
+        """
+        with span(f"cache:{source}", kind="cache") as s:
+            outcome, value = self._lookup(source, key, s)
+            if outcome == "stale":
+                self._refresh_in_background(source, key, loader, cache_if)
+            if outcome != "miss":
+                return value
+
+            value = loader()
+            if cache_if(value):
+                self.put(source, key, value)
+            return value
+
+    async def afetch(self, source: str, key: str, loader: Callable[[], Awaitable[Any]],
+                     cache_if: Callable[[Any], bool] = bool) -> Any:
+        """fetch() for async loaders; stale entries are refreshed by a task on the running loop."""
+        with span(f"cache:{source}", kind="cache") as s:
+            outcome, value = self._lookup(source, key, s)
+            if outcome == "stale" and self._claim_refresh(key):
+                task = asyncio.get_running_loop().create_task(self._arefresh(source, key, loader, cache_if))
+                # the loop only keeps weak references to tasks
+                self._refresh_tasks.add(task)
+                task.add_done_callback(self._refresh_tasks.discard)
+            if outcome != "miss":
+                return value
+
+            value = await loader()
+            if cache_if(value):
+                self.put(source, key, value)
+            return value
+
+    def _claim_refresh(self, key: str) -> bool:
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    async def _arefresh(self, source, key, loader, cache_if):
+        try:
+            value = await loader()
+            if cache_if(value):
+                self.put(source, key, value)
+        except Exception as e:
+            print(f"⚠️ Background refresh for {source} failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _refresh_in_background(self, source, key, loader, cache_if):
+        if not self._claim_refresh(key):
+            return
+
+        def _refresh():
+            try:
+                value = loader()
+                if cache_if(value):
+                    self.put(source, key, value)
+            except Exception as e:
+                print(f"⚠️ Background refresh for {source} failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=_refresh, name=f"refresh-{source}", daemon=True).start()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            counters = {source: dict(c) for source, c in self.counters.items()}
+        out: Dict[str, Any] = {"entries": entries, "bytes": size, "sources": {}}
+        for source, c in counters.items():
+            lookups = c["hits"] + c["stale_hits"] + c["misses"]
+            out["sources"][source] = {**c, "hit_rate": ((c["hits"] + c["stale_hits"]) / lookups) if lookups else 0.0}
+        return out
+
+
+_default_cache: Optional[ResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Process-wide response cache shared by every tool."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache(HTTP_CACHE_PATH, int(HTTP_CACHE_MAX_MB * 1024 * 1024))
+        return _default_cache
+
+
+def cached_response(source: str, cache_if: Callable[[Any], bool] = bool, name: Optional[str] = None):
+    """
+    Decorator: cache a function's JSON-serializable return value under `source`,
+    keyed by its (normalized) arguments. Coroutine functions get an async
+    wrapper; `name` (default: the function name) lets an async twin share the
+    sync function's entries.
+    """
+    def decorator(fn):
+        key_name = name or fn.__name__
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                key = cache_key(source, key_name, *args, **kwargs)
+                return await get_response_cache().afetch(source, key, lambda: fn(*args, **kwargs), cache_if)
+            async_wrapper.uncached = fn
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = cache_key(source, key_name, *args, **kwargs)
+            return get_response_cache().fetch(source, key, lambda: fn(*args, **kwargs), cache_if)
+        wrapper.uncached = fn
+        return wrapper
+    return decorator
@@ -0,0 +1,80 @@
+# src/data/hybrid_search.py
+# Hybrid retrieval for the rag tools: BM25 hits from the lexical index are
+# fused with dense vector hits by reciprocal rank fusion. Queries the lexical
+# index answers confidently (exact names, acronyms) skip the embedding call
+# and the vector search entirely.
+
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+from src.data.lexical_index import (
+    LexicalHit, FUSION_CANDIDATES, get_lexical_index, is_confident, reciprocal_rank_fusion,
+)
+from src.data.retrieval_cache import embed_query_cached, aembed_query_cached
+from src.data.retrieval_client import Match, RetrievalClient
+from src.tracing import span
+
+
+def _lexical(query: str, top_k: int, arxiv_id: Optional[str]) -> Tuple[List[LexicalHit], bool]:
+    index = get_lexical_index()
+    n = top_k * FUSION_CANDIDATES
+    with span("lexical:query", kind="lexical", top_k=n) as s:
+        hits = index.search(query, top_k=n, doc_key=arxiv_id)
+        confident = is_confident(query, hits, top_k, index.rarest_df_ratio(query))
+        s.set(matches=len(hits), fast_path=confident)
+    return hits, confident
+
+
+def _dense_filter(arxiv_id: Optional[str]) -> Optional[dict]:
+    return {"arxiv_id": arxiv_id} if arxiv_id else None
+
+
+def _fused_ids(dense: List[Match], lexical: List[LexicalHit], top_k: int) -> List[str]:
+    return reciprocal_rank_fusion([[m.id for m in dense], [h.id for h in lexical]])[:top_k]
+
+
+def _assemble(client: RetrievalClient, ids: List[str], known: Dict[str, Match], fetched: List[Match]) -> List[Match]:
+    known.update((m.id, m) for m in fetched)
+    # dense hits come back without text: read it for the final top-k only
+    return client.hydrate([known[vid] for vid in ids if vid in known])
+
+
+def hybrid_search(client: RetrievalClient, embedding, query: str, top_k: int,
+                  arxiv_id: Optional[str] = None) -> List[Match]:
+    """Top-k chunks for `query` (optionally within one paper), best first."""
+    lexical, confident = _lexical(query, top_k, arxiv_id)
+    if confident:
+        return client.fetch([h.id for h in lexical[:top_k]])
+
+    vector = embed_query_cached(embedding, query)
+    with span("vectorstore:query", kind="vector", backend=client.backend, top_k=top_k) as s:
+        dense = client.query(vector, top_k=top_k * FUSION_CANDIDATES, filter=_dense_filter(arxiv_id))
+        s.set(matches=len(dense))
+
+    ids = _fused_ids(dense, lexical, top_k)
+    known = {m.id: m for m in dense}
+    # chunks only the lexical side found are read straight from the chunk store
+    return _assemble(client, ids, known, client.fetch([vid for vid in ids if vid not in known]))
+
+
+async def ahybrid_search(client: RetrievalClient, embedding, query: str, top_k: int,
+                         arxiv_id: Optional[str] = None) -> List[Match]:
+    """
+    hybrid_search with the async embedding client. Everything that blocks (the
+    lexical index, vector-store and chunk-store calls) runs in a worker thread,
+    keeping the shared event loop free for the other questions.
+    """
+    lexical, confident = await asyncio.to_thread(_lexical, query, top_k, arxiv_id)
+    if confident:
+        return await asyncio.to_thread(client.fetch, [h.id for h in lexical[:top_k]])
+
+    vector = await aembed_query_cached(embedding, query)
+    with span("vectorstore:query", kind="vector", backend=client.backend, top_k=top_k) as s:
+        dense = await asyncio.to_thread(client.query, vector, top_k * FUSION_CANDIDATES, _dense_filter(arxiv_id))
+        s.set(matches=len(dense))
+
+    ids = _fused_ids(dense, lexical, top_k)
+    known = {m.id: m for m in dense}
+    missing = [vid for vid in ids if vid not in known]
+    fetched = await asyncio.to_thread(client.fetch, missing) if missing else []
+    return await asyncio.to_thread(_assemble, client, ids, known, fetched)
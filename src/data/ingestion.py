@@ -0,0 +1,343 @@
+# src/data/ingestion.py
+# Streaming ingestion: download → extract → chunk → embed → upsert.
+# Every stage runs concurrently behind a bounded queue (src.data.pipeline), so
+# embedding starts as soon as the first PDF lands instead of after all of them.
+
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from src.config import EMBEDDING_MODEL, MANIFEST_PATH
+from src.data.dataset import download_pdf, iter_arxiv_papers, DOWNLOAD_CONCURRENCY
+from src.data.embeddings import (
+    PDF_CHUNK_SIZE, PDF_CHUNK_OVERLAP,
+    attach_chunk_metadata, cached_embeddings, embedding_cache, scheduled_embeddings,
+)
+from src.data.embedding_scheduler import EMBED_MAX_CONCURRENCY, RequestFailed, call_with_retries, token_batches
+from src.data.extraction import get_extraction_engine, EXTRACT_PROCESSES
+from src.data.lexical_index import get_lexical_index
+from src.data.local_vectorstore import LocalVectorStore
+from src.data.manifest import get_manifest, file_sha256, doc_key, chunk_ids
+from src.data.paper_catalog import get_paper_catalog
+from src.data.pipeline import Pipeline, Stage
+from src.data.retrieval_cache import bump_index_version
+from src.data.retrieval_client import get_retrieval_client, RetrievalClient
+
+DOWNLOAD_WORKERS = DOWNLOAD_CONCURRENCY
+# threads that feed the extraction process pool; one per worker process keeps it saturated
+EXTRACT_WORKERS = EXTRACT_PROCESSES
+CHUNK_WORKERS = 2
+# batches in flight; the scheduler's adaptive limit decides how many actually hit the API
+EMBED_WORKERS = EMBED_MAX_CONCURRENCY
+UPSERT_WORKERS = 2
+QUEUE_SIZE = 8
+
+# Anything that changes the vectors of an unchanged PDF forces a re-index.
+CHUNK_PARAMS = {
+    "chunk_size": PDF_CHUNK_SIZE,
+    "chunk_overlap": PDF_CHUNK_OVERLAP,
+    "embedding_model": EMBEDDING_MODEL,
+}
+
+manifest = get_manifest(MANIFEST_PATH)
+
+
+# ---------------- Stage Functions ----------------
+# Each takes one item and returns a list of items for the next stage.
+
+def _download(paper: dict) -> List[dict]:
+    pdf_path, meta = download_pdf(paper)
+    if not pdf_path:
+        print(f"⚠️ Skipped (download failed): {meta.get('title', 'unknown')}")
+        return []
+    return [{"pdf_path": pdf_path, "metadata": meta}]
+
+
+def _make_extract(skipped: List[dict]) -> Callable[[dict], List[dict]]:
+    def _extract(job: dict) -> List[dict]:
+        # PDFs whose bytes and chunking are unchanged since the last build are not re-parsed
+        content_hash = file_sha256(job["pdf_path"])
+        key = doc_key(job["metadata"], content_hash)
+        if manifest.is_current(key, CHUNK_PARAMS, content_hash):
+            skipped.append(job["metadata"])
+            return []
+        return _extract_chunks({**job, "content_hash": content_hash, "doc_key": key})
+    return _extract
+
+
+def _extract_chunks(job: dict) -> List[dict]:
+    # text extraction and splitting run in the process pool (see src.data.extraction)
+    try:
+        batch = get_extraction_engine().extract(job["pdf_path"], PDF_CHUNK_SIZE, PDF_CHUNK_OVERLAP)
+    except Exception as e:
+        print(f"⚠️ Failed to extract text from {job['pdf_path']}: {e}")
+        return []
+    if not len(batch):
+        print(f"⚠️ No text extracted from {job['pdf_path']}")
+        return []
+    return [{**job, "chunk_batch": batch}]
+
+
+def _chunk(job: dict) -> List[dict]:
+    batch = job["chunk_batch"]
+    chunks = batch.chunks()
+    # paper fields are stored once, before any of its chunks can be returned by a search
+    get_paper_catalog().put(job["doc_key"], job["metadata"])
+    metas = attach_chunk_metadata(chunks, job["metadata"], pages=batch.pages(), key=job["doc_key"])
+    # each batch is one embeddings request: as many chunks as fit the token and input limits
+    ranges = token_batches(chunks, EMBEDDING_MODEL)
+    ids = chunk_ids(job["doc_key"], len(chunks))
+    return [
+        {
+            "pdf_path": job["pdf_path"],
+            "metadata": job["metadata"],
+            "doc_key": job["doc_key"],
+            "content_hash": job["content_hash"],
+            "n_chunks": len(chunks),
+            "ids": ids[start:end],
+            "texts": chunks[start:end],
+            "metas": metas[start:end],
+            "batches": len(ranges),
+        }
+        for start, end in ranges
+    ]
+
+
+def _embed(batch: dict) -> List[dict]:
+    # retries and rate limiting happen in the scheduler; a batch that still fails is reported, not dropped
+    try:
+        return [{**batch, "vectors": cached_embeddings.embed_documents(batch["texts"])}]
+    except RequestFailed as e:
+        print(f"❌ {e}")
+        return [{**batch, "vectors": None, "error": str(e)}]
+
+
+def _make_upsert(client: RetrievalClient) -> Callable[[dict], List[dict]]:
+    def _upsert(batch: dict) -> List[dict]:
+        done = {
+            "pdf_path": batch["pdf_path"],
+            "metadata": batch["metadata"],
+            "doc_key": batch["doc_key"],
+            "content_hash": batch["content_hash"],
+            "n_chunks": batch["n_chunks"],
+            "chunks": 0,
+            "failed_chunks": len(batch["texts"]),
+            "error": batch.get("error"),
+            "batches": batch["batches"],
+        }
+        if batch["vectors"] is None:
+            return [done]
+        try:
+            # deterministic ids make re-indexing an upsert instead of a duplicate insert
+            call_with_retries(
+                lambda: client.upsert(batch["ids"], batch["vectors"], batch["texts"], batch["metas"]),
+                f"Upserting {len(batch['ids'])} chunk(s)",
+            )
+        except RequestFailed as e:
+            print(f"❌ {e}")
+            return [{**done, "error": str(e)}]
+        get_lexical_index().add(batch["ids"], batch["texts"])
+        # cached rag_search results predate this write
+        bump_index_version()
+        return [{**done, "chunks": len(batch["texts"]), "failed_chunks": 0}]
+    return _upsert
+
+
+# ---------------- Runner ----------------
+def _build_stages(client: RetrievalClient, with_download: bool, skipped: List[dict]) -> List[Stage]:
+    stages = []
+    if with_download:
+        stages.append(Stage("download", _download, DOWNLOAD_WORKERS, QUEUE_SIZE))
+    stages += [
+        Stage("extract", _make_extract(skipped), EXTRACT_WORKERS, QUEUE_SIZE),
+        Stage("chunk", _chunk, CHUNK_WORKERS, QUEUE_SIZE),
+        Stage("embed", _embed, EMBED_WORKERS, QUEUE_SIZE),
+        Stage("upsert", _make_upsert(client), UPSERT_WORKERS, QUEUE_SIZE),
+    ]
+    return stages
+
+
+def _finish_paper(client: RetrievalClient, done: dict):
+    """Drop chunks left over from a longer previous version, then record the paper."""
+    previous = manifest.get(done["doc_key"])
+    if previous and previous.get("n_chunks", 0) > done["n_chunks"]:
+        stale = chunk_ids(done["doc_key"], previous["n_chunks"], start=done["n_chunks"])
+        try:
+            client.delete(stale)
+            get_lexical_index().delete(stale)
+            bump_index_version()
+        except Exception as e:
+            print(f"⚠️ Could not delete {len(stale)} stale chunks of {done['doc_key']}: {e}")
+    # the paper's chunk texts were appended to the chunk store by its upserts, so
+    # they survive an interrupted build even though the store index is flushed per run
+    manifest.record(done["doc_key"], done["content_hash"], CHUNK_PARAMS, done["n_chunks"], done["metadata"])
+
+
+def _skip_unchanged(papers: Iterable[dict], skipped: List[dict]):
+    """Drop papers already indexed with the current params before anything is downloaded."""
+    for paper in papers:
+        arxiv_id = paper.get("arxiv_id")
+        if arxiv_id and manifest.is_current(arxiv_id, CHUNK_PARAMS):
+            entry = manifest.get(arxiv_id)
+            skipped.append({**entry.get("metadata", {}), **paper})
+            continue
+        yield paper
+
+
+def _backfill_lexical_index(client: RetrievalClient):
+    """Seed an empty lexical index from a vector store built before it existed."""
+    lexical = get_lexical_index()
+    if len(lexical) or not manifest.entries:
+        return
+    store = client.store
+    if isinstance(store, LocalVectorStore):
+        matches = client.fetch(list(store.ids))
+        lexical.add([m.id for m in matches], [m.text for m in matches])
+        lexical.flush()
+        print(f"🔤 Built the lexical index from {len(lexical)} existing chunks.")
+    else:
+        print("⚠️ The lexical index is empty but papers are already indexed; "
+              "delete the manifest and re-index to enable hybrid search for them.")
+
+
+def _backfill_paper_catalog():
+    """Seed an empty catalog from the manifest, which records every indexed paper's metadata."""
+    catalog = get_paper_catalog()
+    if len(catalog) or not manifest.entries:
+        return
+    catalog.put_many({key: entry.get("metadata", {}) for key, entry in manifest.entries.items()})
+    print(f"📇 Built the paper catalog from {len(catalog)} indexed papers.")
+
+
+def _request_report(before: dict, after: dict) -> dict:
+    """Scheduler counters of this run (the limiter itself is shared by the whole process)."""
+    counters = ("requests", "throttles", "slow_responses")
+    return {**after, **{k: after[k] - before[k] for k in counters}}
+
+
+def _run(source: Iterable, with_download: bool, on_progress: Optional[Callable[[dict], None]],
+         pre_skipped: Optional[List[dict]] = None) -> dict:
+    client = get_retrieval_client()
+    # open the backend up front so connection errors surface before any download starts
+    client.store
+    _backfill_lexical_index(client)
+    _backfill_paper_catalog()
+    pre_skipped = pre_skipped if pre_skipped is not None else []
+    skipped: List[dict] = []
+    pipeline = Pipeline(_build_stages(client, with_download, skipped))
+    hits_before, misses_before = embedding_cache.hits, embedding_cache.misses
+    requests_before = scheduled_embeddings.stats()
+    scheduled_embeddings.limiter.reset_peak()
+
+    pending: Dict[str, dict] = {}
+    indexed: List[dict] = []
+    failed: List[dict] = []
+    total_chunks = 0
+    start = time.perf_counter()
+
+    try:
+        for done in pipeline.run(source):
+            total_chunks += done["chunks"]
+            state = pending.setdefault(done["pdf_path"], {"batches": 0, "chunks": 0, "failed": 0, "error": None})
+            state["batches"] += 1
+            state["chunks"] += done["chunks"]
+            state["failed"] += done["failed_chunks"]
+            state["error"] = state["error"] or done["error"]
+
+            if state["batches"] == done["batches"]:
+                pending.pop(done["pdf_path"])
+                if state["failed"]:
+                    # left out of the manifest, so the next build retries the whole paper
+                    failed.append({
+                        "title": done["metadata"].get("title", "Unknown"),
+                        "arxiv_id": done["metadata"].get("arxiv_id", "N/A"),
+                        "doc_key": done["doc_key"],
+                        "failed_chunks": state["failed"],
+                        "n_chunks": done["n_chunks"],
+                        "error": state["error"],
+                    })
+                    continue
+                _finish_paper(client, done)
+                indexed.append(done["metadata"])
+                if on_progress:
+                    on_progress({
+                        "title": done["metadata"].get("title", "Unknown"),
+                        "arxiv_id": done["metadata"].get("arxiv_id", "N/A"),
+                        "chunks": state["chunks"],
+                        "indexed": len(indexed),
+                        "elapsed_s": time.perf_counter() - start,
+                    })
+    finally:
+        # the BM25 index is rebuilt and the chunk store index written once per run, not per batch;
+        # nested so that one failing flush does not skip the other
+        try:
+            get_lexical_index().flush()
+        finally:
+            client.flush()
+
+    hits = embedding_cache.hits - hits_before
+    misses = embedding_cache.misses - misses_before
+    lookups = hits + misses
+    skipped = pre_skipped + skipped
+    summary = {
+        "papers_in": pipeline.fed + len(pre_skipped),
+        "indexed_papers": indexed,
+        "skipped_papers": skipped,
+        "failed_papers": failed,
+        "chunks": total_chunks,
+        "failed_chunks": sum(f["failed_chunks"] for f in failed),
+        "elapsed_s": pipeline.elapsed_s,
+        "embedding_cache": {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": (hits / lookups) if lookups else 0.0,
+        },
+        "embedding_requests": _request_report(requests_before, scheduled_embeddings.stats()),
+        "stages": pipeline.report(),
+    }
+
+    print(f"🚀 Indexed {total_chunks} chunks from {len(indexed)}/{summary['papers_in']} inputs "
+          f"in {pipeline.elapsed_s:.1f}s ({len(skipped)} unchanged, skipped)")
+    print(f"🗃️ Embedding cache: {hits} hits, {misses} misses ({summary['embedding_cache']['hit_rate']:.0%} hit rate)")
+    requests = summary["embedding_requests"]
+    print(f"📡 Embedding requests: {requests['requests']} sent, up to {requests['peak_in_flight']} in flight, "
+          f"{requests['throttles']} rate-limited (concurrency limit now {requests['limit']})")
+    if failed:
+        print(f"❌ {summary['failed_chunks']} chunks of {len(failed)} papers could not be indexed "
+              f"(they are retried on the next build):")
+        for f in failed:
+            print(f"   {f['arxiv_id']} {f['title'][:60]}: {f['failed_chunks']}/{f['n_chunks']} chunks — {f['error']}")
+    for name, s in summary["stages"].items():
+        print(f"   {name:<9} in={s['items_in']:<4} busy={s['utilization']:.0%} "
+              f"backpressure={s['backpressure']:.0%} max_queue={s['max_queue']}")
+    return summary
+
+
+def ingest_papers(papers: Iterable[dict], on_progress: Optional[Callable[[dict], None]] = None) -> dict:
+    """
+    Download, chunk, embed and index arXiv paper dicts as one streaming pipeline.
+    `papers` may be a list or a generator. `on_progress` is called on the
+    caller's thread each time a paper is fully indexed.
+    Papers the manifest already lists as indexed are skipped before download.
+    """
+    pre_skipped: List[dict] = []
+    return _run(_skip_unchanged(papers, pre_skipped), with_download=True,
+                on_progress=on_progress, pre_skipped=pre_skipped)
+
+
+def ingest_category(category: str, max_results: Optional[int] = None,
+                    on_progress: Optional[Callable[[dict], None]] = None) -> dict:
+    """
+    Harvest a whole arXiv category straight into the pipeline: papers are
+    downloaded while later feed pages are still being fetched and parsed.
+    """
+    return ingest_papers(iter_arxiv_papers(category, max_results=max_results), on_progress=on_progress)
+
+
+def index_pdfs(pdf_paths: List[str], metadata_list: List[dict],
+               on_progress: Optional[Callable[[dict], None]] = None) -> dict:
+    """Same pipeline for PDFs that are already on disk."""
+    jobs = ({"pdf_path": p, "metadata": m or {}} for p, m in zip(pdf_paths, metadata_list))
+    return _run(jobs, with_download=False, on_progress=on_progress)
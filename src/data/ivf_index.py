@@ -0,0 +1,149 @@
+# src/data/ivf_index.py
+# Inverted-file (IVF) index over the rows of the local vector store. Rows are
+# clustered by spherical k-means (plain NumPy); a query scores the centroids,
+# probes the `nprobe` closest lists and scores only the rows in them. Small
+# stores keep the exact scan: the index is trained by LocalVectorStore.optimize()
+# once a store reaches IVF_MIN_ROWS rows, and retrained when it has grown
+# IVF_RETRAIN_GROWTH times since. New rows in between join their nearest list.
+
+import os
+from typing import Optional
+
+import numpy as np
+
+IVF_MIN_ROWS = int(os.getenv("IVF_MIN_ROWS", "50000"))
+# lists; 0 picks 4·√rows
+IVF_NLIST = int(os.getenv("IVF_NLIST", "0"))
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "64"))
+IVF_TRAIN_ITERS = int(os.getenv("IVF_TRAIN_ITERS", "10"))
+IVF_RETRAIN_GROWTH = float(os.getenv("IVF_RETRAIN_GROWTH", "4"))
+# k-means runs on a sample of this many rows per list (Faiss warns below ~39)
+TRAIN_ROWS_PER_LIST = 40
+ASSIGN_BLOCK = 16384
+
+
+def default_nlist(rows: int) -> int:
+    return IVF_NLIST or int(min(65536, max(16, 4 * np.sqrt(rows))))
+
+
+def nearest_centroids(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Best centroid (by inner product) of every row, computed in blocks."""
+    labels = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGN_BLOCK):
+        block = np.asarray(vectors[start:start + ASSIGN_BLOCK], dtype=np.float32)
+        labels[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return labels
+
+
+def spherical_kmeans(data: np.ndarray, k: int, iters: int = IVF_TRAIN_ITERS, seed: int = 0) -> np.ndarray:
+    """Unit-norm centroids of L2-normalized `data`; empty clusters are reseeded from random rows."""
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(len(data), k, replace=False)].copy()
+    for _ in range(iters):
+        labels = nearest_centroids(data, centroids)
+        counts = np.bincount(labels, minlength=k)
+        order = np.argsort(labels, kind="stable")
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        filled = counts > 0
+        sums = np.zeros_like(centroids)
+        sums[filled] = np.add.reduceat(data[order], starts[filled], axis=0)
+        empty = np.flatnonzero(~filled)
+        sums[empty] = data[rng.choice(len(data), len(empty), replace=False)]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = sums / np.where(norms == 0, 1, norms)
+    return centroids.astype(np.float32)
+
+
+class IVFIndex:
+    """
+    Centroids plus the list of every store row. Rows are addressed by their
+    position in the store, so the store reports upserts, moves and truncation.
+    `generation` is the store metadata version the labels were saved with.
+    """
+
+    def __init__(self, centroids: np.ndarray, labels: np.ndarray, trained_rows: int, generation: int = 0):
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.labels = np.asarray(labels, dtype=np.int32)
+        self.trained_rows = trained_rows
+        self.generation = generation
+        self._order: Optional[np.ndarray] = None
+        self._bounds: Optional[np.ndarray] = None
+
+    @staticmethod
+    def fit_centroids(matrix: np.ndarray, rows: int, nlist: Optional[int] = None,
+                      iters: int = IVF_TRAIN_ITERS, seed: int = 0) -> np.ndarray:
+        """k-means centroids of a sample of the first `rows` rows of `matrix`."""
+        nlist = min(nlist or default_nlist(rows), rows)
+        rng = np.random.default_rng(seed)
+        sample_size = min(rows, nlist * TRAIN_ROWS_PER_LIST)
+        sample = np.sort(rng.choice(rows, sample_size, replace=False))
+        return spherical_kmeans(np.asarray(matrix[sample], dtype=np.float32), nlist, iters, seed)
+
+    @classmethod
+    def train(cls, matrix: np.ndarray, rows: int, nlist: Optional[int] = None,
+              iters: int = IVF_TRAIN_ITERS, seed: int = 0) -> "IVFIndex":
+        """Cluster the first `rows` rows of `matrix` and assign all of them."""
+        centroids = cls.fit_centroids(matrix, rows, nlist, iters, seed)
+        return cls(centroids, nearest_centroids(matrix[:rows], centroids), rows)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    # ---------------- Row Updates ----------------
+    def assign(self, rows: np.ndarray, vectors: np.ndarray):
+        """(Re)place rows in their nearest list; rows past the end grow the index."""
+        rows = np.asarray(rows, dtype=np.int64)
+        if not len(rows):
+            return
+        if rows.max() >= len(self.labels):
+            grown = np.zeros(int(rows.max()) + 1, dtype=np.int32)
+            grown[:len(self.labels)] = self.labels
+            self.labels = grown
+        self.labels[rows] = nearest_centroids(vectors, self.centroids)
+        self._order = None
+
+    def move(self, dst: int, src: int):
+        self.labels[dst] = self.labels[src]
+        self._order = None
+
+    def truncate(self, rows: int):
+        self.labels = self.labels[:rows]
+        self._order = None
+
+    # ---------------- Search ----------------
+    def _lists(self):
+        # rows grouped by list (CSR), rebuilt after writes
+        if self._order is None:
+            self._order = np.argsort(self.labels, kind="stable")
+            self._bounds = np.concatenate(([0], np.cumsum(np.bincount(self.labels, minlength=self.nlist))))
+        return self._order, self._bounds
+
+    def candidates(self, query: np.ndarray, nprobe: int = IVF_NPROBE) -> np.ndarray:
+        """Rows in the `nprobe` lists closest to the (unit) query, sorted."""
+        order, bounds = self._lists()
+        nprobe = min(max(1, nprobe), self.nlist)
+        scores = self.centroids @ query
+        probe = np.argpartition(-scores, nprobe - 1)[:nprobe]
+        return np.sort(np.concatenate([order[bounds[c]:bounds[c + 1]] for c in probe]))
+
+    def stats(self) -> dict:
+        sizes = np.bincount(self.labels, minlength=self.nlist) if len(self.labels) else np.zeros(self.nlist)
+        return {"nlist": self.nlist, "rows": len(self.labels), "trained_rows": self.trained_rows,
+                "max_list": int(sizes.max()) if len(sizes) else 0, "empty_lists": int((sizes == 0).sum())}
+
+    # ---------------- Persistence ----------------
+    def save(self, path: str):
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, centroids=self.centroids, labels=self.labels, trained_rows=self.trained_rows,
+                 generation=self.generation)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "IVFIndex":
+        with np.load(path) as arrays:
+            generation = int(arrays["generation"]) if "generation" in arrays else -1
+            return cls(arrays["centroids"], arrays["labels"], int(arrays["trained_rows"]), generation)
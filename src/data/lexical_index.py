@@ -0,0 +1,399 @@
+# src/data/lexical_index.py
+# On-disk BM25 inverted index over the indexed chunks, keyed by the same
+# vector ids as the vector store. Postings are stored as flat NumPy arrays
+# (doc ordinal + term frequency per term, CSR-style), so the file stays compact
+# and a query is a handful of vectorized slices. Used by the rag tools for
+# hybrid (lexical + dense) retrieval; see src.data.hybrid_search.
+
+import os
+import re
+import json
+import math
+import threading
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from src.config import LEXICAL_INDEX_DIR
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+# reciprocal rank fusion constant (Cormack et al.); damps the weight of the very top ranks
+RRF_K = 60
+# candidates taken from each ranking before fusion, as a multiple of top_k
+FUSION_CANDIDATES = int(os.getenv("FUSION_CANDIDATES", "4"))
+# lexical-only fast path: short queries whose best hits contain every query term
+LEXICAL_FAST_PATH = os.getenv("LEXICAL_FAST_PATH", "1") != "0"
+FAST_PATH_MAX_TERMS = int(os.getenv("FAST_PATH_MAX_TERMS", "4"))
+# ...and contain at least one term this rare (share of chunks it appears in)
+FAST_PATH_MAX_DF = float(os.getenv("FAST_PATH_MAX_DF", "0.05"))
+
+META_FILE = "lexicon.json"
+POSTINGS_FILE = "postings.npz"
+# writes since the last flush, one JSON line per add/delete batch
+DELTA_FILE = "delta.log"
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were "
+    "what which who with how do does did about between into than then there these those".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased alphanumeric terms without stopwords ("GSAT" → "gsat")."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def doc_key_of(vector_id: str) -> str:
+    """Vector ids are '<doc key>:<chunk index>' (see src.data.manifest.chunk_ids)."""
+    return vector_id.rsplit(":", 1)[0]
+
+
+class LexicalHit(NamedTuple):
+    id: str
+    score: float
+    matched_terms: int
+
+
+class LexicalIndex:
+    """
+    BM25 index with upsert/delete by vector id.
+
+    Reads use the frozen arrays of the last flush plus a small delta segment:
+    writes mask the frozen documents they replace or delete and keep their own
+    postings in dicts. The delta is journaled as it is written and merged into
+    new frozen arrays (vectorized, no per-posting Python) by flush().
+    """
+
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+        self._lock = threading.RLock()
+        self._mtime = 0
+        self._journal_size = 0
+        self._writes = 0        # bumped by every applied write, so flush() can tell its snapshot is current
+
+        # frozen (base) segment, as of the last flush
+        self.ids: List[str] = []
+        self.terms: Dict[str, int] = {}
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._postings_doc = np.zeros(0, dtype=np.uint32)
+        self._postings_tf = np.zeros(0, dtype=np.uint16)
+        self._doc_len = np.zeros(0, dtype=np.float32)
+        self._doc_keys = np.zeros(0, dtype=object)
+        self._slot: Dict[str, int] = {}                 # vector id → base ordinal
+        self._masked = np.zeros(0, dtype=bool)          # base docs replaced or deleted since
+        self._n_masked = 0
+
+        # delta segment: documents written since the last flush
+        self._delta: Dict[str, Dict[str, int]] = {}            # vector id → term counts
+        self._delta_postings: Dict[str, Dict[str, int]] = {}   # term → vector id → tf
+        self._delta_tokens = 0
+
+        self._load()
+
+    # ---------------- Persistence ----------------
+    @property
+    def _meta_path(self) -> str:
+        return os.path.join(self.index_dir, META_FILE)
+
+    @property
+    def _postings_path(self) -> str:
+        return os.path.join(self.index_dir, POSTINGS_FILE)
+
+    @property
+    def _journal_path(self) -> str:
+        return os.path.join(self.index_dir, DELTA_FILE)
+
+    def _load(self):
+        self._writes += 1
+        self._mtime = 0
+        self.ids, self.terms = [], {}
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._postings_doc = np.zeros(0, dtype=np.uint32)
+        self._postings_tf = np.zeros(0, dtype=np.uint16)
+        self._doc_len = np.zeros(0, dtype=np.float32)
+        if os.path.exists(self._meta_path):
+            self._mtime = os.stat(self._meta_path).st_mtime_ns
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with np.load(self._postings_path) as arrays:
+                self._offsets = arrays["offsets"]
+                self._postings_doc = arrays["doc"]
+                self._postings_tf = arrays["tf"]
+                self._doc_len = arrays["doc_len"]
+            self.ids = meta["ids"]
+            self.terms = {term: i for i, term in enumerate(meta["terms"])}
+        self._reset_delta()
+        self._replay_journal()
+
+    def _reset_delta(self):
+        self._doc_keys = np.asarray([doc_key_of(vid) for vid in self.ids], dtype=object)
+        self._slot = {vid: i for i, vid in enumerate(self.ids)}
+        self._masked = np.zeros(len(self.ids), dtype=bool)
+        self._n_masked = 0
+        self._delta, self._delta_postings, self._delta_tokens = {}, {}, 0
+
+    def _replay_journal(self):
+        """Apply the writes journaled since the last flush; a torn last line is cut off."""
+        self._journal_size = 0
+        if not os.path.exists(self._journal_path):
+            return
+        with open(self._journal_path, "rb") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                self._apply(entry)
+                self._journal_size += len(line)
+        if os.path.getsize(self._journal_path) != self._journal_size:
+            with open(self._journal_path, "r+b") as f:
+                f.truncate(self._journal_size)
+
+    @staticmethod
+    def _journal_line(entry: dict) -> bytes:
+        return (json.dumps(entry, separators=(",", ":")) + "\n").encode("utf-8")
+
+    def _append_journal(self, line: bytes):
+        os.makedirs(self.index_dir, exist_ok=True)
+        with open(self._journal_path, "ab") as f:
+            f.write(line)
+        self._journal_size += len(line)
+
+    def _refresh_if_stale(self):
+        """Pick up writes made by another handle (other page, other process)."""
+        try:
+            mtime = os.stat(self._meta_path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = 0
+        try:
+            journal_size = os.path.getsize(self._journal_path)
+        except FileNotFoundError:
+            journal_size = 0
+        if mtime != self._mtime or journal_size != self._journal_size:
+            self._load()
+
+    def flush(self):
+        """Merge the delta into the frozen arrays and persist them (postings, then the lexicon, then drop the journal)."""
+        with self._lock:
+            if not self._journal_size:
+                return
+            writes, snapshot = self._writes, self._snapshot()
+        # merged outside the lock: searches keep reading the current segments meanwhile
+        merged = self._merged(*snapshot)
+        with self._lock:
+            if self._writes != writes:
+                merged = self._merged(*self._snapshot())
+            self.ids, self.terms, self._offsets, self._postings_doc, self._postings_tf, self._doc_len = merged
+            self._reset_delta()
+            os.makedirs(self.index_dir, exist_ok=True)
+            tmp = self._postings_path + ".tmp.npz"
+            np.savez(tmp, offsets=self._offsets, doc=self._postings_doc, tf=self._postings_tf, doc_len=self._doc_len)
+            os.replace(tmp, self._postings_path)
+            tmp = self._meta_path + ".tmp"
+            terms = sorted(self.terms, key=self.terms.get)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"ids": self.ids, "terms": terms}, f)
+            os.replace(tmp, self._meta_path)
+            self._mtime = os.stat(self._meta_path).st_mtime_ns
+            # replaying a journal the lexicon already absorbed is harmless: its writes are upserts
+            os.remove(self._journal_path)
+            self._journal_size = 0
+
+    def _snapshot(self) -> tuple:
+        # frozen arrays are replaced, never modified; the mask and the delta are (caller holds the lock)
+        base = (self.ids, self.terms, self._offsets, self._postings_doc, self._postings_tf, self._doc_len)
+        return base, self._masked.copy(), dict(self._delta)
+
+    @staticmethod
+    def _merged(base: tuple, masked: np.ndarray, delta: Dict[str, Dict[str, int]]) -> tuple:
+        """New frozen arrays: the unmasked base postings plus the delta's, regrouped by term."""
+        ids, terms, offsets, postings_doc, postings_tf, doc_len = base
+        keep = ~masked
+        base_terms = sorted(terms, key=terms.get)
+        delta_ids = list(delta)
+        vocab = sorted(set(base_terms).union(*delta.values()))
+        index = {term: i for i, term in enumerate(vocab)}
+
+        # base postings: drop masked docs, renumber the rest, move to the merged vocabulary
+        ordinal = np.cumsum(keep) - 1
+        term_of = np.repeat(np.arange(len(base_terms), dtype=np.int64), np.diff(offsets))
+        live = keep[postings_doc] if len(postings_doc) else np.zeros(0, dtype=bool)
+        base_map = np.fromiter((index[t] for t in base_terms), dtype=np.int64, count=len(base_terms))
+        n_kept = int(keep.sum())
+        sizes = np.fromiter((len(delta[vid]) for vid in delta_ids), dtype=np.int64, count=len(delta_ids))
+        total = int(sizes.sum())
+
+        term_col = np.concatenate([base_map[term_of[live]], np.fromiter(
+            (index[term] for vid in delta_ids for term in delta[vid]), dtype=np.int64, count=total)])
+        doc_col = np.concatenate([ordinal[postings_doc[live]],
+                                  np.repeat(np.arange(n_kept, n_kept + len(delta_ids), dtype=np.int64), sizes)])
+        tf_col = np.concatenate([postings_tf[live], np.fromiter(
+            (min(tf, 65535) for vid in delta_ids for tf in delta[vid].values()), dtype=np.uint16, count=total)])
+        # the base postings stay sorted by (term, doc), so the stable (merging) sort is near-linear
+        order = np.argsort(term_col * max(1, n_kept + len(delta_ids)) + doc_col, kind="stable")
+        counts = np.bincount(term_col, minlength=len(vocab))
+        used = counts > 0   # terms whose documents were all deleted leave the lexicon
+
+        return (
+            [ids[i] for i in np.flatnonzero(keep)] + delta_ids,
+            {term: i for i, term in enumerate(t for t, u in zip(vocab, used) if u)},
+            np.concatenate([[0], np.cumsum(counts[used])]).astype(np.int64),
+            doc_col[order].astype(np.uint32),
+            tf_col[order].astype(np.uint16),
+            np.concatenate([doc_len[keep], np.fromiter(
+                (sum(delta[vid].values()) for vid in delta_ids), dtype=np.float32, count=len(delta_ids))]),
+        )
+
+    # ---------------- Writes ----------------
+    def _apply(self, entry: dict):
+        self._writes += 1
+        for vid in entry.get("delete", ()):
+            self._drop(vid)
+        for vid, counts in entry.get("add", {}).items():
+            self._drop(vid)
+            self._delta[vid] = counts
+            self._delta_tokens += sum(counts.values())
+            for term, tf in counts.items():
+                self._delta_postings.setdefault(term, {})[vid] = tf
+
+    def _drop(self, vid: str):
+        """Remove a document from the delta, or mask it in the base."""
+        counts = self._delta.pop(vid, None)
+        if counts is not None:
+            self._delta_tokens -= sum(counts.values())
+            for term in counts:
+                docs = self._delta_postings[term]
+                del docs[vid]
+                if not docs:
+                    del self._delta_postings[term]
+        slot = self._slot.get(vid)
+        if slot is not None and not self._masked[slot]:
+            self._masked[slot] = True
+            self._n_masked += 1
+
+    def add(self, ids: Sequence[str], texts: Sequence[str]):
+        """Upsert chunks; an existing id is re-tokenized."""
+        added: Dict[str, Dict[str, int]] = {}
+        for vid, text in zip(ids, texts):
+            counts: Dict[str, int] = {}
+            for term in tokenize(text):
+                counts[term] = counts.get(term, 0) + 1
+            added[vid] = counts
+        line = self._journal_line({"add": added})
+        with self._lock:
+            self._refresh_if_stale()
+            self._append_journal(line)
+            self._apply({"add": added})
+
+    def delete(self, ids: Sequence[str]):
+        with self._lock:
+            self._refresh_if_stale()
+            self._append_journal(self._journal_line({"delete": list(ids)}))
+            self._apply({"delete": ids})
+
+    def __len__(self) -> int:
+        return len(self.ids) - self._n_masked + len(self._delta)
+
+    # ---------------- Reads ----------------
+    def _df(self, term: str) -> int:
+        """Documents containing `term`, across both segments."""
+        df = len(self._delta_postings.get(term, ()))
+        t = self.terms.get(term)
+        if t is not None:
+            docs = self._postings_doc[self._offsets[t]:self._offsets[t + 1]]
+            df += len(docs) - (int(self._masked[docs].sum()) if self._n_masked else 0)
+        return df
+
+    def rarest_df_ratio(self, query: str) -> float:
+        """Share of chunks containing the query's rarest indexed term (1.0 if none is indexed)."""
+        with self._lock:
+            n = len(self)
+            dfs = [df for df in (self._df(term) for term in tokenize(query)) if df]
+            return float(min(dfs)) / n if n and dfs else 1.0
+
+    def search(self, query: str, top_k: int = 10, doc_key: Optional[str] = None) -> List[LexicalHit]:
+        """BM25 top-k, best first; `doc_key` restricts hits to one paper's chunks."""
+        with self._lock:
+            self._refresh_if_stale()
+            n = len(self)
+            query_terms = [t for t in dict.fromkeys(tokenize(query)) if t in self.terms or t in self._delta_postings]
+            if n == 0 or not query_terms or top_k <= 0:
+                return []
+
+            base_tokens = float(self._doc_len[~self._masked].sum()) if self._n_masked else float(self._doc_len.sum())
+            avg_len = (base_tokens + self._delta_tokens) / n or 1.0
+            scores = np.zeros(len(self.ids), dtype=np.float32)
+            matched = np.zeros(len(self.ids), dtype=np.int32)
+            delta_scores: Dict[str, float] = {}
+            delta_matched: Dict[str, int] = {}
+            for term in query_terms:
+                df = self._df(term)
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                t = self.terms.get(term)
+                if t is not None:
+                    docs = self._postings_doc[self._offsets[t]:self._offsets[t + 1]]
+                    tf = self._postings_tf[self._offsets[t]:self._offsets[t + 1]].astype(np.float32)
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_len[docs] / avg_len)
+                    scores[docs] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+                    matched[docs] += 1
+                for vid, tf in self._delta_postings.get(term, {}).items():
+                    if doc_key is not None and doc_key_of(vid) != doc_key:
+                        continue
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * sum(self._delta[vid].values()) / avg_len)
+                    delta_scores[vid] = delta_scores.get(vid, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+                    delta_matched[vid] = delta_matched.get(vid, 0) + 1
+
+            if self._n_masked:
+                scores[self._masked] = 0
+            if doc_key is not None:
+                scores[self._doc_keys != doc_key] = 0
+            hits = [LexicalHit(vid, float(score), delta_matched[vid]) for vid, score in delta_scores.items()]
+            candidates = np.flatnonzero(scores > 0)
+            if len(candidates):
+                k = min(top_k, len(candidates))
+                top = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+                top = top[np.argsort(-scores[top], kind="stable")]
+                hits = [LexicalHit(self.ids[i], float(scores[i]), int(matched[i])) for i in top] + hits
+            hits.sort(key=lambda h: -h.score)
+            return hits[:top_k]
+
+
+def is_confident(query: str, hits: List[LexicalHit], top_k: int, rarest_df: float) -> bool:
+    """
+    Lexical results are trusted on their own (no embedding call) when the query
+    is a few exact terms, one of them rare in the corpus (an acronym, a system
+    or author name), and each of the top_k hits contains all of them. Fewer
+    than top_k hits never qualify: the vector search is needed to fill the list.
+    """
+    if not LEXICAL_FAST_PATH or not hits or len(hits) < top_k:
+        return False
+    n_terms = len(set(tokenize(query)))
+    if n_terms == 0 or n_terms > FAST_PATH_MAX_TERMS or rarest_df > FAST_PATH_MAX_DF:
+        return False
+    return all(h.matched_terms == n_terms for h in hits[:top_k])
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = RRF_K) -> List[str]:
+    """Fuse ranked id lists: score(id) = Σ 1 / (k + rank). Ties keep first-seen order."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, vid in enumerate(ranking, 1):
+            scores[vid] = scores.get(vid, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+_index: Optional[LexicalIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_lexical_index() -> LexicalIndex:
+    """Process-wide lexical index shared by ingestion and the rag tools."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = LexicalIndex(LEXICAL_INDEX_DIR)
+        return _index
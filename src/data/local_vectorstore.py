@@ -0,0 +1,492 @@
+# src/data/local_vectorstore.py
+# Single-node vector store: float32 vectors in a memory-mapped matrix plus a
+# columnar JSON metadata sidecar. Cosine top-k is a vectorized NumPy scan, or
+# an IVF probe (src.data.ivf_index) once the store is large enough.
+#
+# Upserts append their ids and metadata to a journal (meta.<generation>.log)
+# instead of rewriting meta.json; flush() folds the journal into a new
+# meta.json once per build, and loading replays whatever journal is left.
+
+import os
+import json
+import uuid
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from src.data.ivf_index import IVFIndex, IVF_MIN_ROWS, IVF_NPROBE, IVF_RETRAIN_GROWTH, nearest_centroids
+
+VECTORS_FILE = "vectors.f32"
+META_FILE = "meta.json"
+JOURNAL_FILE = "meta.{}.log"
+IVF_FILE = "ivf.npz"
+MIN_CAPACITY = 1024
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _hashable(value: Any) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+class LocalVectorStore(VectorStore):
+    """
+    Drop-in replacement for the Pinecone vectorstore on a single node.
+
+    Rows are L2-normalized on insert, so cosine similarity is one mat-vec product.
+    Metadata is kept column-wise (one list per key); equality filters such as
+    {"arxiv_id": "..."} look up the matching rows in a per-column value index
+    and only those rows are scored.
+
+    Stores of IVF_MIN_ROWS rows or more are searched approximately once
+    optimize() has trained an IVF index: only the rows of the `nprobe` lists
+    closest to the query are scored. Filters selecting fewer rows than that
+    are still searched exactly.
+    """
+
+    def __init__(self, index_dir: str, embedding: Embeddings, dimension: int = 1536):
+        self.index_dir = index_dir
+        self.dimension = dimension
+        self._embedding = embedding
+        self._lock = threading.RLock()
+
+        self.ids: List[str] = []
+        self.texts: List[str] = []
+        self.columns: Dict[str, List[Any]] = {}
+        self._row_of: Dict[str, int] = {}
+        self._value_rows: Dict[str, Dict[Any, np.ndarray]] = {}
+        self._matrix: Optional[np.memmap] = None
+        self._ivf: Optional[IVFIndex] = None
+        self._meta_mtime = 0
+        self._generation = 0
+        self._journal_size = 0
+        self._unsaved = False
+
+        os.makedirs(index_dir, exist_ok=True)
+        self._load()
+
+    # ---------------- Persistence ----------------
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.index_dir, VECTORS_FILE)
+
+    @property
+    def _meta_path(self) -> str:
+        return os.path.join(self.index_dir, META_FILE)
+
+    @property
+    def _ivf_path(self) -> str:
+        return os.path.join(self.index_dir, IVF_FILE)
+
+    @property
+    def _journal_path(self) -> str:
+        return os.path.join(self.index_dir, JOURNAL_FILE.format(self._generation))
+
+    def _load(self):
+        self.ids, self.texts, self.columns, self._row_of = [], [], {}, {}
+        self._generation, self._meta_mtime = 0, 0
+        self._value_rows.clear()
+        if os.path.exists(self._meta_path):
+            self._meta_mtime = os.stat(self._meta_path).st_mtime_ns
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            self.dimension = meta.get("dimension", self.dimension)
+            self.ids = meta.get("ids", [])
+            self.texts = meta.get("texts", [])
+            self.columns = meta.get("columns", {})
+            self._generation = meta.get("generation", 0)
+            self._row_of = {vid: i for i, vid in enumerate(self.ids)}
+
+        if os.path.exists(self._vectors_path):
+            capacity = os.path.getsize(self._vectors_path) // (4 * self.dimension)
+            self._open_matrix(max(capacity, MIN_CAPACITY))
+
+        self._ivf = None
+        if self.ids and os.path.exists(self._ivf_path):
+            self._ivf = IVFIndex.load(self._ivf_path)
+            if self._ivf.generation != self._generation or len(self._ivf) != len(self.ids):
+                # saved against another meta.json (e.g. a delete after it): place every row again
+                self._ivf.truncate(0)
+                self._ivf.assign(np.arange(len(self.ids)), self._matrix[:len(self.ids)])
+                self._ivf.generation = self._generation
+        # journaled rows join the lists as they are replayed
+        self._replay_journal()
+
+    def _open_matrix(self, capacity: int):
+        """(Re)map the vector file with room for `capacity` rows."""
+        if self._matrix is not None:
+            self._matrix.flush()
+            del self._matrix
+        needed = capacity * 4 * self.dimension
+        mode = "r+" if os.path.exists(self._vectors_path) else "w+"
+        if mode == "r+" and os.path.getsize(self._vectors_path) < needed:
+            with open(self._vectors_path, "r+b") as f:
+                f.truncate(needed)
+        self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode=mode,
+                                 shape=(capacity, self.dimension))
+
+    def _ensure_capacity(self, rows: int):
+        capacity = 0 if self._matrix is None else self._matrix.shape[0]
+        if rows <= capacity:
+            return
+        new_capacity = max(MIN_CAPACITY, capacity)
+        while new_capacity < rows:
+            new_capacity *= 2
+        self._open_matrix(new_capacity)
+
+    def _replay_journal(self):
+        """Apply the upserts journaled since meta.json was written; a torn last line is cut off."""
+        self._journal_size, self._unsaved = 0, False
+        if not os.path.exists(self._journal_path):
+            return
+        with open(self._journal_path, "rb") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                written = self._apply_upsert(entry["ids"], entry["texts"], entry["metadatas"])
+                if self._ivf is not None:
+                    self._ivf.assign(np.asarray(written), self._matrix[written])
+                self._journal_size += len(line)
+        if os.path.getsize(self._journal_path) != self._journal_size:
+            with open(self._journal_path, "r+b") as f:
+                f.truncate(self._journal_size)
+        self._unsaved = self._journal_size > 0
+
+    def _append_journal(self, ids: List[str], texts: List[str], metadatas: List[dict]):
+        line = json.dumps({"ids": ids, "texts": texts, "metadatas": metadatas}, default=str) + "\n"
+        with open(self._journal_path, "ab") as f:
+            f.write(line.encode("utf-8"))
+        self._journal_size += len(line.encode("utf-8"))
+        self._unsaved = True
+
+    def _save(self):
+        """Write a new meta.json holding everything, then drop the journal it absorbed."""
+        if self._matrix is not None:
+            self._matrix.flush()
+        if self._ivf is not None:
+            # saved with meta.json only (not per upsert), stamped with the generation it matches
+            self._ivf.generation = self._generation + 1
+            self._ivf.save(self._ivf_path)
+        old_journal = self._journal_path
+        tmp = self._meta_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "dimension": self.dimension,
+                "generation": self._generation + 1,
+                "ids": self.ids,
+                "texts": self.texts,
+                "columns": self.columns,
+            }, f)
+        os.replace(tmp, self._meta_path)
+        self._generation += 1
+        self._meta_mtime = os.stat(self._meta_path).st_mtime_ns
+        self._journal_size, self._unsaved = 0, False
+        if os.path.exists(old_journal):
+            os.remove(old_journal)
+
+    def flush(self):
+        """Persist meta.json once for all journaled upserts (call at the end of a build)."""
+        with self._lock:
+            if self._unsaved:
+                self._save()
+
+    def _refresh_if_stale(self):
+        """Pick up writes made by another handle (other page, other process)."""
+        try:
+            mtime = os.stat(self._meta_path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = 0
+        try:
+            journal_size = os.path.getsize(self._journal_path)
+        except FileNotFoundError:
+            journal_size = 0
+        if mtime != self._meta_mtime or journal_size != self._journal_size:
+            self._load()
+
+    # ---------------- Writes ----------------
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _apply_upsert(self, ids: List[str], texts: List[str], metadatas: List[dict]) -> List[int]:
+        """Ids, texts and metadata of an upsert; returns the row of each item."""
+        written = []
+        for vid, text, meta in zip(ids, texts, metadatas):
+            row = self._row_of.get(vid)
+            if row is None:
+                row = len(self.ids)
+                self._row_of[vid] = row
+                self.ids.append(vid)
+                self.texts.append(text)
+                for col in self.columns.values():
+                    col.append(None)
+            else:
+                self.texts[row] = text
+                for col in self.columns.values():
+                    col[row] = None
+
+            for key, value in meta.items():
+                if key not in self.columns:
+                    self.columns[key] = [None] * len(self.ids)
+                self.columns[key][row] = value
+            written.append(row)
+        self._value_rows.clear()
+        return written
+
+    def add_embeddings(
+        self,
+        texts: List[str],
+        vectors: List[List[float]],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+    ) -> List[str]:
+        """Upsert pre-computed vectors; existing ids are overwritten in place."""
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        matrix = _normalize(np.asarray(vectors, dtype=np.float32).reshape(len(texts), self.dimension))
+
+        with self._lock:
+            self._refresh_if_stale()
+            new_rows = sum(1 for vid in dict.fromkeys(ids) if vid not in self._row_of)
+            self._ensure_capacity(len(self.ids) + new_rows)
+
+            written = self._apply_upsert(ids, texts, metadatas)
+            for row, vec in zip(written, matrix):
+                self._matrix[row] = vec
+            # vectors reach the file before the journal line that makes them visible
+            self._matrix.flush()
+            self._append_journal(list(ids), list(texts), list(metadatas))
+
+            if self._ivf is not None:
+                # new rows join their nearest list; the lists are retrained by optimize()
+                self._ivf.assign(np.asarray(written), matrix)
+        return ids
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        vectors = self._embedding.embed_documents(texts)
+        return self.add_embeddings(texts, vectors, metadatas, ids)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        """
+        Remove rows by id, compacting the matrix by moving the last row into each hole.
+        Moved rows cannot be journaled, so a delete (rare: a paper re-indexed
+        with fewer chunks) writes meta.json at once.
+        """
+        if not ids:
+            return False
+        with self._lock:
+            self._refresh_if_stale()
+            for vid in ids:
+                row = self._row_of.pop(vid, None)
+                if row is None:
+                    continue
+                last = len(self.ids) - 1
+                if row != last:
+                    moved = self.ids[last]
+                    self.ids[row] = moved
+                    self.texts[row] = self.texts[last]
+                    for col in self.columns.values():
+                        col[row] = col[last]
+                    self._matrix[row] = self._matrix[last]
+                    self._row_of[moved] = row
+                    if self._ivf is not None:
+                        self._ivf.move(row, last)
+                self.ids.pop()
+                self.texts.pop()
+                for col in self.columns.values():
+                    col.pop()
+            if self._ivf is not None:
+                self._ivf.truncate(len(self.ids))
+            self._value_rows.clear()
+            self._save()
+        return True
+
+    def optimize(self) -> bool:
+        """
+        Train the IVF index once the store reaches IVF_MIN_ROWS rows, and
+        retrain it after IVF_RETRAIN_GROWTH-fold growth (call at the end of a
+        build). Returns True when the index was (re)built.
+        """
+        with self._lock:
+            self._refresh_if_stale()
+            rows = len(self.ids)
+            if rows < IVF_MIN_ROWS:
+                if self._ivf is not None:
+                    self._ivf = None
+                    os.remove(self._ivf_path)
+                return False
+            if self._ivf is not None and rows < IVF_RETRAIN_GROWTH * self._ivf.trained_rows:
+                return False
+            matrix = self._matrix
+        # k-means runs without the lock, so searches are not held up; rows
+        # written meanwhile are placed with all the others below
+        centroids = IVFIndex.fit_centroids(matrix, rows)
+        with self._lock:
+            self._refresh_if_stale()
+            rows = len(self.ids)
+            self._ivf = IVFIndex(centroids, nearest_centroids(self._matrix[:rows], centroids), rows)
+            # one save per training run: meta.json absorbs the journal and ivf.npz is written with it
+            self._save()
+            return True
+
+    def ann_stats(self) -> Optional[dict]:
+        """Shape of the IVF index, or None while searches are exact."""
+        with self._lock:
+            return self._ivf.stats() if self._ivf is not None else None
+
+    # ---------------- Reads ----------------
+    def _rows_with(self, key: str, values: List[Any]) -> np.ndarray:
+        """Sorted rows whose `key` equals one of `values` (value → rows index built per column)."""
+        index = self._value_rows.get(key)
+        if index is None:
+            groups: Dict[Any, List[int]] = {}
+            for row, value in enumerate(self.columns.get(key, [])):
+                try:
+                    groups.setdefault(value, []).append(row)
+                except TypeError:
+                    continue  # unhashable values (lists) are never filter targets
+            index = {value: np.asarray(rows, dtype=np.int64) for value, rows in groups.items()}
+            self._value_rows[key] = index
+        found = [index[v] for v in values if _hashable(v) and v in index]
+        if len(found) == 1:
+            return found[0]
+        return np.unique(np.concatenate(found)) if found else np.zeros(0, dtype=np.int64)
+
+    def _filter_rows(self, filter: Dict[str, Any]) -> np.ndarray:
+        """Equality filter; also accepts Pinecone-style {"$eq": v} and {"$in": [...]}."""
+        rows = None
+        for key, cond in filter.items():
+            if isinstance(cond, dict) and "$in" in cond:
+                values = list(cond["$in"])
+            else:
+                values = [cond["$eq"] if isinstance(cond, dict) and "$eq" in cond else cond]
+            matched = self._rows_with(key, values)
+            rows = matched if rows is None else np.intersect1d(rows, matched, assume_unique=True)
+        return rows
+
+    def _probe(self, query: np.ndarray, k: int, rows: Optional[np.ndarray], nprobe: int) -> np.ndarray:
+        """IVF candidates (within `rows` if given), probing more lists until there are k of them."""
+        while True:
+            candidates = self._ivf.candidates(query, nprobe)
+            if rows is not None:
+                candidates = candidates[np.isin(candidates, rows, assume_unique=True)]
+            if len(candidates) >= k or nprobe >= self._ivf.nlist:
+                return candidates
+            nprobe *= 2
+
+    def search_by_vector(
+        self,
+        vector: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        nprobe: Optional[int] = None,
+        exact: bool = False,
+    ) -> List[Tuple[int, float]]:
+        """
+        Return [(row, cosine score)] for the k best rows, best first.
+        Approximate when an IVF index exists (see class docstring) unless `exact`.
+        """
+        n = len(self.ids)
+        if n == 0 or k <= 0:
+            return []
+        query = _normalize(np.asarray(vector, dtype=np.float32))
+
+        rows = None
+        if filter:
+            rows = self._filter_rows(filter)
+            if not len(rows):
+                return []
+        if not exact and self._ivf is not None and (rows is None or len(rows) >= IVF_MIN_ROWS):
+            rows = self._probe(query, k, rows, nprobe or IVF_NPROBE)
+
+        if rows is None:
+            scores = self._matrix[:n] @ query
+        else:
+            scores = self._matrix[rows] @ query
+        k = min(k, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        if rows is not None:
+            return [(int(rows[i]), float(scores[i])) for i in top]
+        return [(int(i), float(scores[i])) for i in top]
+
+    def _document(self, row: int) -> Document:
+        meta = {key: col[row] for key, col in self.columns.items() if col[row] is not None}
+        return Document(page_content=self.texts[row], metadata=meta, id=self.ids[row])
+
+    def get_by_ids(self, ids: List[str], /) -> List[Document]:
+        """Documents for the ids that exist, in the order requested."""
+        with self._lock:
+            self._refresh_if_stale()
+            return [self._document(self._row_of[vid]) for vid in ids if vid in self._row_of]
+
+    def similarity_search_by_vector_with_score(
+        self, embedding: List[float], k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        with self._lock:
+            self._refresh_if_stale()
+            return [(self._document(row), score)
+                    for row, score in self.search_by_vector(embedding, k, filter)]
+
+    def similarity_search_by_vector(
+        self, embedding: List[float], k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k, filter)]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        vector = self._embedding.embed_query(query)
+        return self.similarity_search_by_vector_with_score(vector, k, filter)
+
+    def similarity_search(
+        self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def _select_relevance_score_fn(self):
+        return self._cosine_relevance_score_fn
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        index_dir: str = "data/index",
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> "LocalVectorStore":
+        store = cls(index_dir, embedding, **kwargs)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
@@ -0,0 +1,102 @@
+# src/data/manifest.py
+# Ingestion manifest: records which papers are in the vector store, the hash of
+# the PDF they came from and the chunking parameters used, so rebuilds only
+# touch new or changed papers.
+
+import os
+import json
+import hashlib
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+def file_sha256(path: str, block_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def doc_key(metadata: dict, content_hash: str = "") -> str:
+    """Stable document key: the arXiv id, or a content hash when there is none."""
+    arxiv_id = (metadata or {}).get("arxiv_id", "")
+    if arxiv_id and arxiv_id != "N/A":
+        return arxiv_id
+    return f"sha256-{content_hash[:16]}"
+
+
+def chunk_ids(key: str, n_chunks: int, start: int = 0) -> List[str]:
+    """Deterministic vector ids: '<doc key>:<chunk index>'."""
+    return [f"{key}:{i}" for i in range(start, n_chunks)]
+
+
+class IngestionManifest:
+    """
+    JSON-backed map of doc key → {content_hash, params, n_chunks, title, indexed_at}.
+    Thread-safe; every record is flushed with an atomic rename.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries: Dict[str, dict] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f).get("papers", {})
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Ignoring unreadable manifest {path}: {e}")
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            return self.entries.get(key)
+
+    def is_current(self, key: str, params: dict, content_hash: Optional[str] = None) -> bool:
+        """
+        True when `key` was indexed with the same chunk params
+        (and, if given, from the same PDF bytes).
+        """
+        entry = self.get(key)
+        if not entry or entry.get("params") != params:
+            return False
+        return content_hash is None or entry.get("content_hash") == content_hash
+
+    def record(self, key: str, content_hash: str, params: dict, n_chunks: int, metadata: dict):
+        with self._lock:
+            self.entries[key] = {
+                "content_hash": content_hash,
+                "params": params,
+                "n_chunks": n_chunks,
+                "title": metadata.get("title", "Unknown"),
+                "metadata": metadata,
+                "indexed_at": time.time(),
+            }
+            self._save()
+
+    def fingerprint(self) -> str:
+        """Hash of the indexed corpus; changes whenever a paper is (re)indexed."""
+        with self._lock:
+            state = sorted((k, v["content_hash"], v["n_chunks"]) for k, v in self.entries.items())
+        return hashlib.sha256(json.dumps(state).encode("utf-8")).hexdigest()[:16]
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"papers": self.entries}, f, indent=1, default=str)
+        os.replace(tmp, self.path)
+
+
+_default_manifest: Optional[IngestionManifest] = None
+_default_manifest_lock = threading.Lock()
+
+
+def get_manifest(path: str) -> IngestionManifest:
+    """Process-wide manifest instance."""
+    global _default_manifest
+    with _default_manifest_lock:
+        if _default_manifest is None or _default_manifest.path != path:
+            _default_manifest = IngestionManifest(path)
+        return _default_manifest
@@ -0,0 +1,108 @@
+# src/data/paper_catalog.py
+# Local catalog of indexed papers keyed by doc key (the arXiv id, see
+# src.data.manifest.doc_key). Title, authors, abstract and links are stored
+# once per paper here instead of in every chunk's vector metadata; the rag
+# tools join them back onto their hits.
+
+import os
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from src.config import PAPER_CATALOG_PATH
+from src.data.lexical_index import doc_key_of
+
+# paper fields that are only useful on disk, never in tool results
+LOCAL_FIELDS = ("local_pdf_path", "downloaded")
+
+
+class PaperCatalog:
+    """SQLite-backed map of doc key → paper metadata. Safe to share between threads."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS papers ("
+            " key TEXT PRIMARY KEY,"
+            " title TEXT NOT NULL,"
+            " metadata TEXT NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def put(self, key: str, metadata: dict):
+        self.put_many({key: metadata})
+
+    def put_many(self, papers: Dict[str, dict]):
+        """Insert or replace papers ({doc key: paper metadata})."""
+        if not papers:
+            return
+        now = time.time()
+        rows = []
+        for key, metadata in papers.items():
+            paper = {k: v for k, v in (metadata or {}).items() if k not in LOCAL_FIELDS}
+            rows.append((key, paper.get("title", "Unknown"), json.dumps(paper, default=str), now))
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO papers (key, title, metadata, updated_at) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, dict]:
+        """Metadata of the given papers; unknown keys are left out."""
+        unique = list(dict.fromkeys(keys))
+        found: Dict[str, dict] = {}
+        with self._lock:
+            # SQLite caps bound parameters; query in slices
+            for i in range(0, len(unique), 500):
+                part = unique[i:i + 500]
+                marks = ",".join("?" * len(part))
+                for key, metadata in self._conn.execute(
+                    f"SELECT key, metadata FROM papers WHERE key IN ({marks})", part
+                ):
+                    found[key] = json.loads(metadata)
+        return found
+
+    def get(self, key: str) -> Optional[dict]:
+        return self.get_many([key]).get(key)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+
+
+def paper_key(vector_id: str, metadata: dict) -> str:
+    """Catalog key of a chunk: its compact arxiv_id field, else the vector id prefix."""
+    return metadata.get("arxiv_id") or doc_key_of(vector_id)
+
+
+def join_papers(hits) -> List[dict]:
+    """
+    Full metadata for each hit (anything with .id and .metadata): the catalog
+    entry of its paper overlaid on the chunk's own fields. Chunks indexed
+    before the catalog existed still carry everything and pass through as-is.
+    """
+    keys = [paper_key(h.id, h.metadata) for h in hits]
+    papers = get_paper_catalog().get_many(keys)
+    return [{**h.metadata, **papers.get(key, {})} for h, key in zip(hits, keys)]
+
+
+_default_catalog: Optional[PaperCatalog] = None
+_default_catalog_lock = threading.Lock()
+
+
+def get_paper_catalog() -> PaperCatalog:
+    """Process-wide catalog (one SQLite connection per process)."""
+    global _default_catalog
+    with _default_catalog_lock:
+        if _default_catalog is None:
+            _default_catalog = PaperCatalog(PAPER_CATALOG_PATH)
+        return _default_catalog
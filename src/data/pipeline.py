@@ -0,0 +1,160 @@
+# src/data/pipeline.py
+# Small producer/consumer pipeline engine: stages run in their own worker
+# threads and are connected by bounded queues, so downstream work starts as
+# soon as the first item is ready and a slow stage throttles its producers.
+
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+_DONE = object()
+
+
+class Stage:
+    """
+    One pipeline stage. `fn(item)` returns a list of zero or more outputs
+    that are pushed to the next stage's queue.
+
+    Per-stage counters:
+      busy_s      time spent inside fn
+      starved_s   time workers waited for input (upstream is slower)
+      blocked_s   time workers waited to hand off output (downstream is slower)
+      max_queue   deepest the input queue got
+    """
+
+    def __init__(self, name: str, fn: Callable[[Any], List[Any]], workers: int = 1, queue_size: int = 8):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.inbox: "queue.Queue[Any]" = queue.Queue(maxsize=queue_size)
+        self.outbox: Optional["queue.Queue[Any]"] = None
+        self.stats = {
+            "items_in": 0, "items_out": 0, "errors": 0,
+            "busy_s": 0.0, "starved_s": 0.0, "blocked_s": 0.0, "max_queue": 0,
+        }
+        self._lock = threading.Lock()
+        self._alive = 0
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        self._alive = self.workers
+        for i in range(self.workers):
+            t = threading.Thread(target=self._work, name=f"{self.name}-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def _work(self):
+        while True:
+            t0 = time.perf_counter()
+            item = self.inbox.get()
+            waited = time.perf_counter() - t0
+
+            if item is _DONE:
+                # let sibling workers see the sentinel too
+                self.inbox.put(_DONE)
+                break
+
+            depth = self.inbox.qsize() + 1
+            t1 = time.perf_counter()
+            try:
+                outputs = self.fn(item) or []
+                failed = False
+            except Exception as e:
+                print(f"⚠️ Pipeline stage '{self.name}' failed: {e}")
+                outputs, failed = [], True
+            busy = time.perf_counter() - t1
+
+            blocked = 0.0
+            for out in outputs:
+                t2 = time.perf_counter()
+                self.outbox.put(out)
+                blocked += time.perf_counter() - t2
+
+            with self._lock:
+                s = self.stats
+                s["items_in"] += 1
+                s["items_out"] += len(outputs)
+                s["errors"] += int(failed)
+                s["busy_s"] += busy
+                s["starved_s"] += waited
+                s["blocked_s"] += blocked
+                s["max_queue"] = max(s["max_queue"], depth)
+
+        with self._lock:
+            self._alive -= 1
+            last = self._alive == 0
+        if last:
+            self.outbox.put(_DONE)
+
+    def join(self):
+        for t in self._threads:
+            t.join()
+
+
+class Pipeline:
+    """
+    Chain of stages. `run(source)` feeds items from any iterable (a list or a
+    generator) and yields the outputs of the last stage as they arrive.
+    """
+
+    def __init__(self, stages: List[Stage], sink_queue_size: int = 64):
+        if not stages:
+            raise ValueError("Pipeline needs at least one stage.")
+        self.stages = stages
+        self.sink: "queue.Queue[Any]" = queue.Queue(maxsize=sink_queue_size)
+        for upstream, downstream in zip(stages, stages[1:]):
+            upstream.outbox = downstream.inbox
+        stages[-1].outbox = self.sink
+        self.elapsed_s = 0.0
+        self.fed = 0
+
+    def _feed(self, source: Iterable[Any]):
+        head = self.stages[0].inbox
+        try:
+            for item in source:
+                head.put(item)
+                self.fed += 1
+        except Exception as e:
+            print(f"⚠️ Pipeline source failed: {e}")
+        finally:
+            head.put(_DONE)
+
+    def run(self, source: Iterable[Any]):
+        start = time.perf_counter()
+        for stage in self.stages:
+            stage.start()
+        feeder = threading.Thread(target=self._feed, args=(source,), name="pipeline-feed", daemon=True)
+        feeder.start()
+
+        finished = False
+        try:
+            while True:
+                item = self.sink.get()
+                if item is _DONE:
+                    finished = True
+                    break
+                yield item
+        finally:
+            # consumer stopped early: drain so no worker stays blocked on a full queue
+            while not finished:
+                finished = self.sink.get() is _DONE
+            feeder.join()
+            for stage in self.stages:
+                stage.join()
+            self.elapsed_s = time.perf_counter() - start
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """
+        Per-stage counters plus `backpressure`: the share of a stage's worker
+        time spent blocked on a full downstream queue.
+        """
+        out = {}
+        for stage in self.stages:
+            s = dict(stage.stats)
+            worker_time = self.elapsed_s * stage.workers
+            s["workers"] = stage.workers
+            s["backpressure"] = (s["blocked_s"] / worker_time) if worker_time else 0.0
+            s["utilization"] = (s["busy_s"] / worker_time) if worker_time else 0.0
+            out[stage.name] = s
+        return out
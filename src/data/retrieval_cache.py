@@ -0,0 +1,149 @@
+# src/data/retrieval_cache.py
+# In-process caches for the rag_search tools:
+#   - query text → query embedding (skips the OpenAI embedding call)
+#   - (tool, query, filter, top_k) → normalized results (skips the vector store)
+# Result entries are tagged with the index version; ingestion bumps the version
+# after every write, which makes every older entry a miss.
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+from src.tokens import count_tokens
+from src.tracing import span
+
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "512"))
+
+
+class LRUCache:
+    """Thread-safe bounded mapping with least-recently-used eviction."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
+
+
+query_embedding_cache = LRUCache(QUERY_EMBEDDING_CACHE_SIZE)
+result_cache = LRUCache(RETRIEVAL_CACHE_SIZE)
+
+_index_version = 0
+_version_lock = threading.Lock()
+
+
+def index_version() -> int:
+    return _index_version
+
+
+def bump_index_version() -> int:
+    """Called after every vector-store write; invalidates all cached results."""
+    global _index_version
+    with _version_lock:
+        _index_version += 1
+        return _index_version
+
+
+def _normalize_query(query: str) -> str:
+    return " ".join(query.split())
+
+
+def _embedding_key(embedding, query: str):
+    model = getattr(embedding, "model", type(embedding).__name__)
+    return model, (model, _normalize_query(query))
+
+
+def embed_query_cached(embedding, query: str) -> List[float]:
+    """Embed a query once per process; repeats are served from the LRU."""
+    model, key = _embedding_key(embedding, query)
+    with span("embedding:query", kind="embedding", model=model) as s:
+        vector = query_embedding_cache.get(key)
+        s.set(cached=vector is not None)
+        if vector is None:
+            if s.recording:
+                s.set(input_tokens=count_tokens(query, model), input_bytes=len(query.encode("utf-8")))
+            vector = embedding.embed_query(query)
+            query_embedding_cache.put(key, vector)
+    return vector
+
+
+async def aembed_query_cached(embedding, query: str) -> List[float]:
+    """embed_query_cached via the embedding's async client (aembed_query)."""
+    model, key = _embedding_key(embedding, query)
+    with span("embedding:query", kind="embedding", model=model) as s:
+        vector = query_embedding_cache.get(key)
+        s.set(cached=vector is not None)
+        if vector is None:
+            if s.recording:
+                s.set(input_tokens=count_tokens(query, model), input_bytes=len(query.encode("utf-8")))
+            vector = await embedding.aembed_query(query)
+            query_embedding_cache.put(key, vector)
+    return vector
+
+
+def cached_results(tool: str, query: str, filter: Optional[dict], top_k: int,
+                   search: Callable[[], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Return normalized results for (tool, query, filter, top_k) at the current
+    index version, calling `search` only on a miss. Exceptions from `search`
+    propagate and are not cached.
+    """
+    key = _result_key(tool, query, filter, top_k)
+    results = result_cache.get(key)
+    if results is None:
+        results = search()
+        result_cache.put(key, [dict(r) for r in results])
+        return results
+    return [dict(r) for r in results]
+
+
+async def acached_results(tool: str, query: str, filter: Optional[dict], top_k: int,
+                          search: Callable[[], Awaitable[List[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+    """cached_results with an async `search`."""
+    key = _result_key(tool, query, filter, top_k)
+    results = result_cache.get(key)
+    if results is None:
+        results = await search()
+        result_cache.put(key, [dict(r) for r in results])
+        return results
+    return [dict(r) for r in results]
+
+
+def _result_key(tool: str, query: str, filter: Optional[dict], top_k: int):
+    filter_key = tuple(sorted((filter or {}).items()))
+    return tool, _normalize_query(query), filter_key, top_k, index_version()
@@ -0,0 +1,288 @@
+# src/data/retrieval_client.py
+# One process-wide handle on the configured vector store (Pinecone or the
+# local memory-mapped backend), shared by the ingestion pipeline, the rag
+# tools, batch scripts and tests. No Streamlit dependency: the handle lives
+# in this module, so every page, session and thread reuses it.
+#
+# The Pinecone index talks to its data plane over one keep-alive urllib3 pool
+# of VECTOR_POOL_SIZE connections. The connections that pool opens are counted
+# per host, so reuse is measurable: a warm process should stop opening new ones.
+#
+# Chunk texts live in the local chunk store (src.data.chunk_store), not in
+# the vector store: query() returns ids, scores and compact metadata, and
+# hydrate() / fetch() read the text of just the chunks a caller keeps.
+
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import urllib3
+import urllib3.connection
+import urllib3.connectionpool
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from src.config import (
+    VECTOR_BACKEND, VECTOR_POOL_SIZE, INDEX_NAME, LOCAL_INDEX_DIR, EMBEDDING_DIMENSION,
+    get_embeddings, get_pinecone,
+)
+from src.data.chunk_store import ChunkStore, get_chunk_store
+from src.data.local_vectorstore import LocalVectorStore
+from src.tracing import payload_bytes
+
+# vectors per Pinecone upsert request (a request must stay under 2 MB)
+PINECONE_UPSERT_BATCH = 100
+
+
+# ---------------- Connection Accounting ----------------
+class ConnectionCounter:
+    """New TCP connections per host, opened by the pools of one client's PoolManager."""
+
+    def __init__(self):
+        self._opened: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def opened(self, host: str):
+        with self._lock:
+            self._opened[host] = self._opened.get(host, 0) + 1
+
+    def count(self, host: Optional[str] = None) -> int:
+        with self._lock:
+            return self._opened.get(host, 0) if host else sum(self._opened.values())
+
+    def pool_classes(self) -> Dict[str, type]:
+        """Connection pool classes (urllib3's ConnectionCls extension point) reporting to this counter."""
+        counter = self
+
+        class HTTPConnection(urllib3.connection.HTTPConnection):
+            def connect(self):
+                super().connect()
+                counter.opened(self.host)
+
+        class HTTPSConnection(urllib3.connection.HTTPSConnection):
+            def connect(self):
+                super().connect()
+                counter.opened(self.host)
+
+        class HTTPConnectionPool(urllib3.connectionpool.HTTPConnectionPool):
+            ConnectionCls = HTTPConnection
+
+        class HTTPSConnectionPool(urllib3.connectionpool.HTTPSConnectionPool):
+            ConnectionCls = HTTPSConnection
+
+        return {"http": HTTPConnectionPool, "https": HTTPSConnectionPool}
+
+    def install(self, pool_manager: urllib3.PoolManager):
+        """Count the connections of `pool_manager`'s pools (install before its first request)."""
+        pool_manager.pool_classes_by_scheme = self.pool_classes()
+
+
+def _pool_manager(index) -> Optional[urllib3.PoolManager]:
+    """The urllib3 PoolManager of a Pinecone Index's data-plane client, if it can be found."""
+    api_client = getattr(getattr(index, "_vector_api", None), "api_client", None)
+    pool_manager = getattr(getattr(api_client, "rest_client", None), "pool_manager", None)
+    return pool_manager if isinstance(pool_manager, urllib3.PoolManager) else None
+
+
+# ---------------- Client ----------------
+class Match(NamedTuple):
+    id: str
+    score: float
+    text: str
+    metadata: Dict[str, Any]
+
+
+class RetrievalClient:
+    """
+    Thread-safe vector-store handle. The backend is opened on first use.
+
+    `store` is the LangChain VectorStore (for code that wants the standard
+    interface; its documents only have text for chunks indexed before the
+    chunk store existed); `query`, `upsert` and `delete` go straight to the
+    backend with pre-computed vectors, skipping LangChain's per-call overhead.
+    """
+
+    # metadata field that held the chunk text before the chunk store (LangChain Pinecone convention)
+    TEXT_KEY = "text"
+
+    def __init__(self, embedding: Optional[Embeddings] = None, backend: str = VECTOR_BACKEND,
+                 pool_size: int = VECTOR_POOL_SIZE):
+        self.backend = backend
+        self.pool_size = max(1, pool_size)
+        self._embedding = embedding
+        self._lock = threading.Lock()
+        self._store: Optional[VectorStore] = None
+        self._index = None
+        self.host: Optional[str] = None
+        self.connections = ConnectionCounter()
+        # counters are bumped from the upsert and tool threads
+        self._counters_lock = threading.Lock()
+        self.queries = 0
+        self.upserts = 0
+        self.upserted_chunks = 0
+        self.metadata_bytes = 0  # serialized chunk metadata sent by upsert (excluding the text)
+
+    def _open(self):
+        with self._lock:
+            if self._store is not None:
+                return
+            embedding = self._embedding or get_embeddings()
+            if self.backend == "local":
+                print(f"✅ Using local vector store at '{LOCAL_INDEX_DIR}'.")
+                self._store = LocalVectorStore(LOCAL_INDEX_DIR, embedding, dimension=EMBEDDING_DIMENSION)
+                return
+
+            from langchain_community.vectorstores import Pinecone as PineconeVectorStore
+
+            pc = get_pinecone()
+            # size the keep-alive pool of the data-plane client (one urllib3 PoolManager per Index)
+            pc.openapi_config.connection_pool_maxsize = self.pool_size
+            self._index = pc.Index(INDEX_NAME, pool_threads=self.pool_size)
+            pool_manager = _pool_manager(self._index)
+            if pool_manager is not None:
+                self.connections.install(pool_manager)
+            else:
+                print("⚠️ Pinecone client without a urllib3 PoolManager: connections are not counted")
+            index_host = getattr(getattr(self._index, "_config", None), "host", "") or ""
+            self.host = urllib3.util.parse_url(index_host).host
+            self._store = PineconeVectorStore(self._index, embedding, self.TEXT_KEY)
+
+    @property
+    def store(self) -> VectorStore:
+        if self._store is None:
+            self._open()
+        return self._store
+
+    @property
+    def chunks(self) -> ChunkStore:
+        return get_chunk_store()
+
+    @property
+    def index(self):
+        """Raw Pinecone Index (None for the local backend)."""
+        self.store
+        return self._index
+
+    # ---------------- Raw API ----------------
+    def query(self, vector: List[float], top_k: int = 5, filter: Optional[dict] = None) -> List[Match]:
+        """Top-k matches for a query vector, best first; text is "" until hydrated."""
+        store = self.store
+        with self._counters_lock:
+            self.queries += 1
+        if self._index is None:
+            return [
+                Match(doc.id, score, doc.page_content, doc.metadata)
+                for doc, score in store.similarity_search_by_vector_with_score(vector, k=top_k, filter=filter)
+            ]
+
+        response = self._index.query(vector=vector, top_k=top_k, filter=filter, include_metadata=True)
+        matches = []
+        for m in response.matches:
+            metadata = dict(m.metadata or {})
+            text = metadata.pop(self.TEXT_KEY, "")
+            matches.append(Match(m.id, float(m.score), text, metadata))
+        return matches
+
+    def hydrate(self, matches: List[Match]) -> List[Match]:
+        """Fill in the text of matches that have none from the chunk store."""
+        stored = self.chunks.get_many([m.id for m in matches if not m.text])
+        return [m._replace(text=stored[m.id][0]) if m.id in stored else m for m in matches]
+
+    def fetch(self, ids: List[str]) -> List[Match]:
+        """
+        Stored chunks by id (score 0.0), in the order requested; unknown ids are
+        skipped. Served from the chunk store; only chunks indexed before it
+        existed are read from the vector store.
+        """
+        if not ids:
+            return []
+        found = {vid: Match(vid, 0.0, text, metadata) for vid, (text, metadata) in self.chunks.get_many(ids).items()}
+        missing = [vid for vid in ids if vid not in found]
+        if missing:
+            found.update((m.id, m) for m in self._fetch_backend(missing))
+        return [found[vid] for vid in ids if vid in found]
+
+    def _fetch_backend(self, ids: List[str]) -> List[Match]:
+        store = self.store
+        if self._index is None:
+            return [Match(doc.id, 0.0, doc.page_content, doc.metadata) for doc in store.get_by_ids(ids)]
+
+        vectors = self._index.fetch(ids=ids).vectors
+        matches = []
+        for vid in ids:
+            if vid in vectors:
+                metadata = dict(vectors[vid].metadata or {})
+                matches.append(Match(vid, 0.0, metadata.pop(self.TEXT_KEY, ""), metadata))
+        return matches
+
+    def upsert(self, ids: List[str], vectors: List[List[float]], texts: List[str], metadatas: List[dict]):
+        """
+        Write pre-computed vectors; existing ids are overwritten. Texts (and a
+        copy of the metadata) go to the chunk store, vectors carry only the metadata.
+        """
+        store = self.store
+        metadata_bytes = payload_bytes(metadatas)
+        with self._counters_lock:
+            self.upserts += 1
+            self.upserted_chunks += len(ids)
+            self.metadata_bytes += metadata_bytes
+        # text first: a vector must never be searchable before its text can be hydrated
+        self.chunks.put(ids, texts, metadatas)
+        if self._index is None:
+            store.add_embeddings([""] * len(ids), vectors, metadatas, ids=ids)
+            return
+
+        # Pinecone rejects null metadata values
+        self._index.upsert(vectors=[
+            {"id": vid, "values": vector, "metadata": {k: v for k, v in meta.items() if v is not None}}
+            for vid, vector, meta in zip(ids, vectors, metadatas)
+        ], batch_size=PINECONE_UPSERT_BATCH, show_progress=False)
+
+    def delete(self, ids: List[str]):
+        store = self.store
+        if self._index is None:
+            store.delete(ids=ids)
+        else:
+            self._index.delete(ids=ids)
+        self.chunks.delete(ids)
+
+    def flush(self):
+        """
+        Persist the chunk store index and, with the local backend, the store's
+        metadata and ANN index; call at the end of a build.
+        """
+        try:
+            self.chunks.flush()
+        finally:
+            if self._index is None:
+                self.store.flush()
+                if self.store.optimize():
+                    print(f"🧭 Trained the IVF index: {self.store.ann_stats()}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._counters_lock:
+            queries, upserts, upserted_chunks, metadata_bytes = \
+                self.queries, self.upserts, self.upserted_chunks, self.metadata_bytes
+        return {
+            "backend": self.backend,
+            "pool_size": self.pool_size,
+            "host": self.host,
+            "queries": queries,
+            "upserts": upserts,
+            "stored_chunks": len(self.chunks),
+            "ann": self.store.ann_stats() if self._index is None and self._store is not None else None,
+            "metadata_bytes_per_chunk": metadata_bytes / upserted_chunks if upserted_chunks else 0.0,
+            "connections_opened": self.connections.count(self.host) if self.host else 0,
+        }
+
+
+_client: Optional[RetrievalClient] = None
+_client_lock = threading.Lock()
+
+
+def get_retrieval_client() -> RetrievalClient:
+    """The process-wide client (Streamlit pages, ingestion, scripts and tests alike)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = RetrievalClient()
+        return _client
@@ -0,0 +1,209 @@
+# src/decision/batch.py
+# Headless batch mode: runs questions from a JSONL file through the compiled
+# graph on a bounded worker pool and streams one JSON line per question
+# (report, steps, timings) to the output file as soon as it completes.
+# An interrupted run resumes where it stopped: ids already in the output are skipped.
+# The output holds one line per id: a retried id's old line is removed first.
+#
+#   python -m src.decision.batch questions.jsonl -o results.jsonl [--workers 4]
+#
+# Input lines are {"id": ..., "question": ...} ("input" or "query" also work);
+# lines without an id are keyed by their line number.
+
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Iterator, List, Optional, Set
+
+import numpy as np
+
+from src.tracing import trace
+from src.tools.final_answer import format_final_answer
+
+QUESTION_FIELDS = ("question", "input", "query")
+
+
+def load_questions(path: str) -> Iterator[Dict]:
+    """Yield {"id", "question"} from a JSONL file, skipping blank and malformed lines."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError:
+                print(f"⚠️ Skipping malformed line {line_no} in {path}")
+                continue
+            question = next((item[k] for k in QUESTION_FIELDS if item.get(k)), None) if isinstance(item, dict) else None
+            if not question:
+                print(f"⚠️ Skipping line {line_no} in {path}: no question")
+                continue
+            yield {"id": str(item.get("id", line_no)), "question": question}
+
+
+def completed_ids(path: str, retry_failed: bool = False) -> Set[str]:
+    """
+    Ids already written to `path` (only successful ones when retry_failed).
+    Lines of ids that will run again, torn lines and duplicates are dropped
+    from the file (rewritten atomically), so each id keeps a single line.
+    """
+    if not os.path.exists(path):
+        return set()
+    records: Dict[str, str] = {}
+    dirty = False
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # torn last line of an interrupted run
+                dirty = True
+                continue
+            rid = str(record["id"])
+            dirty |= rid in records or not line.endswith("\n")
+            records.pop(rid, None)  # a later line (older runs appended retries) wins
+            if not retry_failed or record.get("status") == "ok":
+                records[rid] = line if line.endswith("\n") else line + "\n"
+            else:
+                dirty = True
+    if dirty:
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(records.values())
+        os.replace(tmp, path)
+    return set(records)
+
+
+def _final_answer(steps) -> Optional[Dict]:
+    action = next((s for s in reversed(steps) if s.tool == "final_answer"), None)
+    if action is None:
+        return None
+    try:
+        return json.loads(action.log)
+    except ValueError:
+        return None
+
+
+def run_question(item: Dict, runnable=None) -> Dict:
+    """Run one question through the graph; never raises, failures become status="error"."""
+    if runnable is None:
+        from src.decision.graph import runnable
+
+    record = {"id": item["id"], "question": item["question"], "status": "ok"}
+    start = time.perf_counter()
+    with trace("batch", question_id=item["id"], query=item["question"]) as question_trace:
+        try:
+            output = runnable.invoke({
+                "input": item["question"],
+                "messages": [],
+                "intermediate_steps": [],
+                "tool_usage": {}
+            })
+            steps = output.get("intermediate_steps", [])
+            answer = _final_answer(steps)
+            if answer is None:
+                record["status"] = "no_answer"
+            record.update(
+                report=format_final_answer(answer) if answer else None,
+                answer=answer,
+                steps=[{"tool": s.tool, "tool_input": s.tool_input, "log": s.log} for s in steps],
+            )
+        except Exception as e:
+            record.update(status="error", error=f"{type(e).__name__}: {e}")
+
+    # per span kind (llm, tool, http, vector, ...): span count, total ms and tokens
+    record["timings"] = {"elapsed_s": time.perf_counter() - start, "by_kind": question_trace.summary()["by_kind"]}
+    return record
+
+
+def run_batch(questions_path: str, output_path: str, workers: int = 4, retry_failed: bool = False,
+              limit: Optional[int] = None, runnable=None) -> Dict:
+    """
+    Run every question not yet in `output_path` with `workers` graphs in flight.
+    Results are appended in completion order and flushed line by line.
+    """
+    import src.decision.graph as graph
+
+    done = completed_ids(output_path, retry_failed)
+    todo = [item for item in load_questions(questions_path) if item["id"] not in done]
+    if limit is not None:
+        todo = todo[:limit]
+    print(f"📋 {len(todo)} question(s) to run, {len(done)} already done, {workers} worker(s)")
+    if not todo:
+        return {"questions": 0}
+
+    runnable = runnable or graph.runnable
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    start = time.perf_counter()
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch")
+    try:
+        # completed_ids left only whole lines, so appending starts on a fresh one
+        with open(output_path, "a", encoding="utf-8") as out:
+            def _write(future):
+                record = future.result()
+                out.write(json.dumps(record, default=str) + "\n")
+                out.flush()
+                latencies.append(record["timings"]["elapsed_s"])
+                statuses[record["status"]] = statuses.get(record["status"], 0) + 1
+                icon = "✅" if record["status"] == "ok" else "❌"
+                print(f"{icon} [{len(latencies)}/{len(todo)}] {record['id']} "
+                      f"{record['status']} in {record['timings']['elapsed_s']:.1f}s")
+
+            # keep a bounded window in flight so huge inputs are never all queued at once
+            in_flight = set()
+            for item in todo:
+                if len(in_flight) >= workers * 2:
+                    finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        _write(future)
+                in_flight.add(pool.submit(run_question, item, runnable))
+            while in_flight:
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    _write(future)
+    except KeyboardInterrupt:
+        pool.shutdown(wait=False, cancel_futures=True)
+        print(f"\n⏸️ Interrupted after {len(latencies)} question(s); rerun the same command to resume.")
+        raise
+    pool.shutdown()
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        "questions": len(latencies),
+        "elapsed_s": elapsed,
+        "questions_per_s": len(latencies) / elapsed,
+        "p50_s": float(np.percentile(latencies, 50)),
+        "p95_s": float(np.percentile(latencies, 95)),
+        **statuses,
+    }
+    print(f"🏁 {summary['questions']} question(s) in {elapsed:.1f}s "
+          f"({summary['questions_per_s']:.2f}/s, p50 {summary['p50_s']:.1f}s, p95 {summary['p95_s']:.1f}s) {statuses}")
+    return summary
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Run research questions from JSONL through the agent graph.")
+    parser.add_argument("questions", help="JSONL file with one {\"id\", \"question\"} per line")
+    parser.add_argument("-o", "--output", default="data/batch/results.jsonl")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="graphs running concurrently")
+    parser.add_argument("--retry-failed", action="store_true", help="rerun ids whose previous result was not ok")
+    parser.add_argument("--limit", type=int, help="run at most this many pending questions")
+    args = parser.parse_args(argv)
+
+    try:
+        run_batch(args.questions, args.output, workers=max(1, args.workers),
+                  retry_failed=args.retry_failed, limit=args.limit)
+    except KeyboardInterrupt:
+        sys.exit(130)
+
+
+if __name__ == "__main__":
+    main()
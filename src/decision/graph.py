@@ -5,11 +5,16 @@ import sys, os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from langgraph.graph import StateGraph, END
+from langgraph.config import get_stream_writer
 from langchain_core.agents import AgentAction
 from langchain_core.messages import BaseMessage
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, TypedDict, Annotated, Dict
+import asyncio
+import inspect
 import operator
 import json
+import time
 
 
 # ---------------- Agent State ----------------
@@ -27,19 +32,34 @@ class AgentState(TypedDict):
     next_tool: str
     next_tool_args: Dict
 
+    # every tool call from the last oracle turn: {"name", "args", "usage"}
+    pending_tool_calls: List[Dict]
+
 
 # ---------------- Import oracle and tools ----------------
 from src.decision.oracle import oracle
-from src.tools.rag_search_filter import rag_search_filter
-from src.tools.rag_search import rag_search
-from src.tools.fetch_arxiv import fetch_arxiv
-from src.tools.web_search import web_search
+from src.decision.pre_router import pre_route, apre_route
+from src.tracing import span, submit_in_context, payload_bytes
+from src.tools.rag_search_filter import rag_search_filter, arag_search_filter
+from src.tools.rag_search import rag_search, arag_search
+from src.tools.fetch_arxiv import fetch_arxiv, afetch_arxiv
+from src.tools.web_search import web_search, aweb_search
 from src.tools.final_answer import final_answer
 
 
 # ---------------- Execution Guards ----------------
 MAX_STEPS = 6
 MAX_TOOL_USAGE = 1
+MAX_PARALLEL_TOOLS = 4
+
+# planned when the oracle returns no tool call at all
+FALLBACK_ANSWER_ARGS = {
+    "introduction": "The research agent stopped without composing a report.",
+    "research_steps": [],
+    "main_body": "No further tool call was planned for this question.",
+    "conclusion": "Try rephrasing the question.",
+    "sources": [],
+}
 
 
 # ---------------- Run Oracle ----------------
@@ -50,26 +70,97 @@ def run_oracle(state: dict) -> dict:
 
     This step performs PLANNING only.
     No intermediate_steps are created here.
+
+    The model may request several tools in one turn; all of them are kept
+    in pending_tool_calls (in order) so they can run concurrently.
     """
 
-    out = oracle.invoke(state)
+    with span("oracle", kind="llm", step=len(state.get("intermediate_steps", []))) as s:
+        out = oracle.invoke(state)
+        _record_oracle_usage(s, out)
+
+    return _plan_calls(state, out.tool_calls)
+
+
+async def arun_oracle(state: dict) -> dict:
+    """run_oracle for the async graph (awaits the async OpenAI client)."""
+    with span("oracle", kind="llm", step=len(state.get("intermediate_steps", []))) as s:
+        out = await oracle.ainvoke(state)
+        _record_oracle_usage(s, out)
 
-    tool_call = out.tool_calls[0]
-    tool_name = tool_call["name"]
-    tool_args = tool_call["args"]
+    return _plan_calls(state, out.tool_calls)
 
-    print(f"\n🧭 ORACLE → tool: {tool_name}")
 
+def _record_oracle_usage(s, out):
+    token_usage = getattr(out, "usage_metadata", None) or {}
+    s.set(
+        input_tokens=token_usage.get("input_tokens", 0),
+        output_tokens=token_usage.get("output_tokens", 0),
+        tool_calls=[c["name"] for c in out.tool_calls],
+        output_bytes=payload_bytes(out.tool_calls),
+    )
+
+
+def _plan_calls(state: dict, tool_calls: List[Dict], planner: str = "ORACLE") -> dict:
+    """
+    Turn the planned tool calls ({"name", "args"}) into the planning fields of the state.
+    Research calls run first: final_answer is next only when nothing else was planned
+    (the oracle is asked again after the research anyway).
+    """
+    if not tool_calls:
+        print(f"⚠️ {planner} planned no tool call")
+        tool_calls = [{"name": "final_answer", "args": FALLBACK_ANSWER_ARGS}]
     usage = state.get("tool_usage", {})
-    usage[tool_name] = usage.get(tool_name, 0) + 1
+    calls = []
+    for tool_call in tool_calls:
+        name = tool_call["name"]
+        usage[name] = usage.get(name, 0) + 1
+        # remember which use of the tool this is, for the usage guard
+        calls.append({"name": name, "args": tool_call["args"], "usage": usage[name]})
+
+    first = next((c for c in calls if c["name"] != "final_answer"), calls[0])
+    print(f"\n🧭 {planner} → tool(s): {', '.join(c['name'] for c in calls)}")
 
     return {
-        "next_tool": tool_name,
-        "next_tool_args": tool_args,
+        "next_tool": first["name"],
+        "next_tool_args": first["args"],
+        "pending_tool_calls": calls,
         "tool_usage": usage
     }
 
 
+# ---------------- Pre-Router ----------------
+def run_pre_router(state: dict) -> dict:
+    """
+    Entry node: dispatches obvious questions straight to a tool (see
+    src.decision.pre_router) and leaves everything else to the oracle.
+    """
+
+    with span("pre_router", kind="router") as s:
+        call = pre_route(state)
+        s.set(routed=call["name"] if call else None)
+        if call:
+            s.set(route=call["route"], score=call.get("score"))
+
+    return _plan_calls(state, [call], planner="PRE-ROUTER") if call else {}
+
+
+async def arun_pre_router(state: dict) -> dict:
+    """run_pre_router for the async graph."""
+    with span("pre_router", kind="router") as s:
+        call = await apre_route(state)
+        s.set(routed=call["name"] if call else None)
+        if call:
+            s.set(route=call["route"], score=call.get("score"))
+
+    return _plan_calls(state, [call], planner="PRE-ROUTER") if call else {}
+
+
+def after_pre_router(state: dict) -> str:
+    """Routed questions go to their tool; the rest to the oracle."""
+    return router(state) if state.get("pending_tool_calls") else "oracle"
+
+
 # ---------------- Router Logic ----------------
 def router(state: dict) -> str:
     """
@@ -78,6 +169,8 @@ def router(state: dict) -> str:
     Enforces:
     - global recursion guard
     - safe oracle routing
+
+    Several non-final tool calls in one oracle turn go to "parallel_tools".
     """
 
     steps = state.get("intermediate_steps", [])
@@ -92,6 +185,9 @@ def router(state: dict) -> str:
         print("⚠️ Missing oracle decision")
         return "final_answer"
 
+    if next_tool != "final_answer" and len(_research_calls(state)) > 1:
+        return "parallel_tools"
+
     return next_tool
 
 
@@ -104,13 +200,154 @@ tool_str_to_func = {
     "final_answer": final_answer
 }
 
+# async graph: I/O-bound tools await instead of holding a thread; final_answer is pure
+async_tool_str_to_func = {
+    "rag_search_filter": arag_search_filter,
+    "rag_search": arag_search,
+    "fetch_arxiv": afetch_arxiv,
+    "web_search": aweb_search,
+    "final_answer": final_answer
+}
 
-def run_tool(state: dict) -> dict:
+
+def _stream_writer():
     """
-    Executes the oracle-selected tool and records
-    the completed execution into intermediate_steps.
+    Writer for custom stream events (see src.decision.streaming).
+    Must be called on the node's own thread; a no-op outside runnable.stream.
     """
+    try:
+        return get_stream_writer()
+    except RuntimeError:
+        return lambda event: None
+
+
+def _research_calls(state: dict) -> List[Dict]:
+    """Pending calls minus final_answer (the oracle is asked again after research)."""
+    return [c for c in state.get("pending_tool_calls", []) if c["name"] != "final_answer"]
+
+
+def _budgeted_calls(state: dict) -> List[Dict]:
+    """Research calls that still fit MAX_STEPS; a fan-out never runs past the step limit."""
+    remaining = max(0, MAX_STEPS - len(state.get("intermediate_steps", [])))
+    calls = _research_calls(state)
+    if len(calls) > remaining:
+        print(f"⚠️ Running {remaining} of {len(calls)} tool calls (max execution steps)")
+    return calls[:remaining]
+
+
+def _tool_log(s, result) -> str:
+    log = json.dumps(result, default=str)
+    s.set(output_bytes=payload_bytes(log), success=result.get("success", True) if isinstance(result, dict) else True)
+    return log
 
+
+def _execute_call(call: Dict) -> AgentAction:
+    """Run one tool call, or record that its usage budget is spent."""
+    tool_name, tool_args = call["name"], call["args"]
+
+    with span(f"tool:{tool_name}", kind="tool", input_bytes=payload_bytes(tool_args)) as s:
+        if call["usage"] > MAX_TOOL_USAGE:
+            print(f"⚠️ Tool {tool_name} exceeded usage")
+            result = {"tool": tool_name, "success": False, "error": "Tool usage exceeded"}
+        else:
+            print(f"🔧 TOOL EXECUTION → {tool_name}")
+            result = tool_str_to_func[tool_name](**tool_args)
+        log = _tool_log(s, result)
+
+    return AgentAction(
+        tool=tool_name,
+        tool_input=tool_args,
+        log=log
+    )
+
+
+async def _acall_tool(tool_name: str, tool_args: Dict):
+    result = async_tool_str_to_func[tool_name](**tool_args)
+    return await result if inspect.isawaitable(result) else result
+
+
+async def _aexecute_call(call: Dict) -> AgentAction:
+    """_execute_call with the async tools."""
+    tool_name, tool_args = call["name"], call["args"]
+
+    with span(f"tool:{tool_name}", kind="tool", input_bytes=payload_bytes(tool_args)) as s:
+        if call["usage"] > MAX_TOOL_USAGE:
+            print(f"⚠️ Tool {tool_name} exceeded usage")
+            result = {"tool": tool_name, "success": False, "error": "Tool usage exceeded"}
+        else:
+            print(f"🔧 TOOL EXECUTION → {tool_name}")
+            result = await _acall_tool(tool_name, tool_args)
+        log = _tool_log(s, result)
+
+    return AgentAction(
+        tool=tool_name,
+        tool_input=tool_args,
+        log=log
+    )
+
+
+def run_tools_parallel(state: dict) -> dict:
+    """
+    Executes every research tool call from the last oracle turn concurrently
+    and records them into intermediate_steps in the order the oracle issued them.
+    A tool_finish event is streamed as soon as each call completes.
+    """
+
+    emit = _stream_writer()
+    calls = _budgeted_calls(state)
+    start = time.perf_counter()
+
+    actions = [None] * len(calls)
+    # a pool per fan-out: concurrent sessions (and batch workers) never queue behind each other
+    with ThreadPoolExecutor(max_workers=max(1, min(len(calls), MAX_PARALLEL_TOOLS)),
+                            thread_name_prefix="tool") as pool:
+        futures = {}
+        for i, call in enumerate(calls):
+            emit({"type": "tool_start", "tool": call["name"], "args": call["args"]})
+            # copy the context so the tool spans nest under this node's trace
+            futures[submit_in_context(pool, _execute_call, call)] = i
+
+        for future in as_completed(futures):
+            action = future.result()
+            actions[futures[future]] = action
+            emit({"type": "tool_finish", "tool": action.tool, "args": action.tool_input,
+                  "elapsed_s": time.perf_counter() - start, "output": action.log})
+
+    return {
+        "intermediate_steps": actions
+    }
+
+
+async def arun_tools_parallel(state: dict) -> dict:
+    """run_tools_parallel on the event loop: one task per call instead of a pool thread."""
+
+    emit = _stream_writer()
+    calls = _budgeted_calls(state)
+    start = time.perf_counter()
+
+    async def _indexed(i: int, call: Dict):
+        return i, await _aexecute_call(call)
+
+    pending = []
+    for i, call in enumerate(calls):
+        emit({"type": "tool_start", "tool": call["name"], "args": call["args"]})
+        # tasks copy the current context, so tool spans nest under this node
+        pending.append(asyncio.ensure_future(_indexed(i, call)))
+
+    actions = [None] * len(calls)
+    for next_done in asyncio.as_completed(pending):
+        i, action = await next_done
+        actions[i] = action
+        emit({"type": "tool_finish", "tool": action.tool, "args": action.tool_input,
+              "elapsed_s": time.perf_counter() - start, "output": action.log})
+
+    return {
+        "intermediate_steps": actions
+    }
+
+
+def _guard_tool(state: dict):
+    """The oracle-selected tool and args, or final_answer once its usage budget is spent."""
     tool_name = state["next_tool"]
     tool_args = state["next_tool_args"]
 
@@ -121,38 +358,97 @@ def run_tool(state: dict) -> dict:
         tool_name = "final_answer"
         tool_args = {"error": "Tool usage exceeded"}
 
+    return tool_name, tool_args
+
+
+def run_tool(state: dict) -> dict:
+    """
+    Executes the oracle-selected tool and records
+    the completed execution into intermediate_steps.
+    """
+
+    tool_name, tool_args = _guard_tool(state)
     tool_func = tool_str_to_func[tool_name]
 
     print(f"🔧 TOOL EXECUTION → {tool_name}")
 
-    result = tool_func(**tool_args)
+    emit = _stream_writer()
+    emit({"type": "tool_start", "tool": tool_name, "args": tool_args})
+    start = time.perf_counter()
+
+    with span(f"tool:{tool_name}", kind="tool", input_bytes=payload_bytes(tool_args)) as s:
+        log = _tool_log(s, tool_func(**tool_args))
+
+    emit({"type": "tool_finish", "tool": tool_name, "args": tool_args,
+          "elapsed_s": time.perf_counter() - start, "output": log})
 
     return {
         "intermediate_steps": [
             AgentAction(
                 tool=tool_name,
                 tool_input=tool_args,
-                log=json.dumps(result, default=str)
+                log=log
+            )
+        ]
+    }
+
+
+async def arun_tool(state: dict) -> dict:
+    """run_tool for the async graph."""
+
+    tool_name, tool_args = _guard_tool(state)
+
+    print(f"🔧 TOOL EXECUTION → {tool_name}")
+
+    emit = _stream_writer()
+    emit({"type": "tool_start", "tool": tool_name, "args": tool_args})
+    start = time.perf_counter()
+
+    with span(f"tool:{tool_name}", kind="tool", input_bytes=payload_bytes(tool_args)) as s:
+        log = _tool_log(s, await _acall_tool(tool_name, tool_args))
+
+    emit({"type": "tool_finish", "tool": tool_name, "args": tool_args,
+          "elapsed_s": time.perf_counter() - start, "output": log})
+
+    return {
+        "intermediate_steps": [
+            AgentAction(
+                tool=tool_name,
+                tool_input=tool_args,
+                log=log
             )
         ]
     }
 
 
 # ---------------- Build Graph ----------------
-graph = StateGraph(AgentState)
+def build_graph(pre_router_node, oracle_node, tool_node, parallel_node) -> StateGraph:
+    """Same topology for the sync and the async node implementations."""
+    graph = StateGraph(AgentState)
+
+    graph.add_node("pre_router", pre_router_node)
+    graph.add_node("oracle", oracle_node)
+
+    for tool in tool_str_to_func:
+        graph.add_node(tool, tool_node)
 
-graph.add_node("oracle", run_oracle)
+    graph.add_node("parallel_tools", parallel_node)
 
-for tool in tool_str_to_func:
-    graph.add_node(tool, run_tool)
+    graph.set_entry_point("pre_router")
 
-graph.set_entry_point("oracle")
+    graph.add_conditional_edges("pre_router", after_pre_router)
+    graph.add_conditional_edges("oracle", router)
 
-graph.add_conditional_edges("oracle", router)
+    for tool in ["rag_search_filter", "rag_search", "fetch_arxiv", "web_search", "parallel_tools"]:
+        graph.add_edge(tool, "oracle")
 
-for tool in ["rag_search_filter", "rag_search", "fetch_arxiv", "web_search"]:
-    graph.add_edge(tool, "oracle")
+    graph.add_edge("final_answer", END)
 
-graph.add_edge("final_answer", END)
+    return graph
 
+
+graph = build_graph(run_pre_router, run_oracle, run_tool, run_tools_parallel)
 runnable = graph.compile()
+
+# ainvoke / astream only: every node is a coroutine, so many sessions share one event loop
+async_runnable = build_graph(arun_pre_router, arun_oracle, arun_tool, arun_tools_parallel).compile()
@@ -6,9 +6,12 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 import os
 import json
-from langchain_openai import ChatOpenAI
+import functools
+import threading
+from typing import Optional, Tuple
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableLambda
 from dotenv import load_dotenv
 
 from src.tools.rag_search_filter import rag_search_filter
@@ -16,6 +19,8 @@ from src.tools.rag_search import rag_search
 from src.tools.fetch_arxiv import fetch_arxiv
 from src.tools.web_search import web_search
 from src.tools.final_answer import final_answer
+from src.tokens import count_tokens
+from src.config import get_llm
 
 load_dotenv()
 
@@ -33,6 +38,7 @@ system_prompt = (
 
     "Rules:\n"
     "- Do NOT use any tool more than twice.\n"
+    "- If the question needs several sources (e.g. knowledge base AND web), call those tools together in one turn; they run in parallel.\n"
     "- If sufficient information exists, call final_answer.\n"
     "- Avoid loops.\n"
     "- If unsure, call final_answer.\n"
@@ -40,26 +46,91 @@ system_prompt = (
 
 
 # ---------------- Scratchpad Formatting ----------------
-def create_scratchpad(intermediate_steps):
-    """
-    Convert tool call logs into clean readable JSON blocks.
-    """
-    lines = []
-
-    for action in intermediate_steps:
+# Whole oracle prompt (system + input + history + scratchpad) is kept under this many tokens.
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "12000"))
+# Older tool outputs are compacted to this many characters per text field / results per list.
+COMPACT_FIELD_CHARS = 300
+COMPACT_LIST_ITEMS = 3
+
+
+def _compact(value):
+    """Shorten long strings and lists so an old tool output keeps its shape but not its bulk."""
+    if isinstance(value, str):
+        return value if len(value) <= COMPACT_FIELD_CHARS else value[:COMPACT_FIELD_CHARS] + "…"
+    if isinstance(value, list):
+        items = [_compact(v) for v in value[:COMPACT_LIST_ITEMS]]
+        if len(value) > COMPACT_LIST_ITEMS:
+            items.append(f"… {len(value) - COMPACT_LIST_ITEMS} more")
+        return items
+    if isinstance(value, dict):
+        return {k: _compact(v) for k, v in value.items()}
+    return value
+
+
+# level 0 = full output, 1 = compacted output, 2 = output omitted
+@functools.lru_cache(maxsize=512)
+def _render_block(tool: str, tool_input: str, log: str, level: int) -> Tuple[str, int]:
+    """Render one step once per detail level; returns (text, token_count)."""
+    if level == 2:
+        tool_block = "(output omitted to fit the context budget)"
+    else:
         try:
-            tool_output = json.loads(action.log)
-            tool_block = json.dumps(tool_output, indent=2)
+            tool_output = json.loads(log)
+            if level == 0:
+                tool_block = json.dumps(tool_output, indent=2)
+            else:
+                tool_block = json.dumps(_compact(tool_output), separators=(",", ":"))
         except Exception:
-            tool_block = str(action.log)
+            tool_block = str(log) if level == 0 else str(log)[:COMPACT_FIELD_CHARS]
 
-        lines.append(
-            f"TOOL USED: {action.tool}\n"
-            f"INPUT: {json.dumps(action.tool_input, indent=2)}\n"
-            f"OUTPUT:\n{tool_block}"
-        )
+    text = (
+        f"TOOL USED: {tool}\n"
+        f"INPUT: {tool_input}\n"
+        f"OUTPUT:\n{tool_block}"
+    )
+    return text, count_tokens(text)
+
+
+def create_scratchpad(intermediate_steps, budget: Optional[int] = None):
+    """
+    Convert tool call logs into readable JSON blocks, within `budget` tokens.
 
-    return "\n\n---\n\n".join(lines)
+    Each step is rendered (and token-counted) once per detail level and cached,
+    so a turn only pays for steps it has not seen. When the total is over budget,
+    the oldest steps are compacted first, then reduced to a stub; the newest
+    step keeps full detail as long as possible.
+    """
+    separator = "\n\n---\n\n"
+    keys = [
+        (action.tool, json.dumps(action.tool_input, indent=2), str(action.log))
+        for action in intermediate_steps
+    ]
+    levels = [0] * len(keys)
+    blocks = [_render_block(*key, 0) for key in keys]
+
+    if budget is not None:
+        total = sum(tokens for _, tokens in blocks) + count_tokens(separator) * max(len(blocks) - 1, 0)
+        for level in (1, 2):
+            # oldest first; the latest step is only touched as a last resort
+            order = list(range(len(keys) - 1)) + [len(keys) - 1] if keys else []
+            for i in order:
+                if total <= budget:
+                    break
+                if levels[i] >= level:
+                    continue
+                new_block = _render_block(*keys[i], level)
+                total += new_block[1] - blocks[i][1]
+                blocks[i], levels[i] = new_block, level
+
+    return separator.join(text for text, _ in blocks)
+
+
+def _scratchpad_budget(state: dict) -> int:
+    """Tokens left for the scratchpad after the fixed parts of the prompt."""
+    fixed = count_tokens(system_prompt) + count_tokens(state["input"])
+    for message in state.get("messages", []):
+        fixed += count_tokens(str(message.content))
+    return max(PROMPT_TOKEN_BUDGET - fixed, 0)
     
 
 # ---------------- Oracle Pipeline ----------------
@@ -70,20 +141,45 @@ prompt = ChatPromptTemplate.from_messages([
     ("assistant", "Previous tool calls:\n{scratchpad}")
 ])
 
-llm = ChatOpenAI(
-    model="gpt-4o",
-    temperature=0,
-    openai_api_key=os.environ["OPENAI_API_KEY"]
-)
-
 tools = [rag_search_filter, rag_search, fetch_arxiv, web_search, final_answer]
 
-oracle = (
-    {
-        "input": lambda s: s["input"],
-        "messages": lambda s: s["messages"],
-        "scratchpad": lambda s: create_scratchpad(s["intermediate_steps"]),
+_tool_llm = None
+_tool_llm_lock = threading.Lock()
+
+
+def get_tool_llm():
+    """gpt-4o with the tools bound; built on the first oracle call, not at import."""
+    global _tool_llm
+    with _tool_llm_lock:
+        if _tool_llm is None:
+            _tool_llm = get_llm().bind_tools(tools, tool_choice="any")
+        return _tool_llm
+
+
+def _call_llm(prompt_value, config):
+    # passing config on keeps callbacks (and so LangGraph token streaming) attached
+    return get_tool_llm().invoke(prompt_value, config)
+
+
+async def _acall_llm(prompt_value, config):
+    # used by oracle.ainvoke / astream: awaits the async OpenAI client instead of a worker thread
+    return await get_tool_llm().ainvoke(prompt_value, config)
+
+
+def _prompt_inputs(s):
+    return {
+        "input": s["input"],
+        "messages": s["messages"],
+        "scratchpad": create_scratchpad(s["intermediate_steps"], budget=_scratchpad_budget(s)),
     }
+
+
+async def _aprompt_inputs(s):
+    # cheap and CPU-bound: run inline rather than in the default executor
+    return _prompt_inputs(s)
+
+oracle = (
+    RunnableLambda(_prompt_inputs, afunc=_aprompt_inputs, name="oracle_inputs")
     | prompt
-    | llm.bind_tools(tools, tool_choice="any")
+    | RunnableLambda(_call_llm, afunc=_acall_llm, name="oracle_llm")
 )
@@ -0,0 +1,158 @@
+# src/decision/pre_router.py
+# Local routing in front of the oracle. Questions whose first tool is obvious
+# are dispatched straight to it, saving one gpt-4o round trip:
+#   - an arXiv id of an indexed paper → rag_search_filter on that paper
+#   - close (cosine) to a route's example utterances → that route's tool
+# Anything else goes to the oracle as before. A routed call only replaces the
+# oracle's first planning turn; the oracle still sees the tool output and
+# decides what comes next.
+
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import re
+import asyncio
+import threading
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from src.config import MANIFEST_PATH, get_embeddings
+from src.data.manifest import get_manifest
+from src.data.retrieval_cache import embed_query_cached, aembed_query_cached
+
+PRE_ROUTER = os.getenv("PRE_ROUTER", "1") != "0"
+# a route is taken when its best utterance is at least this similar to the question...
+PRE_ROUTER_THRESHOLD = float(os.getenv("PRE_ROUTER_THRESHOLD", "0.75"))
+# ...and beats every other route's best utterance by this much
+PRE_ROUTER_MARGIN = float(os.getenv("PRE_ROUTER_MARGIN", "0.05"))
+
+# new-style (2402.03300, 2402.03300v2) and old-style (cs/9501101, hep-th/9901001v1) identifiers
+ARXIV_ID_RE = re.compile(
+    r"(?<![\w.])(?:arxiv:\s*)?(\d{4}\.\d{4,5}|[a-z][a-z\-]*(?:\.[A-Z]{2})?/\d{7})(v\d+)?(?![\w.])",
+    re.IGNORECASE,
+)
+
+
+class Route(NamedTuple):
+    tool: str
+    utterances: List[str]
+
+
+ROUTES = [
+    Route("web_search", [
+        "what is the latest news about",
+        "what happened this week in artificial intelligence",
+        "who is the current CEO of",
+        "which company released this model and when",
+        "what is the stock price of",
+        "what are today's headlines on",
+        "when is the next conference deadline for",
+    ]),
+    Route("rag_search", [
+        "what do the indexed papers say about",
+        "according to the papers in my knowledge base, how does",
+        "summarize what the research papers found about",
+        "how do the papers in the knowledge base compare",
+        "which of my papers discuss",
+        "what methods do the papers propose for",
+        "explain the approach described in the papers for",
+    ]),
+]
+
+
+def _base_id(arxiv_id: str) -> str:
+    return re.sub(r"v\d+$", "", arxiv_id).lower()
+
+
+def find_indexed_paper(query: str) -> Optional[str]:
+    """The indexed doc key of the first arXiv id mentioned in `query` (version optional)."""
+    mentioned = [_base_id(m.group(1)) for m in ARXIV_ID_RE.finditer(query)]
+    if not mentioned:
+        return None
+    indexed = {}
+    for key in get_manifest(MANIFEST_PATH).entries:
+        indexed.setdefault(_base_id(key), key)
+    return next((indexed[m] for m in mentioned if m in indexed), None)
+
+
+# ---------------- Embedding Routes ----------------
+_route_vectors: Optional[np.ndarray] = None
+_route_owner: Optional[np.ndarray] = None   # route index of every utterance row
+_route_lock = threading.Lock()
+
+
+def _unit_rows(vectors) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def _route_matrix():
+    """Utterance embeddings, computed once per process (through the on-disk embedding cache)."""
+    global _route_vectors, _route_owner
+    with _route_lock:
+        if _route_vectors is None:
+            # imported here: the PDF/chunking stack is not needed to import the graph
+            from src.data.embeddings import cached_embeddings
+            utterances = [u for r in ROUTES for u in r.utterances]
+            _route_vectors = _unit_rows(cached_embeddings.embed_documents(utterances))
+            _route_owner = np.asarray([i for i, r in enumerate(ROUTES) for _ in r.utterances])
+        return _route_vectors, _route_owner
+
+
+def _best_route(vector) -> Optional[Dict]:
+    vectors, owner = _route_matrix()
+    similarities = vectors @ _unit_rows(vector)
+    per_route = np.full(len(ROUTES), -1.0, dtype=np.float32)
+    np.maximum.at(per_route, owner, similarities)
+    order = np.argsort(-per_route)
+    best = float(per_route[order[0]])
+    runner_up = float(per_route[order[1]]) if len(order) > 1 else -1.0
+    if best < PRE_ROUTER_THRESHOLD or best - runner_up < PRE_ROUTER_MARGIN:
+        return None
+    return {"tool": ROUTES[order[0]].tool, "score": best}
+
+
+# ---------------- Entry Points ----------------
+def _rule_call(query: str) -> Optional[Dict]:
+    arxiv_id = find_indexed_paper(query)
+    if arxiv_id:
+        return {"name": "rag_search_filter", "args": {"query": query, "arxiv_id": arxiv_id}, "route": "arxiv_id"}
+    return None
+
+
+def _semantic_call(query: str, match: Optional[Dict]) -> Optional[Dict]:
+    if match is None:
+        return None
+    return {"name": match["tool"], "args": {"query": query}, "route": "semantic", "score": match["score"]}
+
+
+def _eligible(state: dict) -> bool:
+    # only the first planning turn of a standalone question: follow-ups lean on the chat history
+    return bool(state.get("input", "").strip()) and not state.get("intermediate_steps")
+
+
+def pre_route(state: dict) -> Optional[Dict]:
+    """A tool call {"name", "args", "route"[, "score"]} for obvious questions, else None."""
+    if not PRE_ROUTER or not _eligible(state):
+        return None
+    query = state["input"]
+    call = _rule_call(query)
+    if call or state.get("messages"):
+        return call
+    return _semantic_call(query, _best_route(embed_query_cached(get_embeddings(), query)))
+
+
+async def apre_route(state: dict) -> Optional[Dict]:
+    """pre_route with the async embedding client."""
+    if not PRE_ROUTER or not _eligible(state):
+        return None
+    query = state["input"]
+    call = _rule_call(query)
+    if call or state.get("messages"):
+        return call
+    vector = await aembed_query_cached(get_embeddings(), query)
+    if _route_vectors is None:
+        await asyncio.to_thread(_route_matrix)
+    return _semantic_call(query, _best_route(vector))
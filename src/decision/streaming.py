@@ -0,0 +1,128 @@
+# src/decision/streaming.py
+# Streams the decision graph as UI events instead of one blocking invoke:
+# oracle decisions, per-tool start/finish, and the final report while the
+# oracle is still generating it.
+
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import time
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.utils.json import parse_partial_json
+
+# minimum seconds between two answer_delta events (each one re-renders the report)
+ANSWER_DELTA_INTERVAL_S = 0.05
+
+
+def summarize_tool_output(log: str) -> str:
+    """One-line outcome of a tool call for progress displays."""
+    try:
+        output = json.loads(log)
+    except (TypeError, ValueError):
+        return "done"
+    if not isinstance(output, dict):
+        return "done"
+    if output.get("success") is False or output.get("error"):
+        return f"failed: {output.get('error', 'unknown error')}"
+    for field in ("results", "papers"):
+        if isinstance(output.get(field), list):
+            return f"{len(output[field])} {field}"
+    return "done"
+
+
+STREAM_MODES = ["updates", "custom", "messages", "values"]
+
+
+class _EventTranslator:
+    """Turns (mode, chunk) pairs from a LangGraph stream into UI events."""
+
+    def __init__(self):
+        self.final_state: Optional[dict] = None
+        # (message id, tool-call index) → [tool name, accumulated args JSON]
+        self.tool_call_buffers: Dict[Tuple[str, int], list] = {}
+        self.last_delta = 0.0
+
+    def events(self, mode: str, chunk) -> List[Dict]:
+        if mode == "values":
+            self.final_state = chunk
+
+        elif mode == "custom":
+            return [chunk]
+
+        elif mode == "updates":
+            if not isinstance(chunk, dict):
+                return []
+            # the pre-router plans like the oracle, just without the LLM call
+            for planner in ("pre_router", "oracle"):
+                update = chunk.get(planner)
+                if update and update.get("pending_tool_calls"):
+                    return [{
+                        "type": "oracle",
+                        "planner": planner,
+                        "calls": [{"name": c["name"], "args": c["args"]}
+                                  for c in update["pending_tool_calls"]],
+                    }]
+
+        elif mode == "messages":
+            message, meta = chunk
+            if meta.get("langgraph_node") != "oracle":
+                return []
+            out = []
+            for part in getattr(message, "tool_call_chunks", None) or []:
+                buffer = self.tool_call_buffers.setdefault((message.id, part.get("index") or 0), [None, ""])
+                buffer[0] = buffer[0] or part.get("name")
+                buffer[1] += part.get("args") or ""
+                if buffer[0] != "final_answer":
+                    continue
+                now = time.monotonic()
+                if now - self.last_delta < ANSWER_DELTA_INTERVAL_S:
+                    continue
+                answer = parse_partial_json(buffer[1]) if buffer[1] else None
+                if isinstance(answer, dict) and answer:
+                    self.last_delta = now
+                    out.append({"type": "answer_delta", "answer": answer})
+            return out
+
+        return []
+
+    def done(self) -> Dict:
+        return {"type": "done", "state": self.final_state}
+
+
+def stream_agent(inputs: dict, runnable=None) -> Iterator[Dict]:
+    """
+    Run the decision graph and yield events as they happen:
+
+      {"type": "oracle", "planner": "oracle" | "pre_router", "calls": [{"name", "args"}, ...]}
+      {"type": "tool_start", "tool", "args"}
+      {"type": "tool_finish", "tool", "args", "elapsed_s", "output"}
+      {"type": "answer_delta", "answer": partially generated final_answer args}
+      {"type": "done", "state": final graph state}
+
+    The final answer is itself a tool call, so its "tokens" are the streamed
+    JSON arguments of that call, parsed leniently as they arrive.
+    """
+    if runnable is None:
+        from src.decision.graph import runnable
+
+    translator = _EventTranslator()
+    for mode, chunk in runnable.stream(inputs, stream_mode=STREAM_MODES):
+        yield from translator.events(mode, chunk)
+    yield translator.done()
+
+
+async def astream_agent(inputs: dict, runnable=None) -> AsyncIterator[Dict]:
+    """
+    stream_agent over the async graph (same events). Sync callers can consume
+    it on the shared loop with src.aio.iterate.
+    """
+    if runnable is None:
+        from src.decision.graph import async_runnable as runnable
+
+    translator = _EventTranslator()
+    async for mode, chunk in runnable.astream(inputs, stream_mode=STREAM_MODES):
+        for event in translator.events(mode, chunk):
+            yield event
+    yield translator.done()
@@ -0,0 +1,31 @@
+# src/tokens.py
+# Shared tiktoken counting for prompt budgets, tracing and embedding batches.
+# Encodings are loaded lazily (tiktoken may download them on first use); when
+# that fails, counts fall back to a ~4 characters/token estimate.
+
+import threading
+from typing import Dict, Union
+
+import tiktoken
+
+_encoders: Dict[str, Union["tiktoken.Encoding", bool]] = {}
+_encoders_lock = threading.Lock()
+
+
+def _encoder(model: str):
+    with _encoders_lock:
+        if model not in _encoders:
+            try:
+                _encoders[model] = tiktoken.encoding_for_model(model)
+            except Exception as e:
+                print(f"⚠️ tiktoken unavailable for {model}, estimating tokens: {e}")
+                _encoders[model] = False
+        return _encoders[model]
+
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    """Token count of `text` for `model`."""
+    encoder = _encoder(model)
+    if encoder is False:
+        return len(text) // 4 + 1
+    return len(encoder.encode(text, disallowed_special=()))
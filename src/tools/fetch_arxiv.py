@@ -1,17 +1,10 @@
 # src/tools/fetch_arxiv.py
 # Agent tool wrapper for ArXiv fetching
 
-from src.data.dataset import fetch_arxiv_papers
+from src.data.dataset import fetch_arxiv_papers, afetch_arxiv_papers
 
 
-def fetch_arxiv(query: str, max_results: int = 5):
-    """
-    Agent-accessible tool for fetching ArXiv papers.
-    Uses dataset layer internally.
-    """
-
-    # Convert free-text query into ArXiv search_query format
-    result = fetch_arxiv_papers(query, max_results)
+def _tool_output(result: dict) -> dict:
     papers = result.get("papers", [])
 
     if not papers:
@@ -24,3 +17,18 @@ def fetch_arxiv(query: str, max_results: int = 5):
         "status": "success",
         "papers": papers
     }
+
+
+def fetch_arxiv(query: str, max_results: int = 5):
+    """
+    Agent-accessible tool for fetching ArXiv papers.
+    Uses dataset layer internally.
+    """
+
+    # Convert free-text query into ArXiv search_query format
+    return _tool_output(fetch_arxiv_papers(query, max_results))
+
+
+async def afetch_arxiv(query: str, max_results: int = 5):
+    """Async fetch_arxiv (same output)."""
+    return _tool_output(await afetch_arxiv_papers(query, max_results))
@@ -31,9 +31,11 @@ def final_answer(
     }
 
 
-def format_final_answer(output: Dict) -> str:
+def format_final_answer(output: Dict, partial: bool = False) -> str:
     """
     Convert the oracle final_answer tool output into a formatted markdown report.
+    With partial=True (an answer still being streamed), sections the model
+    has not reached yet are left out instead of shown as N/A.
     """
 
     intro = output.get("introduction", "N/A")
@@ -49,6 +51,19 @@ def format_final_answer(output: Dict) -> str:
     if isinstance(sources, list):
         sources = "\n".join([f"- {s}" for s in sources])
 
+    if partial:
+        sections = [
+            ("INTRODUCTION", "introduction", intro),
+            ("RESEARCH STEPS", "research_steps", steps),
+            ("REPORT", "main_body", main_body),
+            ("CONCLUSION", "conclusion", conclusion),
+            ("SOURCES", "sources", sources),
+        ]
+        return "\n" + "\n".join(
+            f"{title}\n{'-' * len(title)}\n{value}\n"
+            for title, key, value in sections if key in output
+        )
+
     return f"""
 INTRODUCTION
 ------------
@@ -6,15 +6,11 @@ import sys, os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from typing import List, Dict, Any
-import streamlit as st
-from langchain_community.vectorstores import Pinecone
-from src.config import embeddings, INDEX_NAME
-
-
-@st.cache_resource
-def get_vectorstore():
-    """Initialize and cache Pinecone vectorstore across Streamlit pages."""
-    return Pinecone.from_existing_index(index_name=INDEX_NAME, embedding=embeddings)
+from src.config import get_embeddings
+from src.data.hybrid_search import hybrid_search, ahybrid_search
+from src.data.paper_catalog import join_papers
+from src.data.retrieval_client import get_retrieval_client
+from src.data.retrieval_cache import cached_results, acached_results
 
 
 def _wrap_response(tool: str, success: bool, results: List[Dict[str, Any]], metadata: Dict[str, Any], error: str | None = None):
@@ -27,9 +23,44 @@ def _wrap_response(tool: str, success: bool, results: List[Dict[str, Any]], meta
     }
 
 
+def _normalize(hits) -> List[Dict[str, Any]]:
+    # chunks carry only their paper key; titles etc. come from the paper catalog
+    return [{
+        "content": m.text or "",
+        "title": meta.get("title", "Untitled Paper"),
+        "source": meta.get("source", "arxiv"),
+        "arxiv_id": meta.get("arxiv_id", "N/A"),
+        "page": meta.get("page"),
+    } for m, meta in zip(hits, join_papers(hits))]
+
+
+def _respond(query: str, metadata: Dict[str, Any], normalized: List[Dict[str, Any]]) -> Dict[str, Any]:
+    if not normalized:
+        msg = f"No vector matches found for query: '{query}'."
+        print(f"ℹ️ {msg}")
+        return _wrap_response("rag_search", True, [{
+            "content": msg,
+            "title": "No RAG Results",
+            "source": "system",
+            "arxiv_id": "N/A"
+        }], metadata)
+
+    return _wrap_response("rag_search", True, normalized, metadata)
+
+
+def _failed(metadata: Dict[str, Any], e: Exception) -> Dict[str, Any]:
+    err = f"Pinecone similarity_search failed: {e}"
+    print(f"⚠️ {err}")
+    return _wrap_response("rag_search", False, [], metadata, error=err)
+
+
 def rag_search(query: str, top_k: int = 5) -> Dict[str, Any]:
     """
     Retrieve semantically relevant papers from Pinecone index and return unified output.
+    Dense hits are fused with BM25 hits from the lexical index; exact-term
+    queries the lexical index is confident about skip the embedding call.
+    Repeated queries reuse the cached query embedding and, until the index
+    changes, the cached results.
 
     Args:
         query (str): The user's research query.
@@ -38,34 +69,32 @@ def rag_search(query: str, top_k: int = 5) -> Dict[str, Any]:
     Returns:
         dict: Unified result schema described above.
     """
-    vectorstore = get_vectorstore()
+    client = get_retrieval_client()
     metadata = {"query": query, "top_k": top_k}
 
+    def _search():
+        return _normalize(hybrid_search(client, get_embeddings(), query, top_k))
+
     try:
-        results = vectorstore.similarity_search(query, k=top_k)
+        normalized = cached_results("rag_search", query, None, top_k, _search)
     except Exception as e:
-        err = f"Pinecone similarity_search failed: {e}"
-        print(f"⚠️ {err}")
-        return _wrap_response("rag_search", False, [], metadata, error=err)
+        return _failed(metadata, e)
+    return _respond(query, metadata, normalized)
 
-    if not results:
-        msg = f"No vector matches found for query: '{query}'."
-        print(f"ℹ️ {msg}")
-        return _wrap_response("rag_search", True, [{
-            "content": msg,
-            "title": "No RAG Results",
-            "source": "system",
-            "arxiv_id": "N/A"
-        }], metadata)
 
-    # Normalize results
-    normalized = []
-    for r in results:
-        normalized.append({
-            "content": getattr(r, "page_content", "") or "",
-            "title": r.metadata.get("title", "Untitled Paper"),
-            "source": r.metadata.get("source", "arxiv"),
-            "arxiv_id": r.metadata.get("arxiv_id", "N/A"),
-        })
+async def arag_search(query: str, top_k: int = 5) -> Dict[str, Any]:
+    """
+    Async rag_search. The query is embedded with the async OpenAI client; the
+    vector-store calls (a blocking client) run in a worker thread.
+    """
+    client = get_retrieval_client()
+    metadata = {"query": query, "top_k": top_k}
+
+    async def _search():
+        return _normalize(await ahybrid_search(client, get_embeddings(), query, top_k))
 
-    return _wrap_response("rag_search", True, normalized, metadata)
+    try:
+        normalized = await acached_results("rag_search", query, None, top_k, _search)
+    except Exception as e:
+        return _failed(metadata, e)
+    return _respond(query, metadata, normalized)
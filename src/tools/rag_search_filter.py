@@ -6,15 +6,11 @@ import sys, os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 
 from typing import List, Dict, Any
-import streamlit as st
-from langchain_community.vectorstores import Pinecone
-from src.config import embeddings, INDEX_NAME
-
-
-@st.cache_resource
-def get_vectorstore():
-    """Initialize and cache Pinecone vectorstore across Streamlit pages."""
-    return Pinecone.from_existing_index(index_name=INDEX_NAME, embedding=embeddings)
+from src.config import get_embeddings
+from src.data.hybrid_search import hybrid_search, ahybrid_search
+from src.data.paper_catalog import join_papers
+from src.data.retrieval_client import get_retrieval_client
+from src.data.retrieval_cache import cached_results, acached_results
 
 
 def _wrap_response(tool: str, success: bool, results: List[Dict[str, Any]], metadata: Dict[str, Any], error: str | None = None):
@@ -27,9 +23,42 @@ def _wrap_response(tool: str, success: bool, results: List[Dict[str, Any]], meta
     }
 
 
+def _normalize(hits, arxiv_id: str) -> List[Dict[str, Any]]:
+    # chunks carry only their paper key; titles etc. come from the paper catalog
+    return [{
+        "content": m.text or "",
+        "title": meta.get("title", "Untitled Paper"),
+        "source": meta.get("source", "arxiv"),
+        "arxiv_id": meta.get("arxiv_id", arxiv_id),
+        "page": meta.get("page")
+    } for m, meta in zip(hits, join_papers(hits))]
+
+
+def _respond(query: str, arxiv_id: str, metadata: Dict[str, Any], normalized: List[Dict[str, Any]]) -> Dict[str, Any]:
+    if not normalized:
+        msg = f"No vector matches found for ArXiv ID {arxiv_id} with query: '{query}'."
+        print(f"ℹ️ {msg}")
+        return _wrap_response("rag_search_filter", True, [{
+            "content": msg,
+            "title": "No Filtered RAG Results",
+            "source": "system",
+            "arxiv_id": arxiv_id
+        }], metadata)
+
+    return _wrap_response("rag_search_filter", True, normalized, metadata)
+
+
+def _failed(metadata: Dict[str, Any], e: Exception) -> Dict[str, Any]:
+    err = f"Pinecone filtered similarity_search failed: {e}"
+    print(f"⚠️ {err}")
+    return _wrap_response("rag_search_filter", False, [], metadata, error=err)
+
+
 def rag_search_filter(query: str, arxiv_id: str, top_k: int = 6) -> Dict[str, Any]:
     """
     Retrieve relevant text chunks from Pinecone filtered by ArXiv ID.
+    Uses the same hybrid (BM25 + dense) ranking as rag_search. Repeated queries reuse the cached query embedding and, until the index
+    changes, the cached results.
 
     Args:
         query (str): The user's search query.
@@ -39,33 +68,33 @@ def rag_search_filter(query: str, arxiv_id: str, top_k: int = 6) -> Dict[str, An
     Returns:
         dict: Unified result schema.
     """
-    vectorstore = get_vectorstore()
+    client = get_retrieval_client()
     metadata = {"query": query, "arxiv_id": arxiv_id, "top_k": top_k}
 
+    search_filter = {"arxiv_id": arxiv_id}
+
+    def _search():
+        return _normalize(hybrid_search(client, get_embeddings(), query, top_k, arxiv_id=arxiv_id), arxiv_id)
+
     try:
-        results = vectorstore.similarity_search(query, k=top_k, filter={"arxiv_id": arxiv_id})
+        normalized = cached_results("rag_search_filter", query, search_filter, top_k, _search)
     except Exception as e:
-        err = f"Pinecone filtered similarity_search failed: {e}"
-        print(f"⚠️ {err}")
-        return _wrap_response("rag_search_filter", False, [], metadata, error=err)
+        return _failed(metadata, e)
+    return _respond(query, arxiv_id, metadata, normalized)
 
-    if not results:
-        msg = f"No vector matches found for ArXiv ID {arxiv_id} with query: '{query}'."
-        print(f"ℹ️ {msg}")
-        return _wrap_response("rag_search_filter", True, [{
-            "content": msg,
-            "title": "No Filtered RAG Results",
-            "source": "system",
-            "arxiv_id": arxiv_id
-        }], metadata)
 
-    normalized = []
-    for r in results:
-        normalized.append({
-            "content": getattr(r, "page_content", "") or "",
-            "title": r.metadata.get("title", "Untitled Paper"),
-            "source": r.metadata.get("source", "arxiv"),
-            "arxiv_id": r.metadata.get("arxiv_id", arxiv_id)
-        })
+async def arag_search_filter(query: str, arxiv_id: str, top_k: int = 6) -> Dict[str, Any]:
+    """Async rag_search_filter (see arag_search)."""
+    client = get_retrieval_client()
+    metadata = {"query": query, "arxiv_id": arxiv_id, "top_k": top_k}
 
-    return _wrap_response("rag_search_filter", True, normalized, metadata)
+    search_filter = {"arxiv_id": arxiv_id}
+
+    async def _search():
+        return _normalize(await ahybrid_search(client, get_embeddings(), query, top_k, arxiv_id=arxiv_id), arxiv_id)
+
+    try:
+        normalized = await acached_results("rag_search_filter", query, search_filter, top_k, _search)
+    except Exception as e:
+        return _failed(metadata, e)
+    return _respond(query, arxiv_id, metadata, normalized)
@@ -6,9 +6,16 @@ import sys, os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 
 from typing import List, Dict, Any
+import asyncio
 import time
 import requests
+from src.aio import get_http_client
 from src.config import SERP_API_KEY
+from src.data.http_cache import cached_response
+from src.tracing import span
+
+SERPAPI_URL = os.getenv("SERPAPI_URL", "https://serpapi.com/search")
+WIKIPEDIA_SUMMARY_URL = os.getenv("WIKIPEDIA_SUMMARY_URL", "https://en.wikipedia.org/api/rest_v1/page/summary")
 
 
 def _wrap_response(tool: str, success: bool, results: List[Dict[str, Any]], metadata: Dict[str, Any], error: str | None = None):
@@ -21,59 +28,83 @@ def _wrap_response(tool: str, success: bool, results: List[Dict[str, Any]], meta
     }
 
 
+def _wikipedia_url(query: str) -> str:
+    return f"{WIKIPEDIA_SUMMARY_URL}/{query.replace(' ', '%20')}"
+
+
+def _wikipedia_results(resp) -> List[Dict[str, Any]]:
+    """Parse a summary API response (requests or httpx)."""
+    if resp.status_code == 200:
+        data = resp.json()
+        if "extract" in data:
+            return [{
+                "title": data.get("title", "Wikipedia Result"),
+                "link": data.get("content_urls", {}).get("desktop", {}).get("page", "N/A"),
+                "snippet": data["extract"],
+                "source": "wikipedia"
+            }]
+    return []
+
+
+@cached_response("wikipedia")
 def wikipedia_fallback(query: str) -> List[Dict[str, Any]]:
     """Fallback: try Wikipedia summary API. Always returns a list (possibly empty)."""
     try:
-        url = f"https://en.wikipedia.org/api/rest_v1/page/summary/{query.replace(' ', '%20')}"
-        resp = requests.get(url, timeout=6)
-        if resp.status_code == 200:
-            data = resp.json()
-            if "extract" in data:
-                return [{
-                    "title": data.get("title", "Wikipedia Result"),
-                    "link": data.get("content_urls", {}).get("desktop", {}).get("page", "N/A"),
-                    "snippet": data["extract"],
-                    "source": "wikipedia"
-                }]
+        with span("http:wikipedia", kind="http") as s:
+            resp = requests.get(_wikipedia_url(query), timeout=6)
+            s.set(status=resp.status_code, response_bytes=len(resp.content))
+        return _wikipedia_results(resp)
     except Exception as e:
         print(f"⚠️ Wikipedia fallback failed: {e}")
     return []
 
 
-def web_search(query: str, num_results: int = 5) -> Dict[str, Any]:
-    """
-    Performs a web search using SerpAPI with retries and safe fallbacks.
-    Guarantees unified output schema.
+@cached_response("wikipedia", name="wikipedia_fallback")
+async def awikipedia_fallback(query: str) -> List[Dict[str, Any]]:
+    """Async wikipedia_fallback over the shared httpx client."""
+    try:
+        with span("http:wikipedia", kind="http") as s:
+            resp = await get_http_client().get(_wikipedia_url(query), timeout=6)
+            s.set(status=resp.status_code, response_bytes=len(resp.content))
+        return _wikipedia_results(resp)
+    except Exception as e:
+        print(f"⚠️ Wikipedia fallback failed: {e}")
+    return []
 
-    Args:
-        query (str): The search query.
-        num_results (int): Number of results to return.
 
-    Returns:
-        dict: Unified result schema.
+def _serpapi_results(resp, num_results: int) -> List[Dict[str, Any]]:
+    """Organic results of a 200 SerpAPI response; empty when there are none."""
+    if resp.status_code != 200:
+        return []
+    organic = resp.json().get("organic_results", []) or []
+    return [{
+        "title": r.get("title", "No Title"),
+        "link": r.get("link", "N/A"),
+        "snippet": r.get("snippet", "No snippet available."),
+        "source": r.get("source", "web")
+    } for r in organic[:num_results]]
+
+
+@cached_response("serpapi", cache_if=lambda r: bool(r["results"]))
+def serpapi_search(query: str, num_results: int = 5) -> Dict[str, Any]:
+    """
+    Query SerpAPI with retries and a short linear backoff.
+    Returns {"results": [...], "error": str | None}; only non-empty result
+    lists are kept in the response cache.
     """
-    url = "https://serpapi.com/search"
+    url = SERPAPI_URL
     params = {"q": query, "api_key": SERP_API_KEY, "num": num_results}
-    metadata = {"query": query, "num_results": num_results}
 
     # Retry with exponential backoff
     last_exception = None
     for attempt in range(3):
         try:
-            resp = requests.get(url, params=params, timeout=6)
-            if resp.status_code == 200:
-                data = resp.json()
-                organic = data.get("organic_results", []) or []
-                if organic:
-                    results = []
-                    for r in organic[:num_results]:
-                        results.append({
-                            "title": r.get("title", "No Title"),
-                            "link": r.get("link", "N/A"),
-                            "snippet": r.get("snippet", "No snippet available."),
-                            "source": r.get("source", "web")
-                        })
-                    return _wrap_response("web_search", True, results, metadata)
+            with span("http:serpapi", kind="http", attempt=attempt + 1) as s:
+                resp = requests.get(url, params=params, timeout=6)
+                s.set(status=resp.status_code, response_bytes=len(resp.content))
+            results = _serpapi_results(resp, num_results)
+            if results:
+                return {"results": results, "error": None}
             # short backoff before next attempt
             time.sleep(0.8 * (attempt + 1))
         except Exception as e:
@@ -81,11 +112,74 @@ def web_search(query: str, num_results: int = 5) -> Dict[str, Any]:
             print(f"⚠️ SerpAPI request failed (attempt {attempt+1}/3): {e}")
             time.sleep(0.8 * (attempt + 1))
 
+    return {"results": [], "error": str(last_exception) if last_exception else None}
+
+
+@cached_response("serpapi", cache_if=lambda r: bool(r["results"]), name="serpapi_search")
+async def aserpapi_search(query: str, num_results: int = 5) -> Dict[str, Any]:
+    """Async serpapi_search: same retries, but the backoff yields the event loop."""
+    params = {"q": query, "api_key": SERP_API_KEY, "num": num_results}
+
+    last_exception = None
+    for attempt in range(3):
+        try:
+            with span("http:serpapi", kind="http", attempt=attempt + 1) as s:
+                resp = await get_http_client().get(SERPAPI_URL, params=params, timeout=6)
+                s.set(status=resp.status_code, response_bytes=len(resp.content))
+            results = _serpapi_results(resp, num_results)
+            if results:
+                return {"results": results, "error": None}
+        except Exception as e:
+            last_exception = e
+            print(f"⚠️ SerpAPI request failed (attempt {attempt+1}/3): {e}")
+        await asyncio.sleep(0.8 * (attempt + 1))
+
+    return {"results": [], "error": str(last_exception) if last_exception else None}
+
+
+def web_search(query: str, num_results: int = 5) -> Dict[str, Any]:
+    """
+    Performs a web search using SerpAPI with retries and safe fallbacks.
+    Guarantees unified output schema. SerpAPI and Wikipedia responses are
+    served from the shared response cache when available.
+
+    Args:
+        query (str): The search query.
+        num_results (int): Number of results to return.
+
+    Returns:
+        dict: Unified result schema.
+    """
+    metadata = {"query": query, "num_results": num_results}
+
+    serp = serpapi_search(query, num_results)
+    if serp["results"]:
+        return _wrap_response("web_search", True, serp["results"], metadata)
+
     # Try Wikipedia fallback (guarantees a list result)
     wiki_results = wikipedia_fallback(query)
     if wiki_results:
         return _wrap_response("web_search", True, wiki_results, metadata)
 
+    return _unavailable(query, metadata, serp["error"])
+
+
+async def aweb_search(query: str, num_results: int = 5) -> Dict[str, Any]:
+    """Async web_search: same fallbacks and schema, no thread held while waiting."""
+    metadata = {"query": query, "num_results": num_results}
+
+    serp = await aserpapi_search(query, num_results)
+    if serp["results"]:
+        return _wrap_response("web_search", True, serp["results"], metadata)
+
+    wiki_results = await awikipedia_fallback(query)
+    if wiki_results:
+        return _wrap_response("web_search", True, wiki_results, metadata)
+
+    return _unavailable(query, metadata, serp["error"])
+
+
+def _unavailable(query: str, metadata: Dict[str, Any], last_exception) -> Dict[str, Any]:
     # Final safe fallback (empty structured message)
     err_msg = f"SerpAPI failed after retries. Last error: {last_exception}"
     print(f"⚠️ {err_msg}")
@@ -0,0 +1,217 @@
+# src/tracing.py
+# Lightweight spans for the decision graph: oracle calls, tool executions and
+# the HTTP / embedding / vector-store calls nested inside them. The active
+# trace and span live in contextvars, so nesting follows the call stack;
+# work handed to a thread pool keeps its parent via `submit_in_context`.
+#
+# Spans are only recorded inside `trace(...)`; elsewhere `span(...)` is a
+# near-free no-op, so ingestion and scripts pay nothing.
+
+import os
+import json
+import time
+import uuid
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "data/cache/traces.jsonl")
+# the export file is rotated to "<path>.1" (replacing the previous one) past this size
+TRACE_EXPORT_MAX_MB = float(os.getenv("TRACE_EXPORT_MAX_MB", "32"))
+
+_export_lock = threading.Lock()
+
+
+class Span:
+    """One timed operation. `attrs` holds token counts, payload sizes, status codes, ..."""
+
+    __slots__ = ("span_id", "parent_id", "name", "kind", "depth", "start", "end", "attrs", "error", "thread")
+
+    def __init__(self, name: str, kind: str, parent: Optional["Span"], attrs: Dict[str, Any]):
+        self.span_id = uuid.uuid4().hex[:12]
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.kind = kind
+        self.depth = parent.depth + 1 if parent else 0
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.attrs = attrs
+        self.error: Optional[str] = None
+        self.thread = threading.current_thread().name
+
+    @property
+    def recording(self) -> bool:
+        return True
+
+    @property
+    def duration_s(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+class _NoopSpan:
+    """Returned by `span` when no trace is active."""
+
+    recording = False
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """All spans recorded for one request (e.g. one question on the Ask page)."""
+
+    def __init__(self, name: str, attrs: Dict[str, Any]):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.attrs = attrs
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """
+        Spans depth-first (each parent followed by its children, siblings in
+        start order), times in ms relative to the trace start.
+        """
+        with self._lock:
+            by_start = sorted(self.spans, key=lambda s: s.start)
+        known = {s.span_id for s in by_start}
+        children: Dict[Optional[str], List[Span]] = {}
+        for s in by_start:
+            children.setdefault(s.parent_id if s.parent_id in known else None, []).append(s)
+
+        spans: List[Span] = []
+        stack = list(reversed(children.get(None, [])))
+        while stack:
+            s = stack.pop()
+            spans.append(s)
+            stack.extend(reversed(children.get(s.span_id, [])))
+
+        return [{
+            "trace_id": self.trace_id,
+            "trace": self.name,
+            "span_id": s.span_id,
+            "parent_id": s.parent_id,
+            "name": s.name,
+            "kind": s.kind,
+            "depth": s.depth,
+            "thread": s.thread,
+            "start_ms": round((s.start - self.start) * 1000, 2),
+            "duration_ms": round(s.duration_s * 1000, 2),
+            "error": s.error,
+            "attrs": s.attrs,
+        } for s in spans]
+
+    def summary(self) -> Dict[str, Any]:
+        """Total wall time plus time and token totals per span kind."""
+        by_kind: Dict[str, Dict[str, float]] = {}
+        for r in self.to_records():
+            k = by_kind.setdefault(r["kind"], {"spans": 0, "duration_ms": 0.0, "tokens": 0})
+            k["spans"] += 1
+            k["duration_ms"] += r["duration_ms"]
+            k["tokens"] += r["attrs"].get("input_tokens", 0) + r["attrs"].get("output_tokens", 0)
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "wall_ms": round((time.perf_counter() - self.start) * 1000, 2),
+            "by_kind": by_kind,
+        }
+
+    def to_jsonl(self) -> str:
+        return "".join(json.dumps(r, default=str) + "\n" for r in self.to_records())
+
+    def export(self, path: str = TRACE_EXPORT_PATH, max_bytes: int = int(TRACE_EXPORT_MAX_MB * 1024 * 1024)):
+        """Append every span as one JSON line; rotate the file once it would pass `max_bytes`."""
+        data = self.to_jsonl().encode("utf-8")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with _export_lock:
+            try:
+                size = os.path.getsize(path)
+            except FileNotFoundError:
+                size = 0
+            if size and size + len(data) > max_bytes:
+                os.replace(path, path + ".1")
+            with open(path, "ab") as f:
+                f.write(data)
+
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("trace", default=None)
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("span", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def trace(name: str, export: bool = True, **attrs) -> Iterator[Trace]:
+    """
+    Record every span opened (directly or in propagated threads) until exit.
+    With `export`, the spans are appended to TRACE_EXPORT_PATH (if set).
+    """
+    t = Trace(name, attrs)
+    trace_token = _current_trace.set(t)
+    span_token = _current_span.set(None)
+    try:
+        yield t
+    finally:
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+        if export and TRACE_EXPORT_PATH:
+            try:
+                t.export(TRACE_EXPORT_PATH)
+            except OSError as e:
+                print(f"⚠️ Could not export trace {t.trace_id}: {e}")
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", activate: bool = True, **attrs):
+    """
+    Time the enclosed block as a child of the current span. With
+    activate=False the span is recorded but does not become the parent of
+    spans opened inside the block (use this inside generators, whose
+    context leaks into the consumer between yields).
+    """
+    t = _current_trace.get()
+    if t is None:
+        yield _NOOP_SPAN
+        return
+
+    s = Span(name, kind, _current_span.get(), attrs)
+    t.add(s)
+    token = _current_span.set(s) if activate else None
+    try:
+        yield s
+    except BaseException as e:
+        s.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        s.end = time.perf_counter()
+        if token is not None:
+            _current_span.reset(token)
+
+
+def submit_in_context(pool, fn: Callable, *args, **kwargs):
+    """`pool.submit` that runs `fn` under the caller's trace and span."""
+    return pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def payload_bytes(value: Any) -> int:
+    """Serialized size of a tool argument / result, for span attributes."""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if not isinstance(value, str):
+        value = json.dumps(value, default=str)
+    return len(value.encode("utf-8"))